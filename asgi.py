@@ -0,0 +1,218 @@
+"""
+Point d'entrée ASGI : service asynchrone de l'application
+
+Les vues Flask (index, showSummary, book, purchasePlaces, public_points et
+les autres routes) travaillent en mémoire et sont exécutées directement dans
+la boucle d'événements ; seules les écritures des fichiers JSON, qui
+bloquaient un worker par réservation, sont différées et faites dans un pool
+de threads. Les écritures des requêtes concurrentes sont regroupées : un seul
+commit couvre toutes les réservations faites pendant l'écriture précédente.
+La réponse n'est envoyée qu'une fois les données écrites. Le flux
+d'évènements /events occupe un thread par client abonné
+(GUDLFT_MAX_STREAMS au plus).
+
+L'écrivain unique (GUDLFT_SINGLE_WRITER=1) n'est pas compatible : attendre
+son résultat bloquerait la boucle d'événements, le service refuse donc de
+démarrer s'il est actif.
+
+Usage :
+    uvicorn asgi:application --port 5000
+"""
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import server
+
+
+executor = ThreadPoolExecutor(max_workers=int(os.environ.get('GUDLFT_PERSIST_THREADS', 4)),
+                              thread_name_prefix='gudlft-persist')
+
+# Event streams (/events) block a thread each while waiting for changes
+streamExecutor = ThreadPoolExecutor(max_workers=int(os.environ.get('GUDLFT_MAX_STREAMS', 256)),
+                                    thread_name_prefix='gudlft-stream')
+
+# Per storage: datasets waiting to be written and the lock of their writer
+pendingCommits = {}
+commitLocks = {}
+
+
+def checkBookingWriter():
+    """Refuse the single writer, whose result would be awaited in the event loop
+
+    Raises:
+        RuntimeError: When server.bookingWriter is running
+    """
+    if server.bookingWriter.running:
+        raise RuntimeError('GUDLFT_SINGLE_WRITER=1 blocks the event loop: '
+                           'unset it to serve asgi:application.')
+
+
+def scopeToEnviron(scope, body):
+    """Build the WSGI environ of an ASGI HTTP request"""
+    host, port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI carries the raw UTF-8 path bytes decoded as latin-1
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': host,
+        'SERVER_PORT': str(port),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        # The body is already read in full, chunked requests included
+        'CONTENT_LENGTH': str(len(body)),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+        'gudlft.pending_writes': {'dataset': None, 'files': set()}
+    }
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = 'HTTP_' + name
+            environ[key] = environ[key] + ',' + value if key in environ else value
+    return environ
+
+
+def callWsgi(environ):
+    """Run the Flask application on an environ; return (status, headers, body chunks)"""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = headers
+
+    chunks = server.app(environ, start_response)
+    return response['status'], response['headers'], chunks
+
+
+def isStream(headers):
+    return any(name.lower() == 'content-type' and value.startswith('text/event-stream')
+               for name, value in headers)
+
+
+async def waitDisconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def sendStream(chunks, send, receive):
+    """Send a streamed body chunk by chunk, reading it in a stream thread
+
+    Stops when the body ends or the client disconnects (checked at least
+    once per keepalive since the stream then yields a comment).
+    """
+    loop = asyncio.get_running_loop()
+    iterator = iter(chunks)
+    disconnected = asyncio.ensure_future(waitDisconnect(receive))
+    try:
+        while not disconnected.done():
+            chunk = await loop.run_in_executor(streamExecutor, next, iterator, None)
+            if chunk is None:
+                await send({'type': 'http.response.body', 'body': b''})
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        disconnected.cancel()
+        await loop.run_in_executor(streamExecutor, closeChunks, chunks)
+
+
+def closeChunks(chunks):
+    if hasattr(chunks, 'close'):
+        chunks.close()
+
+
+async def commitPending(pending):
+    """Write the files queued by a request, grouped with concurrent requests"""
+    if not pending['files']:
+        return
+    dataset = pending['dataset']
+    key = id(dataset.storage)
+    queued = pendingCommits.setdefault(key, {'dataset': dataset, 'files': set()})
+    queued['dataset'] = dataset
+    queued['files'].update(pending['files'])
+
+    lock = commitLocks.setdefault(key, asyncio.Lock())
+    async with lock:
+        queued = pendingCommits.pop(key, None)
+        if queued is None:
+            # Already written by a commit started after this request's changes
+            return
+        # Serialised in the event loop so the data does not change while dumped
+        contents = server.datasetContents(queued['dataset'], sorted(queued['files']))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(executor, server.commitContents,
+                                   queued['dataset'].storage, contents, 'async')
+
+
+async def readBody(receive):
+    body = b''
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    return body
+
+
+async def handleHttp(scope, receive, send):
+    environ = scopeToEnviron(scope, await readBody(receive))
+    status, headers, chunks = callWsgi(environ)
+    stream = isStream(headers)
+    if not stream:
+        try:
+            body = b''.join(chunks)
+        finally:
+            closeChunks(chunks)
+    await commitPending(environ['gudlft.pending_writes'])
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    if stream:
+        await sendStream(chunks, send, receive)
+    else:
+        await send({'type': 'http.response.body', 'body': body})
+
+
+async def handleLifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                checkBookingWriter()
+            except RuntimeError as error:
+                await send({'type': 'lifespan.startup.failed', 'message': str(error)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Waits for the writes still running in the pool
+            executor.shutdown(wait=True)
+            streamExecutor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    """ASGI application serving server.app"""
+    if scope['type'] == 'http':
+        await handleHttp(scope, receive, send)
+    elif scope['type'] == 'lifespan':
+        await handleLifespan(receive, send)
+
+
+checkBookingWriter()
@@ -0,0 +1,182 @@
+"""
+Benchmark hors ligne des routes et fonctions de données de server.py
+
+Les données (clubs, compétitions, réservations) sont générées à plusieurs
+échelles par generate_data.py et servies depuis un stockage en mémoire ; les
+mesures sont faites dans le processus, sans serveur lancé, et les
+sauvegardes ne touchent aucun fichier.
+
+Usage :
+    python benchmark.py
+    python benchmark.py --scales 1k 100k --output bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import server
+from generate_data import SCALES, generateDataset
+
+
+@contextmanager
+def loadedDataset(clubs, competitions, bookings):
+    """Serve a dataset from an in-memory storage, so saves never touch the data files
+
+    The served copies are server.clubs, server.competitions and
+    server.bookings; yields the storage.
+    """
+    files = {
+        'clubs.json': json.dumps({'clubs': clubs}),
+        'competitions.json': json.dumps({'competitions': competitions}),
+        'bookings.json': json.dumps({'bookings': bookings})
+    }
+    with server.useStorage(server.MemoryStorage(files)) as storage:
+        yield storage
+
+
+# Shorter rounds are dominated by timer resolution and scheduling noise
+MIN_ROUND_SECONDS = 0.05
+
+
+def calibrate(func, number, min_round=MIN_ROUND_SECONDS):
+    """Return the number of calls per round, at least number, making a round last min_round
+
+    The calibration rounds also warm up caches and lazily built indexes.
+    """
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        if time.perf_counter() - start >= min_round:
+            return number
+        number *= 2
+
+
+def measure(func, repeat, number, min_round=MIN_ROUND_SECONDS):
+    """Run func repeat rounds of at least number calls; return per-call timings"""
+    number = calibrate(func, number, min_round)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        timings.append((time.perf_counter() - start) / number)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.mean(timings),
+        'repeat': repeat,
+        'number': number
+    }
+
+
+def defineBenchmarks(clubs, competitions):
+    """Return {name: (callable, number of calls per round)} for a loaded dataset"""
+    app = server.app
+    last_club = clubs[-1]
+    last_competition = competitions[-1]
+    rich_club = {'name': 'Benchmark Club', 'email': 'bench@club.com', 'points': str(10 ** 9)}
+    clubs.append(rich_club)
+    open_competition = {'name': 'Benchmark Competition', 'date': '2099-06-01 10:00:00',
+                        'numberOfPlaces': str(10 ** 9)}
+    competitions.append(open_competition)
+    limits = server.calculateBookingLimits(last_club, last_competition)
+    client = app.test_client()
+
+    def render(template_name, **context):
+        def run():
+            with app.test_request_context('/'):
+                server.render_template(template_name, **context)
+        return run
+
+    booking_context = dict(club=last_club, competition=last_competition,
+                           max_remaining=limits['max_remaining'],
+                           places_already_booked=limits['places_already_booked'],
+                           club_points=limits['club_points'],
+                           available_places=limits['available_places'],
+                           limited_by_text=limits['limited_by_text'],
+                           waitlist_max=limits['waitlist_max'])
+
+    return {
+        'findClubByName': (lambda: server.findClubByName(last_club['name']), 100),
+        'findClubByEmail': (lambda: server.findClubByEmail(last_club['email']), 100),
+        'findCompetitionByName': (lambda: server.findCompetitionByName(last_competition['name']), 100),
+        'calculateBookingLimits': (lambda: server.calculateBookingLimits(last_club, last_competition), 10),
+        'validateBookingRequest': (lambda: server.validateBookingRequest(3, limits), 1000),
+        'processBooking': (lambda: server.processBooking(rich_club, open_competition, 1), 1),
+        'route.public_points': (lambda: client.get('/public/points'), 1),
+        'render.index.html': (render('index.html'), 10),
+        'render.welcome.html': (render('welcome.html', club=last_club, competitions=competitions), 1),
+        'render.booking.html': (render('booking.html', **booking_context), 10),
+        'render.public_points.html': (render('public_points.html', clubs=[
+            {'name': c['name'], 'points': int(c['points'])} for c in clubs]), 1)
+    }
+
+
+def runBenchmarks(scales, repeat=5, only=None, min_round=MIN_ROUND_SECONDS):
+    """Run every benchmark at each scale; return {scale: {benchmark: timings}}"""
+    results = {}
+    for scale in scales:
+        sizes = SCALES[scale]
+        clubs, competitions, bookings = generateDataset(sizes['clubs'], sizes['competitions'], sizes['bookings'])
+        results[scale] = {}
+        with loadedDataset(clubs, competitions, bookings):
+            for name, (func, number) in defineBenchmarks(server.clubs, server.competitions).items():
+                if only and name not in only:
+                    continue
+                results[scale][name] = measure(func, repeat, number, min_round)
+    return results
+
+
+def currentCommit():
+    """Git commit of the working tree, or None outside a git checkout"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark server.py in-process')
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['1k', '100k'])
+    parser.add_argument('--repeat', type=int, default=5, help='rounds per benchmark')
+    parser.add_argument('--min-round-ms', type=float, default=MIN_ROUND_SECONDS * 1000,
+                        help='minimum duration of a round, calls per round are raised to reach it')
+    parser.add_argument('--only', nargs='+', help='benchmark names to run')
+    parser.add_argument('--output', help='JSON results file (default: benchmarks/results/<commit>-<date>.json)')
+    args = parser.parse_args(argv)
+
+    results = runBenchmarks(args.scales, args.repeat, args.only, args.min_round_ms / 1000)
+    commit = currentCommit()
+    report = {
+        'commit': commit,
+        'created': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'scales': {scale: SCALES[scale] for scale in args.scales},
+        'results': results
+    }
+
+    output = args.output or os.path.join(
+        'benchmarks', 'results', f"{commit or 'nogit'}-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=4)
+
+    for scale, benchmarks in results.items():
+        print(f'[{scale}]')
+        for name, timing in benchmarks.items():
+            print(f"  {name:<28} median {timing['median'] * 1000:10.3f} ms  ({timing['number']} calls/round)")
+    print(f'Results saved to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
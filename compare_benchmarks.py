@@ -0,0 +1,138 @@
+"""
+Contrôle de non-régression des performances
+
+Lance la suite de benchmark.py (ou lit un fichier de résultats existant) et
+compare la médiane de chaque benchmark à celle de la référence enregistrée
+dans benchmarks/baseline.json. Un benchmark est en régression s'il est plus
+lent que la référence au-delà de sa tolérance et de son bruit de mesure, ou
+s'il dépasse son plafond absolu (max_ms) ; le code de sortie est alors 1.
+
+Usage :
+    python compare_benchmarks.py
+    python compare_benchmarks.py --results benchmarks/results/abc123.json
+    python compare_benchmarks.py --update-baseline
+"""
+import argparse
+import json
+import os
+import sys
+
+from benchmark import runBenchmarks, currentCommit
+
+
+BASELINE_PATH = os.path.join('benchmarks', 'baseline.json')
+
+# Allowed slowdown when the baseline does not define one (0.25 = 25% slower)
+DEFAULT_TOLERANCE = 0.25
+
+def noiseMs(timing, min_delta_ms=0.0):
+    """Difference to a baseline timing that is measurement noise, in ms
+
+    The spread between the median and the fastest round of the baseline
+    itself, so the floor scales with each benchmark; min_delta_ms raises it
+    for a benchmark known to be noisier.
+    """
+    return max((timing['median'] - timing.get('min', timing['median'])) * 1000, min_delta_ms)
+
+
+def compareResults(baseline, current):
+    """Compare current results to the baseline
+
+    Args:
+        baseline (dict): Baseline file content (results, tolerances, min_delta_ms, max_ms),
+            min_delta_ms being {benchmark: ms}
+        current (dict): {scale: {benchmark: timings}} from runBenchmarks()
+
+    Returns:
+        list: One row per benchmark (scale, name, baseline_ms, current_ms, change, status)
+    """
+    tolerances = baseline.get('tolerances', {})
+    default_tolerance = baseline.get('default_tolerance', DEFAULT_TOLERANCE)
+    min_delta_ms = baseline.get('min_delta_ms', {})
+    max_ms = baseline.get('max_ms', {})
+
+    rows = []
+    for scale, benchmarks in baseline['results'].items():
+        for name, timing in benchmarks.items():
+            baseline_ms = timing['median'] * 1000
+            current_timing = current.get(scale, {}).get(name)
+            if current_timing is None:
+                rows.append((scale, name, baseline_ms, None, None, 'missing'))
+                continue
+            current_ms = current_timing['median'] * 1000
+            change = (current_ms - baseline_ms) / baseline_ms if baseline_ms else 0.0
+            tolerance = tolerances.get(name, default_tolerance)
+            noise_ms = noiseMs(timing, min_delta_ms.get(name, 0.0))
+            if name in max_ms and current_ms > max_ms[name]:
+                status = 'OVER LIMIT'
+            elif change > tolerance and current_ms - baseline_ms > noise_ms:
+                status = 'REGRESSION'
+            elif change < -tolerance and baseline_ms - current_ms > noise_ms:
+                status = 'faster'
+            else:
+                status = 'ok'
+            rows.append((scale, name, baseline_ms, current_ms, change, status))
+
+    for scale, benchmarks in current.items():
+        for name, timing in benchmarks.items():
+            if name not in baseline['results'].get(scale, {}):
+                rows.append((scale, name, None, timing['median'] * 1000, None, 'new'))
+    return rows
+
+
+def formatRows(rows):
+    """Format comparison rows as a readable table"""
+    lines = [f"{'scale':<6} {'benchmark':<28} {'baseline':>12} {'current':>12} {'change':>9}  status"]
+    for scale, name, baseline_ms, current_ms, change, status in rows:
+        baseline_text = f'{baseline_ms:.3f} ms' if baseline_ms is not None else '-'
+        current_text = f'{current_ms:.3f} ms' if current_ms is not None else '-'
+        change_text = f'{change:+.1%}' if change is not None else '-'
+        lines.append(f'{scale:<6} {name:<28} {baseline_text:>12} {current_text:>12} {change_text:>9}  {status}')
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare benchmark results to the committed baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--results', help='existing results file from benchmark.py instead of running the suite')
+    parser.add_argument('--repeat', type=int, default=5, help='rounds per benchmark')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='replace the baseline results with the current ones, keeping its tolerances')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.results:
+        with open(args.results) as f:
+            current = json.load(f)['results']
+    else:
+        scales = list(baseline.get('results', {})) or ['1k']
+        current = runBenchmarks(scales, args.repeat)
+
+    if args.update_baseline or not baseline:
+        baseline.update({'commit': currentCommit(), 'results': current})
+        baseline.setdefault('default_tolerance', DEFAULT_TOLERANCE)
+        baseline.setdefault('min_delta_ms', {})
+        baseline.setdefault('tolerances', {})
+        baseline.setdefault('max_ms', {})
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=4)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+
+    rows = compareResults(baseline, current)
+    print(formatRows(rows))
+    regressions = [row for row in rows if row[5] in ('REGRESSION', 'OVER LIMIT')]
+    if regressions:
+        print(f'\n{len(regressions)} benchmark(s) slower than the baseline (commit {baseline.get("commit")}) or over their limit.')
+        return 1
+    print('\nNo performance regression.')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
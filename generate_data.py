@@ -0,0 +1,183 @@
+"""
+Générateur déterministe de données synthétiques pour les tests de charge
+
+Produit des clubs, compétitions et réservations cohérents entre eux :
+les points des clubs et les places des compétitions sont ceux restant
+après l'historique de réservations, et la limite de 12 places par club et
+par compétition est respectée.
+
+Les dates des compétitions sont réparties autour de --now (aujourd'hui par
+défaut), pour qu'une partie soit toujours à venir ; à date et seed égaux, le
+jeu de données est identique.
+
+Usage :
+    python generate_data.py --scale 100k --output data/100k
+    python generate_data.py --clubs 500 --competitions 40 --bookings 5000 --seed 3
+    python generate_data.py --scale 1k --now 2026-01-01
+"""
+import argparse
+import bisect
+import itertools
+import json
+import os
+import random
+import sys
+from datetime import date, datetime, timedelta
+
+
+# Preset sizes, named after their number of bookings
+SCALES = {
+    '1k': {'clubs': 100, 'competitions': 20, 'bookings': 1000},
+    '100k': {'clubs': 5000, 'competitions': 500, 'bookings': 100000},
+    '1M': {'clubs': 20000, 'competitions': 2000, 'bookings': 1000000}
+}
+
+# Share of the booking history that was cancelled afterwards
+CANCELLED_RATIO = 0.03
+
+# Places per booking: most clubs book a few places at a time
+PLACES_CHOICES = [1, 2, 3, 4, 6, 12]
+PLACES_WEIGHTS = [40, 25, 15, 10, 7, 3]
+
+
+def zipfCumWeights(count, exponent=1.1):
+    """Cumulative Zipf weights: a few clubs/competitions get most of the bookings"""
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, count + 1)))
+
+
+def generateClubs(rng, count):
+    """Clubs with log-normally distributed remaining points (median around 10)"""
+    return [
+        {
+            'name': f'Club {i + 1}',
+            'email': f'secretary@club{i + 1}.example.com',
+            'points': str(min(200, int(rng.lognormvariate(2.3, 0.7))))
+        }
+        for i in range(count)
+    ]
+
+
+def generateCompetitions(rng, count, now):
+    """Competitions over the past and next year, mostly small, about 10% already full"""
+    competitions = []
+    for i in range(count):
+        date = now + timedelta(days=rng.randint(-365, 365), hours=rng.choice([9, 10, 13, 14]))
+        if rng.random() < 0.1:
+            places = 0
+        else:
+            places = int(rng.choice([10, 20, 25, 30, 50, 100, 250, 500]) * rng.uniform(0.1, 1))
+        competitions.append({
+            'name': f'Competition {i + 1}',
+            'date': date.strftime('%Y-%m-%d %H:00:00'),
+            'numberOfPlaces': str(places)
+        })
+    return competitions
+
+
+def generateDataset(clubs_count, competitions_count, bookings_count, seed=0, now=None):
+    """Generate a consistent dataset
+
+    Points and places are the values left after the booking history, so any
+    history is consistent with them; bookings pick clubs and competitions
+    following Zipf distributions and are only kept if they respect the 12
+    places cap per club and competition.
+
+    Args:
+        clubs_count (int): Number of clubs
+        competitions_count (int): Number of competitions
+        bookings_count (int): Target number of bookings
+        seed (int): Random seed, the same seed gives the same dataset
+        now (datetime, optional): Reference date for competition dates, today by default
+
+    Returns:
+        tuple: (clubs, competitions, bookings) in the JSON files format
+    """
+    rng = random.Random(seed)
+    now = now or datetime.combine(date.today(), datetime.min.time())
+    clubs = generateClubs(rng, clubs_count)
+    competitions = generateCompetitions(rng, competitions_count, now)
+
+    competition_dates = {c['name']: datetime.strptime(c['date'], '%Y-%m-%d %H:%M:%S') for c in competitions}
+    places_weights = list(itertools.accumulate(PLACES_WEIGHTS))
+    club_weights = zipfCumWeights(clubs_count)
+    competition_weights = zipfCumWeights(competitions_count)
+    # Shuffle which club/competition is popular so it is not always the first ones
+    club_order = list(range(clubs_count))
+    competition_order = list(range(competitions_count))
+    rng.shuffle(club_order)
+    rng.shuffle(competition_order)
+
+    booked = {}
+    bookings = []
+    attempts = 0
+    max_attempts = bookings_count * 20
+    while len(bookings) < bookings_count and attempts < max_attempts:
+        attempts += 1
+        club = clubs[club_order[bisect.bisect(club_weights, rng.random() * club_weights[-1])]]
+        competition = competitions[competition_order[
+            bisect.bisect(competition_weights, rng.random() * competition_weights[-1])]]
+        places = PLACES_CHOICES[bisect.bisect(places_weights, rng.random() * places_weights[-1])]
+
+        key = (club['name'], competition['name'])
+        if booked.get(key, 0) + places > 12:
+            continue
+
+        cancelled = rng.random() < CANCELLED_RATIO
+        if not cancelled:
+            booked[key] = booked.get(key, 0) + places
+
+        booking_date = competition_dates[competition['name']] - timedelta(seconds=rng.randint(86400, 91 * 86400))
+        bookings.append({
+            'id': len(bookings) + 1,
+            'club': club['name'],
+            'competition': competition['name'],
+            'places': places,
+            'points_used': places,
+            'date': booking_date.isoformat(),
+            'status': 'cancelled' if cancelled else 'confirmed'
+        })
+    return clubs, competitions, bookings
+
+
+def writeDataset(directory, clubs, competitions, bookings):
+    """Write the dataset as clubs.json, competitions.json and bookings.json"""
+    os.makedirs(directory, exist_ok=True)
+    files = [
+        ('clubs.json', {'clubs': clubs}),
+        ('competitions.json', {'competitions': competitions}),
+        ('bookings.json', {'bookings': bookings, 'next_id': len(bookings) + 1})
+    ]
+    for filename, data in files:
+        with open(os.path.join(directory, filename), 'w') as f:
+            json.dump(data, f, indent=4)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic GUDLFT data files')
+    parser.add_argument('--scale', choices=list(SCALES), default='1k')
+    parser.add_argument('--clubs', type=int, help='override the number of clubs')
+    parser.add_argument('--competitions', type=int, help='override the number of competitions')
+    parser.add_argument('--bookings', type=int, help='override the number of bookings')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--now', type=date.fromisoformat, default=date.today(),
+                        help='reference date YYYY-MM-DD, competitions are spread over the year around it '
+                             '(default: today)')
+    parser.add_argument('--output', help='output directory (default: data/<scale>)')
+    args = parser.parse_args(argv)
+
+    sizes = dict(SCALES[args.scale])
+    for key in ('clubs', 'competitions', 'bookings'):
+        if getattr(args, key) is not None:
+            sizes[key] = getattr(args, key)
+
+    clubs, competitions, bookings = generateDataset(
+        sizes['clubs'], sizes['competitions'], sizes['bookings'], seed=args.seed,
+        now=datetime.combine(args.now, datetime.min.time()))
+    output = args.output or os.path.join('data', args.scale)
+    writeDataset(output, clubs, competitions, bookings)
+    print(f'{len(clubs)} clubs, {len(competitions)} competitions, {len(bookings)} bookings written to {output}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Scénarios Locust réalistes : parcours complet des secrétaires et ruée sur une compétition
+
+Le serveur doit tourner sur le même jeu de données que celui lu ici
+(LOAD_DATA_DIR, par défaut data/1k, généré par generate_data.py) : les
+clubs connectés et les compétitions à venir sont tirés de ce jeu, et à la
+fin du test les fichiers sont relus pour vérifier qu'aucune place n'a été
+survendue.
+
+Variables d'environnement :
+    LOAD_DATA_DIR           dossier des fichiers JSON (défaut : data/1k)
+    STAMPEDE_COMPETITION    compétition visée par la ruée (défaut : celle à venir qui a le plus de places)
+    SLO_P50_MS / SLO_P95_MS / SLO_P99_MS   seuils globaux en ms (défaut : 200 / 1000 / 2000)
+    SLO_ROUTES              seuils par route, ex. "/purchasePlaces=p95:2000,p99:3000;/=p95:500"
+
+Usage :
+    python generate_data.py --scale 1k
+    (cd data/1k && FLASK_APP=../../server.py flask run)
+    locust -f load_scenarios.py --host http://127.0.0.1:5000 --users 200 --spawn-rate 50 --run-time 2m --headless
+"""
+import json
+import os
+import random
+from collections import defaultdict
+from datetime import datetime
+
+from locust import HttpUser, task, between, constant, events
+
+
+DATA_DIR = os.environ.get('LOAD_DATA_DIR', os.path.join('data', '1k'))
+
+DEFAULT_SLO_MS = {
+    'p50': float(os.environ.get('SLO_P50_MS', 200)),
+    'p95': float(os.environ.get('SLO_P95_MS', 1000)),
+    'p99': float(os.environ.get('SLO_P99_MS', 2000))
+}
+
+
+def loadDataFile(filename, key=None):
+    with open(os.path.join(DATA_DIR, filename)) as f:
+        data = json.load(f)
+    return data[key] if key else data
+
+
+def parseRouteSlos(value):
+    """Parse SLO_ROUTES, e.g. "/purchasePlaces=p95:2000,p99:3000;/=p95:500" """
+    slos = {}
+    for route_spec in filter(None, value.split(';')):
+        route, _, thresholds = route_spec.partition('=')
+        slos[route.strip()] = {
+            name.strip(): float(ms) for name, _, ms in
+            (threshold.partition(':') for threshold in thresholds.split(','))
+        }
+    return slos
+
+
+def checkNoOverselling(initial_competitions, initial_next_id, competitions, clubs, bookings):
+    """Return a list of consistency errors found in the data after a run
+
+    Besides negative places/points and the 12 places cap, the places each
+    competition lost during the run must equal the places booked during the
+    run, which catches lost updates under concurrency.
+    """
+    errors = []
+    for competition in competitions:
+        if int(competition['numberOfPlaces']) < 0:
+            errors.append(f"{competition['name']}: negative places ({competition['numberOfPlaces']})")
+    for club in clubs:
+        if int(club['points']) < 0:
+            errors.append(f"{club['name']}: negative points ({club['points']})")
+
+    booked = defaultdict(int)
+    booked_during_run = defaultdict(int)
+    for booking in bookings:
+        if booking.get('status') == 'cancelled':
+            continue
+        booked[(booking['club'], booking['competition'])] += booking['places']
+        if booking['id'] >= initial_next_id:
+            booked_during_run[booking['competition']] += booking['places']
+    for (club_name, competition_name), places in booked.items():
+        if places > 12:
+            errors.append(f'{club_name} booked {places} places for {competition_name}')
+
+    initial_places = {c['name']: int(c['numberOfPlaces']) for c in initial_competitions}
+    for competition in competitions:
+        name = competition['name']
+        sold = initial_places.get(name, 0) - int(competition['numberOfPlaces'])
+        if name in initial_places and sold != booked_during_run[name]:
+            errors.append(f'{name}: {sold} places sold but {booked_during_run[name]} places booked')
+    return errors
+
+
+def upcomingCompetitions(competitions, now=None):
+    """Competitions that can still be booked: the server refuses past ones"""
+    now = now or datetime.now()
+    return [c for c in competitions if datetime.strptime(c['date'], '%Y-%m-%d %H:%M:%S') > now]
+
+
+CLUBS = loadDataFile('clubs.json', 'clubs')
+COMPETITIONS = upcomingCompetitions(loadDataFile('competitions.json', 'competitions'))
+if not COMPETITIONS:
+    raise RuntimeError(f'No upcoming competition in {DATA_DIR}: regenerate it with generate_data.py')
+STAMPEDE_COMPETITION = os.environ.get('STAMPEDE_COMPETITION') or max(
+    COMPETITIONS, key=lambda c: int(c['numberOfPlaces']))['name']
+
+
+class SecretaryUser(HttpUser):
+    """A club secretary going through the whole journey with their own club"""
+
+    wait_time = between(1, 5)
+    weight = 3
+
+    def on_start(self):
+        self.club = random.choice(CLUBS)
+        self.client.get('/')
+        self.client.post('/showSummary', data={'email': self.club['email']})
+
+    @task(5)
+    def bookCompetition(self):
+        competition = random.choice(COMPETITIONS)
+        self.client.get(f"/book/{competition['name']}", name='/book/[competition]')
+        self.client.post('/purchasePlaces', data={
+            'competition': competition['name'],
+            'places': random.choice([1, 1, 2, 3])
+        })
+
+    @task(2)
+    def publicPoints(self):
+        self.client.get('/public/points')
+
+    @task(1)
+    def logoutAndLogin(self):
+        self.client.get('/logout')
+        self.on_start()
+
+
+class StampedeUser(HttpUser):
+    """Secretaries hammering the same competition as soon as booking opens"""
+
+    wait_time = constant(0.1)
+    weight = 1
+
+    def on_start(self):
+        self.club = random.choice(CLUBS)
+        self.client.post('/showSummary', data={'email': self.club['email']})
+
+    @task
+    def rushBooking(self):
+        self.client.get(f'/book/{STAMPEDE_COMPETITION}', name='/book/[stampede]')
+        self.client.post('/purchasePlaces', name='/purchasePlaces [stampede]', data={
+            'competition': STAMPEDE_COMPETITION,
+            'places': random.randint(1, 4)
+        })
+
+
+@events.test_start.add_listener
+def snapshotInitialData(environment, **kwargs):
+    environment.initial_competitions = loadDataFile('competitions.json', 'competitions')
+    bookings_data = loadDataFile('bookings.json')
+    environment.initial_next_id = bookings_data.get('next_id', len(bookings_data['bookings']) + 1)
+
+
+@events.test_stop.add_listener
+def reportResults(environment, **kwargs):
+    failed = False
+
+    errors = checkNoOverselling(
+        environment.initial_competitions,
+        environment.initial_next_id,
+        loadDataFile('competitions.json', 'competitions'),
+        loadDataFile('clubs.json', 'clubs'),
+        loadDataFile('bookings.json', 'bookings'))
+    if errors:
+        failed = True
+        print('Overselling detected:')
+        for error in errors:
+            print(f'  {error}')
+    else:
+        print('No overselling detected.')
+
+    route_slos = parseRouteSlos(os.environ.get('SLO_ROUTES', ''))
+    print(f"{'Route':<40} {'p50':>8} {'p95':>8} {'p99':>8}  SLO")
+    for entry in sorted(environment.stats.entries.values(), key=lambda e: e.name):
+        percentiles = {name: entry.get_response_time_percentile(q)
+                       for name, q in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))}
+        slo = dict(DEFAULT_SLO_MS, **route_slos.get(entry.name, {}))
+        breaches = [name for name, value in percentiles.items() if value > slo[name]]
+        failed = failed or bool(breaches)
+        status = 'FAIL ' + ','.join(breaches) if breaches else 'ok'
+        print(f"{entry.method + ' ' + entry.name:<40} "
+              f"{percentiles['p50']:>8.0f} {percentiles['p95']:>8.0f} {percentiles['p99']:>8.0f}  {status}")
+
+    if failed:
+        environment.process_exit_code = 1
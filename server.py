@@ -1,52 +1,388 @@
+import contextlib
+import cProfile
+import contextvars
+import csv
+import gzip
+import hashlib
+import hmac
+import io
 import json
-from flask import Flask,render_template,request,redirect,flash,url_for
-from datetime import datetime
+import logging
+import os
+import pstats
+import queue
+import random
+import re
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from concurrent.futures import Future
+from flask import Flask,render_template,request,redirect,flash,url_for,jsonify,Response,session,g,has_request_context,has_app_context
+from datetime import datetime, timedelta
+from jinja2 import FileSystemBytecodeCache, Template
+
+
+class JsonFileStorage:
+    """Storage backend keeping each data file as a JSON file in a directory"""
+
+    def __init__(self, directory=''):
+        self.directory = directory
+
+    def path(self, filename):
+        return os.path.join(self.directory, filename)
+
+    def read(self, filename):
+        """Return the parsed content of a data file, FileNotFoundError if missing"""
+        with open(self.path(filename)) as f:
+            return json.load(f)
+
+    def write(self, filename, content):
+        """Replace a data file with the given JSON text"""
+        with open(self.path(filename), 'w') as f:
+            f.write(content)
+
+    def writeMany(self, contents):
+        """Replace several data files as a single commit
+
+        Each file is first written to a temporary file; the real files are
+        only replaced once all of them were written, so a failure part way
+        through leaves the previous data untouched.
+        """
+        for filename, content in contents.items():
+            with open(self.path(filename) + '.tmp', 'w') as f:
+                f.write(content)
+        for filename in contents:
+            os.replace(self.path(filename) + '.tmp', self.path(filename))
+
+
+class MemoryStorage:
+    """Storage backend keeping data files in memory, e.g. for isolated tests"""
+
+    def __init__(self, files=None):
+        # filename -> JSON text, so readers never share objects with the server
+        self.files = dict(files or {})
+
+    def read(self, filename):
+        """Return the parsed content of a data file, FileNotFoundError if missing"""
+        if filename not in self.files:
+            raise FileNotFoundError(filename)
+        return json.loads(self.files[filename])
+
+    def write(self, filename, content):
+        """Replace a data file with the given JSON text"""
+        self.files[filename] = content
+
+    def writeMany(self, contents):
+        """Replace several data files as a single commit"""
+        self.files.update(contents)
 
 
 def loadClubs():
-    with open('clubs.json') as c:
-         listOfClubs = json.load(c)['clubs']
-         return listOfClubs
+    listOfClubs = currentDataset().storage.read('clubs.json')['clubs']
+    return listOfClubs
 
 
 def loadCompetitions():
-    with open('competitions.json') as comps:
-         listOfCompetitions = json.load(comps)['competitions']
-         return listOfCompetitions
+    listOfCompetitions = currentDataset().storage.read('competitions.json')['competitions']
+    return listOfCompetitions
 
 
 def loadBookings():
     """Load bookings data from JSON file"""
     try:
-        with open('bookings.json') as b:
-            listOfBookings = json.load(b)['bookings']
-            return listOfBookings
+        listOfBookings = currentDataset().storage.read('bookings.json')['bookings']
+        return listOfBookings
     except FileNotFoundError:
         return []
 
 
+def loadNextBookingId():
+    """Load the next booking id persisted with the bookings"""
+    try:
+        return currentDataset().storage.read('bookings.json').get('next_id', 1)
+    except FileNotFoundError:
+        return 1
+
+
+def loadWaitlist():
+    """Load waitlist data from JSON file"""
+    try:
+        return currentDataset().storage.read('waitlist.json')['waitlist']
+    except FileNotFoundError:
+        return {}
+
+
+def loadLotteryWindows():
+    """Load the open lottery windows from JSON file"""
+    try:
+        windows = currentDataset().storage.read('lottery.json')['lottery']
+    except FileNotFoundError:
+        return {}
+    for window in windows.values():
+        window['closes_at'] = datetime.fromisoformat(window['closes_at'])
+    return windows
+
+
+def loadData():
+    """(Re)load every data file of the current dataset from its storage backend"""
+    data = currentDataset()
+    data.competitions = loadCompetitions()
+    data.clubs = loadClubs()
+    data.bookings = loadBookings()
+    data.waitlist = loadWaitlist()
+    data.lotteryWindows = loadLotteryWindows()
+    if data.lotteryWindows:
+        lotteryTimer.start()
+    rebuildBookingIndex()
+    data.bookingIndex['next_id'] = max(data.bookingIndex['next_id'], loadNextBookingId())
+    # First version, so the first change after a load is published as a delta
+    publishSnapshot()
+
+
+def newBookingIndex():
+    return {'source': None, 'size': 0, 'by_id': {}, 'next_id': 1}
+
+
+# What a dataset is made of; the default dataset keeps them in module globals
+DATASET_FIELDS = ('storage', 'clubs', 'competitions', 'bookings', 'waitlist',
+                  'bookingIndex', 'lotteryWindows', 'snapshot')
+
+
+class Dataset:
+    """Data of one federation, with its own indexes, lottery windows and locks
+
+    writeLock serialises the changes of the dataset (purchases,
+    cancellations, waitlist), snapshotLock the publication of its read-only
+    versions; requests for other datasets never wait for them. tenant is the
+    name of the federation served from it, None for the default dataset.
+    """
+
+    def __init__(self, storage, tenant=None):
+        self.storage = storage
+        self.tenant = tenant
+        self.clubs = []
+        self.competitions = []
+        self.bookings = []
+        self.waitlist = {}
+        self.bookingIndex = newBookingIndex()
+        self.lotteryWindows = {}
+        self.snapshot = None
+        self.writeLock = threading.RLock()
+        self.snapshotLock = threading.Lock()
+
+
+class ModuleDataset:
+    """The default dataset, whose data are the module globals (server.clubs...)"""
+
+    tenant = None
+
+    def __getattr__(self, name):
+        if name not in DATASET_FIELDS + ('writeLock', 'snapshotLock'):
+            raise AttributeError(name)
+        return globals()[name]
+
+    def __setattr__(self, name, value):
+        if name not in DATASET_FIELDS:
+            raise AttributeError(name)
+        globals()[name] = value
+
+
+def currentDataset():
+    """Dataset the helpers work on: the federation's of the current request, else the default one"""
+    if has_app_context():
+        return g.get('dataset', defaultDataset)
+    return defaultDataset
+
+
+@contextlib.contextmanager
+def servingDataset(dataset):
+    """Make the helpers work on a dataset until the block exits
+
+    Used outside of the dataset's own requests: loading a federation, the
+    booking writer thread.
+    """
+    with app.app_context():
+        g.dataset = dataset
+        yield dataset
+
+
+def captureDataset():
+    """Return the data served by the default dataset, to serve it again with installDataset()"""
+    dataset = Dataset(storage)
+    for field in DATASET_FIELDS:
+        setattr(dataset, field, getattr(defaultDataset, field))
+    return dataset
+
+
+def installDataset(dataset):
+    """Serve the data of another dataset as the default dataset"""
+    for field in DATASET_FIELDS:
+        setattr(defaultDataset, field, getattr(dataset, field))
+
+
+def openDataset(data_storage, tenant=None):
+    """Load a new dataset from a storage backend and return it, without serving it"""
+    dataset = Dataset(data_storage, tenant)
+    with servingDataset(dataset):
+        loadData()
+    return dataset
+
+
+@contextlib.contextmanager
+def useStorage(new_storage):
+    """Serve the data of another storage backend until the block exits
+
+    Every dataset is reloaded from the new storage, with its own booking
+    index and lottery windows; the previous data is served again afterwards.
+    Used by the tests to run against in-memory data without touching the
+    JSON files.
+    """
+    previous = captureDataset()
+    installDataset(openDataset(new_storage))
+    try:
+        yield new_storage
+    finally:
+        installDataset(previous)
+
+
+def parseTenants(value):
+    """Parse GUDLFT_TENANTS, e.g. "ffhm=data/ffhm;fsa=data/fsa" """
+    tenant_dirs = {}
+    for tenant_spec in filter(None, value.split(';')):
+        name, _, data_dir = tenant_spec.partition('=')
+        tenant_dirs[name.strip()] = data_dir.strip()
+    return tenant_dirs
+
+
+def registerTenant(name, tenant_storage):
+    """Serve another dataset for requests selecting this tenant
+
+    Args:
+        name (str): Host label or path prefix selecting the tenant
+        tenant_storage: Storage backend of the tenant, or its data directory
+    """
+    if isinstance(tenant_storage, str):
+        tenant_storage = JsonFileStorage(tenant_storage)
+    tenants[name] = {'storage': tenant_storage, 'dataset': None}
+
+
+def getTenantDataset(name):
+    """Return the dataset of a tenant, loading it on first use"""
+    tenant = tenants[name]
+    if tenant['dataset'] is None:
+        with tenantLock:
+            if tenant['dataset'] is None:
+                tenant['dataset'] = openDataset(tenant['storage'], name)
+    return tenant['dataset']
+
+
+def tenantFromHost(host):
+    """Return the tenant named by the first label of a host, if registered"""
+    name = host.split(':')[0].split('.')[0]
+    return name if name in tenants else None
+
+
+class TenantPathMiddleware:
+    """WSGI middleware selecting the tenant from the first path segment
+
+    /ffhm/showSummary is served as /showSummary for the "ffhm" tenant; the
+    prefix moves to SCRIPT_NAME so url_for() keeps generating /ffhm/ links.
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if tenants and app.config['TENANT_SELECTOR'] == 'path':
+            name, _, rest = environ.get('PATH_INFO', '')[1:].partition('/')
+            if name in tenants:
+                environ['gudlft.tenant'] = name
+                environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + '/' + name
+                environ['PATH_INFO'] = '/' + rest
+        return self.wsgi_app(environ, start_response)
+
+
+def writeJsonFile(filename, data, metric_name=None):
+    """Write data as JSON and record the save duration and bytes written
+
+    Args:
+        filename (str): File to write
+        data (dict): Data to serialise
+        metric_name (str, optional): Label for the metrics, defaults to filename
+    """
+    if deferPersistence([filename]):
+        return
+    metric_name = metric_name or filename
+    start = time.perf_counter()
+    with span('persist.' + metric_name):
+        content = json.dumps(data, indent=4)
+        currentDataset().storage.write(filename, content)
+    observeHistogram(metrics['save_seconds'], (metric_name,), time.perf_counter() - start)
+    incrementCounter(metrics['save_bytes'], (metric_name,), len(content.encode('utf-8')))
+
+
 def saveClubs():
     """Save clubs data to JSON file"""
-    with open('clubs.json', 'w') as c:
-        json.dump({'clubs': clubs}, c, indent=4)
+    writeJsonFile('clubs.json', {'clubs': currentDataset().clubs})
 
 
 def saveCompetitions():
     """Save competitions data to JSON file"""
-    with open('competitions.json', 'w') as comps:
-        json.dump({'competitions': competitions}, comps, indent=4)
+    writeJsonFile('competitions.json', {'competitions': currentDataset().competitions})
 
 
 def saveBookings():
     """Save bookings data to JSON file"""
-    with open('bookings.json', 'w') as b:
-        json.dump({'bookings': bookings}, b, indent=4)
+    writeJsonFile('bookings.json', {'bookings': currentDataset().bookings, 'next_id': getBookingIndex()['next_id']})
 
 
-def addBooking(club_name, competition_name, places_booked, points_used):
-    """Add a new booking record"""
-    booking = {
-        'id': len(bookings) + 1,
+def rebuildBookingIndex():
+    """Rebuild the id -> booking index from the bookings list
+
+    The next id never goes backwards while the same list is indexed, even
+    if bookings were removed from it.
+    """
+    data = currentDataset()
+    bookings, index = data.bookings, data.bookingIndex
+    next_id = max((b['id'] for b in bookings), default=0) + 1
+    if index['source'] is bookings:
+        next_id = max(next_id, index['next_id'])
+    index['source'] = bookings
+    index['size'] = len(bookings)
+    index['by_id'] = {b['id']: b for b in bookings}
+    index['next_id'] = next_id
+
+
+def getBookingIndex():
+    """Return the booking index, rebuilt only if the bookings list changed behind its back"""
+    data = currentDataset()
+    if data.bookingIndex['source'] is not data.bookings or data.bookingIndex['size'] != len(data.bookings):
+        rebuildBookingIndex()
+    return data.bookingIndex
+
+
+def allocateBookingId():
+    """Return a new booking id, unique and increasing across restarts"""
+    index = getBookingIndex()
+    booking_id = index['next_id']
+    index['next_id'] += 1
+    return booking_id
+
+
+def appendBooking(booking):
+    """Append a booking record to the history and index it"""
+    index = getBookingIndex()
+    currentDataset().bookings.append(booking)
+    index['by_id'][booking['id']] = booking
+    index['size'] += 1
+
+
+def createBookingRecord(club_name, competition_name, places_booked, points_used):
+    """Build a new booking record (not yet added to the history)"""
+    return {
+        'id': allocateBookingId(),
         'club': club_name,
         'competition': competition_name,
         'places': places_booked,
@@ -54,47 +390,154 @@ def addBooking(club_name, competition_name, places_booked, points_used):
         'date': datetime.now().isoformat(),
         'status': 'confirmed'
     }
-    bookings.append(booking)
+
+
+def saveWaitlist():
+    """Save waitlist data to JSON file"""
+    writeJsonFile('waitlist.json', {'waitlist': currentDataset().waitlist})
+
+
+def lotteryContent(windows):
+    """JSON content of lottery.json for a dataset's lottery windows"""
+    return {'lottery': {
+        name: dict(window, closes_at=window['closes_at'].isoformat())
+        for name, window in windows.items()
+    }}
+
+
+def saveLotteryWindows():
+    """Save the open lottery windows to JSON file"""
+    writeJsonFile('lottery.json', lotteryContent(currentDataset().lotteryWindows))
+
+
+SAVE_ALL_FILES = ('clubs.json', 'competitions.json', 'bookings.json')
+
+
+def datasetContents(dataset, filenames):
+    """Serialise data files of a dataset
+
+    Args:
+        dataset (Dataset): Dataset, e.g. currentDataset()
+        filenames (iterable): Data files to serialise
+
+    Returns:
+        dict: {filename: JSON text}
+    """
+    files = {
+        'clubs.json': lambda: {'clubs': dataset.clubs},
+        'competitions.json': lambda: {'competitions': dataset.competitions},
+        'bookings.json': lambda: {'bookings': dataset.bookings, 'next_id': dataset.bookingIndex['next_id']},
+        'waitlist.json': lambda: {'waitlist': dataset.waitlist},
+        'lottery.json': lambda: lotteryContent(dataset.lotteryWindows)
+    }
+    return {filename: json.dumps(files[filename](), indent=4) for filename in filenames}
+
+
+def commitContents(target_storage, contents, metric_name='all'):
+    """Write serialised data files as a single storage commit and record metrics"""
+    start = time.perf_counter()
+    with span('persist.' + metric_name):
+        target_storage.writeMany(contents)
+    observeHistogram(metrics['save_seconds'], (metric_name,), time.perf_counter() - start)
+    for filename, content in contents.items():
+        incrementCounter(metrics['save_bytes'], (filename,), len(content.encode('utf-8')))
+
+
+def deferPersistence(filenames):
+    """Queue file writes of the current request instead of writing them now
+
+    Only used in async serving mode (asgi.py), which puts a pending writes
+    record in the WSGI environ and commits the files from a thread pool once
+    the view has returned.
+
+    Returns:
+        bool: True if the writes were queued, False if they must be done now
+    """
+    if not has_request_context() or 'gudlft.pending_writes' not in request.environ:
+        return False
+    pending = request.environ['gudlft.pending_writes']
+    pending['dataset'] = currentDataset()
+    pending['files'].update(filenames)
+    return True
+
+
+def saveAll(filenames=SAVE_ALL_FILES):
+    """Save data files as a single storage commit, clubs, competitions and bookings by default"""
+    getBookingIndex()
+    if deferPersistence(filenames):
+        return
+    data = currentDataset()
+    commitContents(data.storage, datasetContents(data, filenames))
+
+
+def addBooking(club_name, competition_name, places_booked, points_used):
+    """Add a new booking record"""
+    booking = createBookingRecord(club_name, competition_name, places_booked, points_used)
+    appendBooking(booking)
     saveBookings()
 
 
 def getClubBookings(club_name):
     """Get all bookings for a specific club"""
-    return [b for b in bookings if b['club'] == club_name]
+    return [b for b in currentDataset().bookings if b['club'] == club_name]
 
 
 def getCompetitionBookings(competition_name):
     """Get all bookings for a specific competition"""
-    return [b for b in bookings if b['competition'] == competition_name]
+    return [b for b in currentDataset().bookings if b['competition'] == competition_name]
 
 
 def getClubBookingsForCompetition(club_name, competition_name):
     """Get bookings for a specific club and competition"""
-    return [b for b in bookings if b['club'] == club_name and b['competition'] == competition_name]
+    return [b for b in currentDataset().bookings
+            if b['club'] == club_name and b['competition'] == competition_name]
+
+
+def isBookingActive(booking):
+    """Return True unless the booking was cancelled"""
+    return booking.get('status') != 'cancelled'
+
+
+def findBookingById(booking_id):
+    """Find a booking by id - returns the booking or None"""
+    return getBookingIndex()['by_id'].get(booking_id)
 
 
 def findClubByName(club_name):
     """Find a club by name - returns first match or None"""
-    matches = [c for c in clubs if c['name'] == club_name]
+    matches = [c for c in currentDataset().clubs if c['name'] == club_name]
     return matches[0] if matches else None
 
 
 def findCompetitionByName(competition_name):
     """Find a competition by name - returns first match or None"""
-    matches = [c for c in competitions if c['name'] == competition_name]
+    matches = [c for c in currentDataset().competitions if c['name'] == competition_name]
     return matches[0] if matches else None
 
 
 def findClubByEmail(email):
     """Find a club by email - returns first match or None"""
-    matches = [club for club in clubs if club['email'] == email]
+    matches = [club for club in currentDataset().clubs if club['email'] == email]
     return matches[0] if matches else None
 
 
+# Booking page text for each combination of constraints limiting a booking
+LIMITING_FACTOR_TEXTS = {
+    ('places_limit', 'points', 'competition_places'):
+        '12 places max per club ({remaining} remaining), your {points} points, and {places} available places',
+    ('places_limit', 'points'): '12 places max per club ({remaining} remaining) and your {points} points',
+    ('places_limit', 'competition_places'): '12 places max per club ({remaining} remaining) and {places} available places',
+    ('points', 'competition_places'): 'your {points} points and {places} available places',
+    ('places_limit',): '12 places max per club ({remaining} remaining)',
+    ('points',): 'your {points} available points',
+    ('competition_places',): '{places} available places in competition'
+}
+
+
 def calculateBookingLimits(club, competition):
     """Calculate all booking limits for a club and competition"""
     existing_bookings = getClubBookingsForCompetition(club['name'], competition['name'])
-    places_already_booked = sum(booking['places'] for booking in existing_bookings)
+    places_already_booked = sum(booking['places'] for booking in existing_bookings if isBookingActive(booking))
     
     # Constraint 1: Maximum 12 places per club per competition
     remaining_from_12_limit = max(0, 12 - places_already_booked)
@@ -107,16 +550,92 @@ def calculateBookingLimits(club, competition):
     
     # The actual maximum is the minimum of all constraints
     max_remaining = min(remaining_from_12_limit, club_points, available_places)
+
+    # Constraints reaching that maximum, shown on the booking page
+    limited_by = tuple(factor for factor, value in (('places_limit', remaining_from_12_limit),
+                                                    ('points', club_points),
+                                                    ('competition_places', available_places))
+                       if value == max_remaining)
     
     return {
         'places_already_booked': places_already_booked,
         'max_remaining': max_remaining,
         'club_points': club_points,
         'available_places': available_places,
-        'remaining_from_12_limit': remaining_from_12_limit
+        'remaining_from_12_limit': remaining_from_12_limit,
+        'limited_by': limited_by,
+        'limited_by_text': LIMITING_FACTOR_TEXTS[limited_by].format(
+            remaining=remaining_from_12_limit, points=club_points, places=available_places),
+        'waitlist_max': min(remaining_from_12_limit, club_points)
+    }
+
+
+def calculateBulkBookingLimits(clubs_list=None, competitions_list=None):
+    """Calculate max_remaining for every club against every competition
+
+    Bookings are aggregated in a single pass into a clubs x competitions
+    matrix of places already booked, then each cell is the minimum of the
+    12 places cap, the club points (row vector) and the competition places
+    (column vector) - the same rules as calculateBookingLimits().
+
+    Args:
+        clubs_list (list, optional): Clubs to report on, defaults to all clubs
+        competitions_list (list, optional): Competitions to report on, defaults to all competitions
+
+    Returns:
+        dict: club names, competition names and the max_remaining matrix (rows = clubs)
+    """
+    data = currentDataset()
+    clubs_list = data.clubs if clubs_list is None else clubs_list
+    competitions_list = data.competitions if competitions_list is None else competitions_list
+
+    club_index = {club['name']: i for i, club in enumerate(clubs_list)}
+    competition_index = {comp['name']: j for j, comp in enumerate(competitions_list)}
+
+    # Booked places matrix built from one scan of the booking history
+    booked = [[0] * len(competitions_list) for _ in clubs_list]
+    for booking in data.bookings:
+        if not isBookingActive(booking):
+            continue
+        i = club_index.get(booking['club'])
+        j = competition_index.get(booking['competition'])
+        if i is not None and j is not None:
+            booked[i][j] += booking['places']
+
+    points = [int(club['points']) for club in clubs_list]
+    places = [int(comp['numberOfPlaces']) for comp in competitions_list]
+
+    max_remaining = [
+        [min(max(0, 12 - booked_places), club_points, available_places)
+         for booked_places, available_places in zip(row, places)]
+        for row, club_points in zip(booked, points)
+    ]
+
+    return {
+        'clubs': list(club_index),
+        'competitions': list(competition_index),
+        'max_remaining': max_remaining
     }
 
 
+def bookingLimitsReportRows(report):
+    """Flatten a calculateBulkBookingLimits() result into one row per club/competition pair"""
+    return [
+        {'club': club_name, 'competition': competition_name, 'max_remaining': value}
+        for club_name, row in zip(report['clubs'], report['max_remaining'])
+        for competition_name, value in zip(report['competitions'], row)
+    ]
+
+
+def exportBookingLimitsCsv(report):
+    """Export a calculateBulkBookingLimits() result as CSV text"""
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=['club', 'competition', 'max_remaining'])
+    writer.writeheader()
+    writer.writerows(bookingLimitsReportRows(report))
+    return output.getvalue()
+
+
 def validateBookingRequest(places_required, limits):
     """Validate a booking request against all constraints
     
@@ -158,6 +677,104 @@ def validateBookingRequest(places_required, limits):
     return True, None
 
 
+def freezeRecord(record):
+    return MappingProxyType(dict(record))
+
+
+def snapshotChanges(previous, changed_clubs, changed_competitions):
+    """Point and place changes of records since their previous published version
+
+    A record missing from the previous version (no version yet, new record)
+    is reported with its current value and no delta.
+
+    Returns:
+        list: (kind, name, old value, new value) tuples for EventHub.publish()
+    """
+    changes = []
+    for kind, side, records, field in (('points', 0, changed_clubs, 'points'),
+                                       ('places', 1, changed_competitions, 'numberOfPlaces')):
+        for record in records:
+            i = previous['positions'][side].get(record['name']) if previous else None
+            old_value = previous[('clubs', 'competitions')[side]][i][field] if i is not None else record[field]
+            changes.append((kind, record['name'], old_value, record[field]))
+    return changes
+
+
+def publishSnapshot(changed_clubs=(), changed_competitions=()):
+    """Publish a new read-only version of the clubs and competitions
+
+    Writers call this once their change is complete. Only the changed
+    records are copied, the others are shared with the previous version;
+    the whole data is copied again if the lists themselves were replaced
+    or a changed record is not part of them. Point and place changes of
+    the changed records are sent to the event stream subscribers.
+
+    Args:
+        changed_clubs (iterable): Clubs modified since the last version
+        changed_competitions (iterable): Competitions modified since the last version
+    """
+    data = currentDataset()
+    clubs, competitions = data.clubs, data.competitions
+    with data.snapshotLock:
+        current = data.snapshot
+        version = current['version'] + 1 if current else 1
+        if (current is None or current['source'][0] is not clubs or current['source'][1] is not competitions
+                or len(current['clubs']) != len(clubs) or len(current['competitions']) != len(competitions)
+                or any(club['name'] not in current['positions'][0] for club in changed_clubs)
+                or any(c['name'] not in current['positions'][1] for c in changed_competitions)):
+            frozen_clubs = tuple(freezeRecord(club) for club in clubs)
+            frozen_competitions = tuple(freezeRecord(competition) for competition in competitions)
+            positions = ({club['name']: i for i, club in enumerate(clubs)},
+                         {competition['name']: i for i, competition in enumerate(competitions)})
+        else:
+            positions = current['positions']
+            frozen_clubs = list(current['clubs'])
+            for club in changed_clubs:
+                frozen_clubs[positions[0][club['name']]] = freezeRecord(club)
+            frozen_competitions = list(current['competitions'])
+            for competition in changed_competitions:
+                frozen_competitions[positions[1][competition['name']]] = freezeRecord(competition)
+        published = data.snapshot = {
+            'version': version,
+            'source': (clubs, competitions),
+            'clubs': tuple(frozen_clubs),
+            'competitions': tuple(frozen_competitions),
+            'positions': positions,
+            # Values computed from this version by readers, see snapshotDerived()
+            'derived': {}
+        }
+    if eventHub.subscribers and (changed_clubs or changed_competitions):
+        eventHub.publish(clubs, snapshotChanges(current, changed_clubs, changed_competitions))
+    if app.config['PRERENDER_DIR']:
+        prerenderWorker.schedule(data)
+    return published
+
+
+def getSnapshot():
+    """Return the current read-only version of the data
+
+    Readers take it once and use it for the whole request: it never changes,
+    so they see every booking either fully applied or not at all.
+    """
+    data = currentDataset()
+    current = data.snapshot
+    if current is None or current['source'][0] is not data.clubs or current['source'][1] is not data.competitions:
+        current = publishSnapshot()
+    return current
+
+
+def snapshotDerived(current, name, compute):
+    """Compute a value from a snapshot once per version"""
+    if name not in current['derived']:
+        current['derived'][name] = compute()
+    return current['derived'][name]
+
+
+def snapshotClubByEmail(current, email):
+    by_email = snapshotDerived(current, 'clubs_by_email', lambda: {club['email']: club for club in current['clubs']})
+    return by_email.get(email)
+
+
 def processBooking(club, competition, places_required):
     """Process a valid booking - update data and save
     
@@ -177,9 +794,26 @@ def processBooking(club, competition, places_required):
     # Record the booking in history
     addBooking(club['name'], competition['name'], places_required, points_needed)
     
+    publishSnapshot([club], [competition])
+
     # Save changes to files for persistence
     saveCompetitions()
     saveClubs()
+    forgetRequestMemo('limits')
+
+
+def applyBooking(club, competition, places_required):
+    """Update data and record a booking in memory, without saving
+
+    Used by batched paths (lottery draw, waitlist promotion) that save once
+    after applying several bookings.
+    """
+    points_needed = places_required  # 1 point per place
+    competition['numberOfPlaces'] = str(int(competition['numberOfPlaces']) - places_required)
+    club['points'] = str(int(club['points']) - points_needed)
+    appendBooking(createBookingRecord(club['name'], competition['name'], places_required, points_needed))
+    publishSnapshot([club], [competition])
+    forgetRequestMemo('limits')
 
 
 def renderBookingPageWithLimits(club, competition, limits, error_message=None):
@@ -203,7 +837,9 @@ def renderBookingPageWithLimits(club, competition, limits, error_message=None):
                          max_remaining=limits['max_remaining'],
                          places_already_booked=limits['places_already_booked'],
                          club_points=limits['club_points'],
-                         available_places=limits['available_places'])
+                         available_places=limits['available_places'],
+                         limited_by_text=limits['limited_by_text'],
+                         waitlist_max=limits['waitlist_max'])
 
 def is_competition_date_passed(competition):
     """Retourne True si la date de la compétition est dépassée, False sinon."""
@@ -213,102 +849,1627 @@ def is_competition_date_passed(competition):
         return True
     return competition_date < datetime.now()
 
-app = Flask(__name__)
-app.secret_key = 'something_special'
 
-competitions = loadCompetitions()
-clubs = loadClubs()
-bookings = loadBookings()
+def requestMemo(kind, key, compute):
+    """Compute a derived value at most once per request
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+    Values are kept on flask.g under (kind, key) and hits/misses are counted
+    per kind in memoStats. Outside of a request the value is just computed.
+    """
+    if not has_request_context():
+        return compute()
+    memo = g.setdefault('memo', {})
+    stats = memoStats.setdefault(kind, {'hits': 0, 'misses': 0})
+    if (kind, key) in memo:
+        stats['hits'] += 1
+        return memo[(kind, key)]
+    stats['misses'] += 1
+    with span(kind):
+        memo[(kind, key)] = compute()
+    return memo[(kind, key)]
 
-@app.route('/showSummary',methods=['POST'])
-def showSummary():
-    email = request.form['email']
-    club = findClubByEmail(email)
-    if not club:
-        # Email non trouvé, afficher un message d'erreur sur la page d'accueil
-        return render_template('index.html', message="This email doesn't exist. Please try again.")
-    return render_template('welcome.html',club=club,competitions=competitions)
 
+def forgetRequestMemo(kind):
+    """Drop the memoised values of a kind, after the data they derive from changed"""
+    if has_request_context() and 'memo' in g:
+        g.memo = {k: v for k, v in g.memo.items() if k[0] != kind}
 
-@app.route('/book/<competition>/<club>')
-def book(competition,club):
-    foundClub = findClubByName(club)
-    foundCompetition = findCompetitionByName(competition)
-    
-    
-    if foundClub and foundCompetition:
-        # Vérification de la date de la compétition
-        if is_competition_date_passed(foundCompetition):
-            flash("Booking not allowed: competition date has passed.")
-            return render_template('welcome.html', club=foundClub, competitions=competitions)
-        limits = calculateBookingLimits(foundClub, foundCompetition)
-        return renderBookingPageWithLimits(foundClub, foundCompetition, limits)
-    else:
-        flash("Something went wrong-please try again")
-        return render_template('welcome.html', club=club, competitions=competitions)
 
+def findClubByNameCached(club_name):
+    """findClubByName() memoised for the current request"""
+    return requestMemo('club', club_name, lambda: findClubByName(club_name))
 
-@app.route('/purchasePlaces',methods=['POST'])
-def purchasePlaces():
-    competition = findCompetitionByName(request.form['competition'])
-    club = findClubByName(request.form['club'])
-    placesRequired = int(request.form['places'])
 
-    if not club or not competition:
-        flash("Something went wrong-please try again")
-        return render_template('welcome.html', club=club, competitions=competitions)
+def findCompetitionByNameCached(competition_name):
+    """findCompetitionByName() memoised for the current request"""
+    return requestMemo('competition', competition_name, lambda: findCompetitionByName(competition_name))
 
 
-    # Calculate limits for validation and error display
-    limits = calculateBookingLimits(club, competition)
+def calculateBookingLimitsCached(club, competition):
+    """calculateBookingLimits() memoised for the current request
 
-    # Validate the booking request
-    is_valid, error_message = validateBookingRequest(placesRequired, limits)
+    Forgotten by applyBooking(), processBooking() and cancelBooking() since
+    they change the values it derives from.
+    """
+    return requestMemo('limits', (club['name'], competition['name']),
+                       lambda: calculateBookingLimits(club, competition))
+
+
+def isCompetitionDatePassedCached(competition):
+    """is_competition_date_passed() memoised for the current request"""
+    return requestMemo('date_passed', competition['name'], lambda: is_competition_date_passed(competition))
+
+def openLotteryWindow(competition_name, duration_minutes, seed=None):
+    """Open a request window for a competition
+
+    While the window is open, purchasePlaces queues requests instead of
+    booking them; they are allocated together by drawLottery().
+
+    Args:
+        competition_name (str): Competition name
+        duration_minutes (int): How long requests are collected
+        seed (int, optional): Lottery seed, random if not given
+
+    Returns:
+        dict: The window state
+    """
+    window = {
+        'closes_at': datetime.now() + timedelta(minutes=duration_minutes),
+        'seed': seed if seed is not None else random.randrange(2 ** 32),
+        'requests': {}
+    }
+    currentDataset().lotteryWindows[competition_name] = window
+    saveLotteryWindows()
+    lotteryTimer.start()
+    return window
+
+
+def isLotteryWindowOpen(competition_name):
+    """Return True if booking requests for this competition are being queued"""
+    window = currentDataset().lotteryWindows.get(competition_name)
+    return window is not None and datetime.now() < window['closes_at']
+
+
+def queueLotteryRequest(club, competition, places_required):
+    """Queue a booking request for the lottery draw (one request per club)
+
+    The request is pre-checked with validateBookingRequest() so obviously
+    invalid requests are refused straight away; it is validated again at
+    draw time.
+
+    Returns:
+        tuple: (is_queued, error_message)
+    """
+    if isCompetitionDatePassedCached(competition):
+        return False, 'Booking not allowed: competition date has passed.'
 
+    limits = calculateBookingLimitsCached(club, competition)
+    is_valid, error_message = validateBookingRequest(places_required, limits)
     if not is_valid:
-        return renderBookingPageWithLimits(club, competition, limits, error_message)
+        return False, error_message
 
-    # Vérification de la date de la compétition après les autres validations
-    if is_competition_date_passed(competition):
-        flash("Booking not allowed: competition date has passed.")
-        return render_template('welcome.html', club=club, competitions=competitions)
+    currentDataset().lotteryWindows[competition['name']]['requests'][club['name']] = places_required
+    saveLotteryWindows()
+    return True, None
 
-    # If all checks pass, proceed with booking
-    processBooking(club, competition, placesRequired)
 
-    flash('Great-booking complete!')
-    return render_template('welcome.html', club=club, competitions=competitions)
+def drawLottery(competition_name):
+    """Allocate all queued requests of a competition in a single batched pass
 
+    Requests are shuffled with the window seed, then each one is validated
+    against the current limits and applied in that order. Data is saved once
+    at the end, with the closed window, instead of once per booking.
 
-@app.route('/public/points')
-def public_points():
+    Returns:
+        list: One result dict per request (club, places, allocated, error)
     """
-    Public dashboard showing all clubs' points totals
-    Accessible without login for transparency
-    Performance optimized: < 2 seconds target
+    window = currentDataset().lotteryWindows.pop(competition_name, None)
+    competition = findCompetitionByName(competition_name)
+    if window is None or competition is None:
+        return []
+
+    # Sorted first so the draw only depends on the seed, not on arrival order
+    queued = sorted(window['requests'].items())
+    random.Random(window['seed']).shuffle(queued)
+
+    results = []
+    for club_name, places_required in queued:
+        club = findClubByName(club_name)
+        if club is None:
+            results.append({'club': club_name, 'places': places_required,
+                            'allocated': False, 'error': 'Unknown club.'})
+            continue
+
+        limits = calculateBookingLimits(club, competition)
+        is_valid, error_message = validateBookingRequest(places_required, limits)
+        if is_valid:
+            applyBooking(club, competition, places_required)
+        results.append({'club': club_name, 'places': places_required,
+                        'allocated': is_valid, 'error': error_message})
+
+    if any(result['allocated'] for result in results):
+        saveAll(SAVE_ALL_FILES + ('lottery.json',))
+    else:
+        saveLotteryWindows()
+    return results
+
+
+def drawDueLotteries():
+    """Draw every lottery whose request window has closed"""
+    now = datetime.now()
+    due = [name for name, window in currentDataset().lotteryWindows.items() if window['closes_at'] <= now]
+    return {name: drawLottery(name) for name in due}
+
+
+class LotteryTimer:
+    """Background thread drawing lotteries once their request window has closed
+
+    Every `interval` seconds, draws the due windows of the default dataset
+    and of the loaded federations, so a lottery is drawn even if no purchase
+    for its competition arrives. The thread stops when no window is left
+    and is started again by openLotteryWindow() or loadData().
     """
-    # Get all clubs data (optimized for performance)
-    clubs_data = []
-    for club in clubs:
-        clubs_data.append({
-            'name': club['name'],
-            'points': int(club['points'])
-        })
-    
-    # Sort by points descending for better UX
-    clubs_data.sort(key=lambda x: x['points'], reverse=True)
+
+    def __init__(self, interval=30):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='gudlft-lottery', daemon=True)
+                self.thread.start()
+
+    def datasets(self):
+        """Datasets with lottery windows, open or due"""
+        loaded = [defaultDataset] + [tenant['dataset'] for tenant in tenants.values() if tenant['dataset'] is not None]
+        return [dataset for dataset in loaded if dataset.lotteryWindows]
+
+    def drawDue(self):
+        """Draw the due windows of every dataset, like a purchase would
+
+        Returns:
+            bool: True if windows are still open
+        """
+        for dataset in self.datasets():
+            with servingDataset(dataset):
+                runMutation(drawDueLotteries)
+        return bool(self.datasets())
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.drawDue()
+            except Exception:
+                app.logger.exception('Lottery draw failed')
+            with self.lock:
+                if not self.datasets():
+                    self.thread = None
+                    return
+
+
+def getWaitlistEntry(club_name, competition_name):
+    """Return the waitlist entry of a club for a competition, or None"""
+    for entry in currentDataset().waitlist.get(competition_name, []):
+        if entry['club'] == club_name:
+            return entry
+    return None
+
+
+def joinWaitlist(club, competition, places_required):
+    """Add a club to the FIFO waitlist of a competition
+
+    Only full, upcoming competitions have a waitlist. A club has at most one
+    entry per competition, and the request must fit its 12 places cap and
+    its points; only the competition capacity is ignored since that is what
+    the club is waiting for.
+
+    Returns:
+        tuple: (is_added, error_message)
+    """
+    if isCompetitionDatePassedCached(competition):
+        return False, 'Booking not allowed: competition date has passed.'
+    if int(competition['numberOfPlaces']) > 0:
+        return False, 'This competition still has places available: book them directly.'
+    if getWaitlistEntry(club['name'], competition['name']):
+        return False, 'Your club is already on the waitlist for this competition.'
+
+    limits = calculateBookingLimitsCached(club, competition)
+    # Capacity is not checked here: the club is waiting for places to free up
+    is_valid, error_message = validateBookingRequest(places_required, dict(limits, available_places=places_required))
+    if not is_valid:
+        return False, error_message
+
+    currentDataset().waitlist.setdefault(competition['name'], []).append({
+        'club': club['name'],
+        'places': places_required,
+        'date': datetime.now().isoformat()
+    })
+    saveWaitlist()
+    return True, None
+
+
+def promoteWaitlist(competition, save=True):
+    """Book waitlisted requests in FIFO order while places are available
+
+    The head of the queue blocks the entries behind it until enough places
+    are free; entries that became invalid for another reason (points, 12
+    places cap) are dropped.
+
+    Args:
+        competition (dict): Competition data
+        save (bool): Save data files, False when the caller saves itself
+
+    Returns:
+        list: Entries that were booked
+    """
+    waitlist = currentDataset().waitlist
+    queue = waitlist.get(competition['name'])
+    if not queue:
+        return []
+
+    promoted = []
+    while queue:
+        entry = queue[0]
+        club = findClubByName(entry['club'])
+        if club is not None:
+            limits = calculateBookingLimits(club, competition)
+            if entry['places'] > limits['available_places']:
+                break
+            is_valid, _ = validateBookingRequest(entry['places'], limits)
+            if is_valid:
+                applyBooking(club, competition, entry['places'])
+                promoted.append(entry)
+        queue.pop(0)
+
+    if not queue:
+        del waitlist[competition['name']]
+    if save:
+        if promoted:
+            saveBookings()
+            saveCompetitions()
+            saveClubs()
+        saveWaitlist()
+    return promoted
+
+
+def addCompetitionPlaces(competition, extra_places):
+    """Increase a competition capacity and promote its waitlist, saved in a single commit"""
+    competition['numberOfPlaces'] = str(int(competition['numberOfPlaces']) + extra_places)
+    publishSnapshot(changed_competitions=[competition])
+    forgetRequestMemo('limits')
+    promoted = promoteWaitlist(competition, save=False)
+    saveAll(SAVE_ALL_FILES + ('waitlist.json',))
+    return promoted
+
+
+def cancelBooking(booking_id, club_name):
+    """Cancel a confirmed booking and reverse its effects
+
+    The booking record carries everything needed to reverse it, so the club
+    points and competition places are restored directly from it without
+    going through the booking history. Freed places go to the waitlist, and
+    everything is saved in a single commit.
+
+    Returns:
+        tuple: (is_cancelled, error_message)
+    """
+    booking = findBookingById(booking_id)
+    if booking is None or booking['club'] != club_name:
+        return False, 'Booking not found.'
+    if not isBookingActive(booking):
+        return False, 'This booking is already cancelled.'
+
+    club = findClubByNameCached(booking['club'])
+    competition = findCompetitionByNameCached(booking['competition'])
+    if club is None or competition is None:
+        return False, 'Booking not found.'
+    if isCompetitionDatePassedCached(competition):
+        return False, 'Cancellation not allowed: competition date has passed.'
+
+    booking['status'] = 'cancelled'
+    booking['cancelled_date'] = datetime.now().isoformat()
+    club['points'] = str(int(club['points']) + booking['points_used'])
+    competition['numberOfPlaces'] = str(int(competition['numberOfPlaces']) + booking['places'])
+    publishSnapshot([club], [competition])
+    forgetRequestMemo('limits')
+
+    promoteWaitlist(competition, save=False)
+    saveAll(SAVE_ALL_FILES + ('waitlist.json',))
+    return True, None
+
+
+def writerPurchase(club_name, competition_name, places_required):
+    """Purchase command run by the booking writer
+
+    Runs the same checks as the purchasePlaces route against the current
+    data, then applies the booking in memory; the writer saves it with the
+    rest of its batch.
+
+    Returns:
+        tuple: ((outcome, error_message), changed) with outcome 'queued',
+        'invalid', 'date_passed' or 'booked'
+    """
+    drawDueLotteries()
+    club = findClubByName(club_name)
+    competition = findCompetitionByName(competition_name)
+    if not club or not competition:
+        return ('invalid', "Something went wrong-please try again"), False
+
+    if isLotteryWindowOpen(competition_name):
+        is_queued, error_message = queueLotteryRequest(club, competition, places_required)
+        return ('queued' if is_queued else 'invalid', error_message), False
+
+    is_valid, error_message = validateBookingRequest(places_required, calculateBookingLimits(club, competition))
+    if not is_valid:
+        return ('invalid', error_message), False
+    if is_competition_date_passed(competition):
+        return ('date_passed', None), False
+
+    applyBooking(club, competition, places_required)
+    return ('booked', None), True
+
+
+class BookingWriter:
+    """Single thread applying every data mutation, one command at a time
+
+    Request handlers submit commands and wait for their result. Commands are
+    taken from the queue in batches: each one runs in turn, then the data
+    changed by the batch is saved once, before any of its results is
+    returned, so a result is only seen once its booking is on disk.
+    """
+
+    def __init__(self, max_batch=64):
+        self.max_batch = max_batch
+        self.commands = queue.Queue()
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        if not self.running:
+            self.thread = threading.Thread(target=self.run, name='gudlft-writer', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Process the commands already submitted, then stop the thread"""
+        if self.running:
+            self.commands.put(None)
+            self.thread.join()
+        self.thread = None
+
+    def submit(self, command, *args):
+        """Run command(*args) in the writer thread and return its result
+
+        The command runs on the dataset of the caller and returns (result,
+        changed); changed datasets are saved with the batch.
+        """
+        future = Future()
+        self.commands.put((future, currentDataset(), command, args))
+        return future.result()
+
+    def nextBatch(self):
+        batch = [self.commands.get()]
+        while batch[-1] is not None and len(batch) < self.max_batch:
+            try:
+                batch.append(self.commands.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def run(self):
+        while True:
+            batch = self.nextBatch()
+            stopping = batch[-1] is None
+            done = []
+            changed = []
+            for future, dataset, command, args in filter(None, batch):
+                try:
+                    with servingDataset(dataset):
+                        result, command_changed = command(*args)
+                except Exception as error:
+                    future.set_exception(error)
+                    continue
+                if command_changed and dataset not in changed:
+                    changed.append(dataset)
+                done.append((future, result))
+            try:
+                for dataset in changed:
+                    with servingDataset(dataset):
+                        saveAll()
+            except Exception as error:
+                for future, _ in done:
+                    future.set_exception(error)
+            else:
+                for future, result in done:
+                    future.set_result(result)
+            if stopping:
+                return
+
+
+def runMutation(command, *args):
+    """Run a command that saves its own changes
+
+    In the writer thread if it runs, else under the write lock of the
+    current dataset.
+    """
+    if bookingWriter.running:
+        return bookingWriter.submit(lambda: (command(*args), False))
+    with currentDataset().writeLock:
+        return command(*args)
+
+
+class PrerenderWorker:
+    """Background thread rendering the data-dependent pages again after a change
+
+    When the web server sends the PRERENDER_DIR files itself, requests no
+    longer reach Python, so the files are refreshed when a new version is
+    published instead of on the next request. Versions published within
+    `delay` seconds are rendered once.
+    """
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.thread = None
+
+    def schedule(self, dataset):
+        """Render the pages of a dataset after the delay"""
+        with self.lock:
+            self.pending.add(dataset)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='gudlft-prerender', daemon=True)
+                self.thread.start()
+
+    def render(self, dataset):
+        with servingDataset(dataset):
+            for page, (_, _, context) in PRERENDERED_PAGES.items():
+                if context:
+                    getPrerenderedPage(page)
+
+    def run(self):
+        while True:
+            time.sleep(self.delay)
+            with self.lock:
+                datasets, self.pending = self.pending, set()
+                if not datasets:
+                    self.thread = None
+                    return
+            for dataset in datasets:
+                try:
+                    self.render(dataset)
+                except Exception:
+                    app.logger.exception('Pre-rendering failed')
+
+
+class EventHub:
+    """Fan-out of point and place changes to the /events subscribers
+
+    Changes are not sent one by one: they are merged per club or
+    competition and delivered to every subscriber of the dataset as a
+    single batch every `interval` seconds, by a background thread.
+    """
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.subscribers = {}
+        self.thread = None
+
+    def subscribe(self, channel, deliver):
+        """Call deliver(batch) with every batch of changes of a dataset
+
+        Args:
+            channel: Clubs list of the dataset, as seen by the subscriber
+            deliver (callable): Called from the hub thread, must not block
+
+        Returns:
+            object: Token for unsubscribe()
+        """
+        token = object()
+        with self.lock:
+            self.subscribers[token] = (channel, deliver)
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='gudlft-events', daemon=True)
+                self.thread.start()
+        return token
+
+    def unsubscribe(self, token):
+        with self.lock:
+            self.subscribers.pop(token, None)
+
+    def publish(self, channel, changes):
+        """Queue (kind, name, old value, new value) changes of a dataset"""
+        if not self.subscribers:
+            return
+        with self.lock:
+            pending = self.pending.setdefault(id(channel), {})
+            for kind, name, old_value, new_value in changes:
+                event = pending.setdefault((kind, name), {'type': kind, 'name': name, 'delta': 0})
+                event['value'] = int(new_value)
+                event['delta'] += int(new_value) - int(old_value)
+
+    def flush(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            subscribers = list(self.subscribers.values())
+        for channel, deliver in subscribers:
+            batch = pending.get(id(channel))
+            if batch:
+                deliver(list(batch.values()))
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+            with self.lock:
+                if not self.subscribers:
+                    self.thread = None
+                    return
+
+
+def eventStream(channel, keepalive):
+    """Server-sent events of a dataset, one 'update' event per batch of changes"""
+    batches = queue.Queue(maxsize=100)
+
+    def deliver(batch):
+        try:
+            batches.put_nowait(batch)
+        except queue.Full:
+            # Slow client: drop what it missed and tell it to reload instead
+            while not batches.empty():
+                batches.get_nowait()
+            batches.put_nowait([{'type': 'resync'}])
+
+    token = eventHub.subscribe(channel, deliver)
+    try:
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                batch = batches.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            yield 'event: update\ndata: ' + json.dumps(batch) + '\n\n'
+    finally:
+        eventHub.unsubscribe(token)
+
+
+class TokenBucket:
+    """Token bucket: `rate` requests per second on average, bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self):
+        """Use one token; False if the bucket is empty"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class TimedSpan:
+    """Context manager adding (name, seconds) to the trace of the current request"""
+
+    __slots__ = ('trace', 'name', 'start')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.trace.append((self.name, time.perf_counter() - self.start))
+        return False
+
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+def span(name):
+    """Time a stage of the current request
+
+    Returns a shared no-op context manager when the request is not traced,
+    so instrumented code costs a single context variable read.
+    """
+    trace = currentTrace.get()
+    if trace is None:
+        return NULL_SPAN
+    return TimedSpan(trace, name)
+
+
+def summarizeTrace(trace):
+    """Sum span durations by name, in milliseconds, keeping first-seen order"""
+    summary = {}
+    for name, seconds in trace:
+        summary[name] = summary.get(name, 0.0) + seconds * 1000
+    return {name: round(ms, 3) for name, ms in summary.items()}
+
+
+def formatServerTiming(summary, total_ms):
+    """Format a trace summary as a Server-Timing header value"""
+    entries = [f'{name};dur={ms}' for name, ms in summary.items()]
+    entries.append(f'total;dur={round(total_ms, 3)}')
+    return ', '.join(entries)
+
+
+class TracedTemplate(Template):
+    """Jinja template whose rendering is recorded as a 'render.<name>' span"""
+
+    def render(self, *args, **kwargs):
+        with span('render.' + str(self.name)):
+            return super().render(*args, **kwargs)
+
+
+currentTrace = contextvars.ContextVar('currentTrace', default=None)
+traceLogger = logging.getLogger('gudlft.trace')
+
+
+def configureTraceLogger():
+    """Emit the trace lines at INFO level on stderr, once"""
+    traceLogger.setLevel(logging.INFO)
+    if not traceLogger.handlers:
+        traceLogger.addHandler(logging.StreamHandler())
+
+
+def profileFilename(route):
+    """File name of the aggregated profile of a route, e.g. /book/<competition> -> book_competition.prof"""
+    return (re.sub(r'[^A-Za-z0-9]+', '_', route).strip('_') or 'index') + '.prof'
+
+
+def recordProfile(route, profiler):
+    """Merge a request profile into the route aggregate and write it to disk"""
+    with profilerLock:
+        if route in profilerState['stats']:
+            profilerState['stats'][route].add(profiler)
+        else:
+            profilerState['stats'][route] = pstats.Stats(profiler)
+        profilerState['samples'][route] = profilerState['samples'].get(route, 0) + 1
+        os.makedirs(profilerState['directory'], exist_ok=True)
+        profilerState['stats'][route].dump_stats(
+            os.path.join(profilerState['directory'], profileFilename(route)))
+
+
+def configureProfiler(enabled=None, sample_rate=None, reset=False):
+    """Change the profiler settings at runtime
+
+    Args:
+        enabled (bool, optional): Turn request sampling on or off
+        sample_rate (float, optional): Fraction of requests to profile, between 0 and 1
+        reset (bool): Drop the aggregated profiles kept in memory
+
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    if sample_rate is not None and not 0 <= sample_rate <= 1:
+        return False, 'sample_rate must be between 0 and 1.'
+    with profilerLock:
+        if enabled is not None:
+            profilerState['enabled'] = enabled
+        if sample_rate is not None:
+            profilerState['sample_rate'] = sample_rate
+        if reset:
+            profilerState['stats'] = {}
+            profilerState['samples'] = {}
+    return True, None
+
+
+profilerState = {
+    'enabled': False,
+    'sample_rate': 0.01,
+    'directory': 'profiles',
+    'stats': {},
+    'samples': {}
+}
+profilerLock = threading.Lock()
+# cProfile is process-wide since Python 3.12: one profiled request at a time
+activeProfilerLock = threading.Lock()
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Rejection reasons reported by /metrics, keyed by the start of the
+# validateBookingRequest() error message
+BOOKING_REJECTION_REASONS = [
+    ('Number of places must be', 'non_positive_places'),
+    ('Impossible to reserve more than 12', 'over_12_per_booking'),
+    ('Maximum 12 places per club', 'over_12_per_competition'),
+    ('Not enough places', 'not_enough_places'),
+    ('Not enough points', 'not_enough_points'),
+    ('Booking not allowed: competition date', 'competition_date_passed')
+]
+
+
+def bookingRejectionReason(error_message):
+    """Return a short reason label for a booking error message"""
+    for prefix, reason in BOOKING_REJECTION_REASONS:
+        if error_message.startswith(prefix):
+            return reason
+    return 'other'
+
+
+def observeHistogram(histograms, labels, value):
+    """Record a value in the histogram of the given labels"""
+    with metricsLock:
+        histogram = histograms.setdefault(labels, {'buckets': [0] * len(LATENCY_BUCKETS), 'sum': 0.0, 'count': 0})
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+
+def incrementCounter(counters, labels, amount=1):
+    """Increment the counter of the given labels"""
+    with metricsLock:
+        counters[labels] = counters.get(labels, 0) + amount
+
+
+def formatLabels(names, values):
+    """Format Prometheus labels, e.g. {route="/",status="200"}"""
+    pairs = ['{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"'))
+             for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def renderMetrics():
+    """Render all metrics in the Prometheus text exposition format"""
+    lines = []
+
+    def histogram(name, help_text, label_names, histograms):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} histogram')
+        for labels, h in sorted(histograms.items()):
+            for bound, count in zip(LATENCY_BUCKETS, h['buckets']):
+                lines.append(f'{name}_bucket{formatLabels(label_names + ("le",), labels + (bound,))} {count}')
+            lines.append(f'{name}_bucket{formatLabels(label_names + ("le",), labels + ("+Inf",))} {h["count"]}')
+            lines.append(f'{name}_sum{formatLabels(label_names, labels)} {h["sum"]}')
+            lines.append(f'{name}_count{formatLabels(label_names, labels)} {h["count"]}')
+
+    def counter(name, help_text, label_names, counters):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} counter')
+        for labels, value in sorted(counters.items()):
+            lines.append(f'{name}{formatLabels(label_names, labels)} {value}')
+
+    def gauge(name, help_text, value):
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+
+    with metricsLock:
+        histogram('gudlft_request_duration_seconds', 'Request latency per route.',
+                  ('route',), metrics['route_latency'])
+        counter('gudlft_requests_total', 'Requests per route and status code.',
+                ('route', 'status'), metrics['requests'])
+        counter('gudlft_purchases_total', 'Purchase requests by result and rejection reason.',
+                ('result', 'reason'), metrics['purchases'])
+        histogram('gudlft_save_duration_seconds', 'Time spent writing each data file.',
+                  ('file',), metrics['save_seconds'])
+        counter('gudlft_save_bytes_total', 'Bytes written to each data file.',
+                ('file',), metrics['save_bytes'])
+        counter('gudlft_request_memo_total', 'Request memoisation hits and misses per kind.',
+                ('kind', 'result'),
+                {(kind, result): count for kind, stats in memoStats.items()
+                 for result, count in (('hit', stats['hits']), ('miss', stats['misses']))})
+
+    data = currentDataset()
+    gauge('gudlft_clubs', 'Clubs loaded in memory.', len(data.clubs))
+    gauge('gudlft_competitions', 'Competitions loaded in memory.', len(data.competitions))
+    gauge('gudlft_bookings', 'Bookings loaded in memory.', len(data.bookings))
+    gauge('gudlft_waitlist_entries', 'Waitlist entries across all competitions.',
+          sum(len(queue) for queue in data.waitlist.values()))
+    gauge('gudlft_lottery_windows', 'Lottery windows currently collecting requests.', len(data.lotteryWindows))
+    return '\n'.join(lines) + '\n'
+
+
+metrics = {
+    'route_latency': {},
+    'requests': {},
+    'purchases': {},
+    'save_seconds': {},
+    'save_bytes': {}
+}
+metricsLock = threading.Lock()
+
+app = Flask(__name__)
+app.secret_key = 'something_special'
+app.config['TRACING'] = os.environ.get('GUDLFT_TRACING') == '1'
+if app.config['TRACING']:
+    configureTraceLogger()
+app.config['ADMIN_TOKEN'] = os.environ.get('GUDLFT_ADMIN_TOKEN')
+app.jinja_env.template_class = TracedTemplate
+app.jinja_env.globals['getClubBookings'] = getClubBookings
+app.jinja_env.globals['newIdempotencyKey'] = lambda: secrets.token_urlsafe(16)
+app.config['TEMPLATE_CACHE_DIR'] = os.environ.get('GUDLFT_TEMPLATE_CACHE_DIR')
+app.config['COMPRESSION'] = os.environ.get('GUDLFT_COMPRESSION', '1') == '1'
+app.config['COMPRESSION_MIN_SIZE'] = int(os.environ.get('GUDLFT_COMPRESSION_MIN_SIZE', 1024))
+app.config['COMPRESSION_LEVEL'] = int(os.environ.get('GUDLFT_COMPRESSION_LEVEL', 6))
+# Purchase rate limits (requests per second, burst) and admission queue depth
+app.config['RATE_LIMIT_GLOBAL'] = float(os.environ.get('GUDLFT_RATE_GLOBAL', 200))
+app.config['RATE_LIMIT_GLOBAL_BURST'] = float(os.environ.get('GUDLFT_RATE_GLOBAL_BURST', 400))
+app.config['RATE_LIMIT_CLUB'] = float(os.environ.get('GUDLFT_RATE_CLUB', 2))
+app.config['RATE_LIMIT_CLUB_BURST'] = float(os.environ.get('GUDLFT_RATE_CLUB_BURST', 5))
+app.config['RATE_LIMIT_MAX_CLUBS'] = int(os.environ.get('GUDLFT_RATE_MAX_CLUBS', 10000))
+app.config['ADMISSION_MAX_DEPTH'] = int(os.environ.get('GUDLFT_ADMISSION_MAX_DEPTH', 64))
+# Purchase outcomes kept for replays of the same idempotency key (count, seconds)
+app.config['IDEMPOTENCY_MAX_KEYS'] = int(os.environ.get('GUDLFT_IDEMPOTENCY_MAX_KEYS', 10000))
+app.config['IDEMPOTENCY_TTL'] = float(os.environ.get('GUDLFT_IDEMPOTENCY_TTL', 3600))
+app.config['PRERENDER_DIR'] = os.environ.get('GUDLFT_PRERENDER_DIR')
+app.config['EVENTS_KEEPALIVE'] = float(os.environ.get('GUDLFT_EVENTS_KEEPALIVE', 15))
+app.config['PRERENDER_SENDFILE'] = os.environ.get('GUDLFT_PRERENDER_SENDFILE', '')
+app.config['PRERENDER_URL'] = os.environ.get('GUDLFT_PRERENDER_URL', '/prerendered/')
+
+app.config['LOTTERY_INTERVAL'] = float(os.environ.get('GUDLFT_LOTTERY_INTERVAL', 30))
+app.config['DATA_DIR'] = os.environ.get('GUDLFT_DATA_DIR', '')
+app.config['TENANT_SELECTOR'] = os.environ.get('GUDLFT_TENANT_SELECTOR', 'path')
+app.wsgi_app = TenantPathMiddleware(app.wsgi_app)
+
+# The default dataset, see ModuleDataset
+storage = JsonFileStorage(app.config['DATA_DIR'])
+bookingIndex = newBookingIndex()
+lotteryWindows = {}
+snapshot = None
+writeLock = threading.RLock()
+snapshotLock = threading.Lock()
+defaultDataset = ModuleDataset()
+prerendered = {}
+prerenderLock = threading.Lock()
+eventHub = EventHub(float(os.environ.get('GUDLFT_EVENTS_INTERVAL', 0.5)))
+lotteryTimer = LotteryTimer(app.config['LOTTERY_INTERVAL'])
+prerenderWorker = PrerenderWorker(float(os.environ.get('GUDLFT_PRERENDER_DELAY', 0.5)))
+loadData()
+memoStats = {}
+
+# Purchases, cancellations and waitlist changes go through a single writer thread
+bookingWriter = BookingWriter(int(os.environ.get('GUDLFT_WRITER_BATCH', 64)))
+if os.environ.get('GUDLFT_SINGLE_WRITER') == '1':
+    bookingWriter.start()
+
+# Federations served by this process, each with its own Dataset, put on
+# flask.g for its requests; tenantLock only guards their first load
+tenants = {}
+tenantLock = threading.Lock()
+for tenant_name, tenant_dir in parseTenants(os.environ.get('GUDLFT_TENANTS', '')).items():
+    registerTenant(tenant_name, tenant_dir)
+
+def getCurrentClub():
+    """Return the club logged in with showSummary, resolved at most once per request"""
+    club_name = session.get('club')
+    if not club_name or session.get('tenant') != g.get('tenant'):
+        return None
+    return findClubByNameCached(club_name)
+
+
+def getRequestClub():
+    """Club for the current request: the logged-in club, else the 'club' form field
+
+    A session opened in another federation is not replaced by the form
+    field, so a club is never debited in a dataset it did not log in to.
+    """
+    if session.get('club'):
+        return getCurrentClub()
+    return findClubByNameCached(request.form.get('club'))
+
+
+def isAdminRequest():
+    """True if the request carries the admin token (admin routes are disabled without one)"""
+    token = app.config['ADMIN_TOKEN']
+    provided = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(provided, token)
+
+
+def configureTemplateCache(directory=None):
+    """Keep compiled templates on disk, shared by workers and restarts
+
+    Jinja's default directory (in the system temp dir) is used when no
+    directory is given.
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+
+
+def precompileTemplates():
+    """Compile every template now instead of on the first request using it"""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        app.jinja_env.get_template(name)
+
+
+configureTemplateCache(app.config['TEMPLATE_CACHE_DIR'])
+precompileTemplates()
+
+
+@app.before_request
+def startProfiler():
+    if not profilerState['enabled'] or random.random() >= profilerState['sample_rate']:
+        return
+    if not activeProfilerLock.acquire(blocking=False):
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiling tool (e.g. a debugger) is already active
+        activeProfilerLock.release()
+        return
+    g.profiler = profiler
+
+
+@app.before_request
+def startRequestTimer():
+    g.request_start = time.perf_counter()
+    if app.config['TRACING']:
+        g.trace_token = currentTrace.set([])
+
+
+def configureRateLimits():
+    """(Re)create the purchase rate limits and admission slots from app.config
+
+    A rate or depth of 0 disables the corresponding check.
+    """
+    config = app.config
+    rateLimits['global'] = (TokenBucket(config['RATE_LIMIT_GLOBAL'], config['RATE_LIMIT_GLOBAL_BURST'])
+                            if config['RATE_LIMIT_GLOBAL'] else None)
+    rateLimits['clubs'] = OrderedDict()
+    rateLimits['slots'] = (threading.BoundedSemaphore(config['ADMISSION_MAX_DEPTH'])
+                           if config['ADMISSION_MAX_DEPTH'] else None)
+
+
+rateLimits = {}
+rateLimitLock = threading.Lock()
+configureRateLimits()
+
+
+def takeClubToken(key):
+    """Use a token of a club bucket, keeping the buckets of recent clubs only"""
+    if not app.config['RATE_LIMIT_CLUB']:
+        return True
+    with rateLimitLock:
+        buckets = rateLimits['clubs']
+        bucket = buckets.get(key)
+        if bucket is None:
+            bucket = buckets[key] = TokenBucket(app.config['RATE_LIMIT_CLUB'], app.config['RATE_LIMIT_CLUB_BURST'])
+            if len(buckets) > app.config['RATE_LIMIT_MAX_CLUBS']:
+                buckets.popitem(last=False)
+        else:
+            buckets.move_to_end(key)
+    return bucket.take()
+
+
+def tooManyRequests(reason):
+    incrementCounter(metrics['purchases'], ('rejected', reason))
+    response = Response('Too many booking requests, please try again in a moment.', 429, mimetype='text/plain')
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+@app.before_request
+def admitPurchase():
+    """Shed purchases with a fast 429 before any data lookup
+
+    Registered before enterTenant() so shed requests never load a
+    federation's dataset.
+    """
+    if request.endpoint != 'purchasePlaces':
+        return None
+    # Replaying a stored outcome books nothing, so it spends no token
+    key = getIdempotencyKey()
+    if key is not None and hasStoredIdempotencyResult(key):
+        return None
+    # Raw names only: the club is not looked up before the request is admitted
+    club_key = (request.script_root, request.host, session.get('club') or request.form.get('club', ''))
+    if not takeClubToken(club_key):
+        return tooManyRequests('club_rate_limited')
+    if rateLimits['global'] and not rateLimits['global'].take():
+        return tooManyRequests('rate_limited')
+    slots = rateLimits['slots']
+    if slots:
+        if not slots.acquire(blocking=False):
+            return tooManyRequests('overloaded')
+        g.purchase_slots = slots
+    return None
+
+
+@app.before_request
+def enterTenant():
+    """Serve the request from the dataset of the federation it selects, if any"""
+    if not tenants:
+        return
+    if app.config['TENANT_SELECTOR'] == 'host':
+        g.tenant = tenantFromHost(request.host)
+    else:
+        g.tenant = request.environ.get('gudlft.tenant')
+    if g.tenant:
+        g.dataset = getTenantDataset(g.tenant)
+
+
+@app.after_request
+def recordRequestMetrics(response):
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    if 'request_start' in g:
+        elapsed = time.perf_counter() - g.request_start
+        observeHistogram(metrics['route_latency'], (route,), elapsed)
+        trace = currentTrace.get()
+        if trace is not None:
+            summary = summarizeTrace(trace)
+            response.headers['Server-Timing'] = formatServerTiming(summary, elapsed * 1000)
+            traceLogger.info(json.dumps({
+                'method': request.method,
+                'route': route,
+                'status': response.status_code,
+                'total_ms': round(elapsed * 1000, 3),
+                'spans': summary
+            }))
+    incrementCounter(metrics['requests'], (route, str(response.status_code)))
+    return response
+
+
+COMPRESSIBLE_MIMETYPES = ('text/html', 'text/csv', 'text/plain', 'application/json')
+
+
+def shouldCompress(response, size):
+    """True if a response body of this size should be sent gzip-compressed"""
+    return (app.config['COMPRESSION']
+            and size >= app.config['COMPRESSION_MIN_SIZE']
+            and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and request.accept_encodings['gzip'] > 0)
+
+
+def gzipBody(body):
+    # mtime=0 so the same page always compresses to the same bytes
+    return gzip.compress(body, compresslevel=app.config['COMPRESSION_LEVEL'], mtime=0)
+
+
+def setGzipBody(response, body):
+    response.set_data(body)
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+
+
+@app.after_request
+def compressResponse(response):
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers):
+        return response
+    body = response.get_data()
+    if shouldCompress(response, len(body)):
+        with span('compress'):
+            setGzipBody(response, gzipBody(body))
+    return response
+
+
+@app.teardown_request
+def stopProfiler(exc):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        activeProfilerLock.release()
+        recordProfile(request.url_rule.rule if request.url_rule else 'unmatched', profiler)
+
+
+@app.teardown_request
+def endRequestTrace(exc):
+    if 'trace_token' in g:
+        currentTrace.reset(g.trace_token)
+
+
+@app.teardown_request
+def releasePurchaseSlot(exc):
+    if 'purchase_slots' in g:
+        g.purchase_slots.release()
+
+
+@app.route('/')
+def index():
+    return servePrerendered('index')
+
+@app.route('/showSummary',methods=['POST'])
+def showSummary():
+    email = request.form['email']
+    current = getSnapshot()
+    with span('club'):
+        club = snapshotClubByEmail(current, email)
+    if not club:
+        # Email non trouvé, afficher un message d'erreur sur la page d'accueil
+        return render_template('index.html', message="This email doesn't exist. Please try again.")
+    session['club'] = club['name']
+    session['tenant'] = g.get('tenant')
+    return render_template('welcome.html',club=club,competitions=current['competitions'])
+
+
+@app.route('/book/<competition>')
+def bookCompetition(competition):
+    club = getCurrentClub()
+    if not club:
+        return redirect(url_for('index'))
+    return renderBookPage(club, findCompetitionByNameCached(competition), club)
+
+
+@app.route('/book/<competition>/<club>')
+def book(competition,club):
+    return renderBookPage(findClubByNameCached(club), findCompetitionByNameCached(competition), club)
+
+
+def renderBookPage(foundClub, foundCompetition, club):
+    """Render the booking page of a competition, or the welcome page with an error"""
+    if foundClub and foundCompetition:
+        # Vérification de la date de la compétition
+        if isCompetitionDatePassedCached(foundCompetition):
+            flash("Booking not allowed: competition date has passed.")
+            return render_template('welcome.html', club=foundClub, competitions=currentDataset().competitions)
+        limits = calculateBookingLimitsCached(foundClub, foundCompetition)
+        return renderBookingPageWithLimits(foundClub, foundCompetition, limits)
+    else:
+        flash("Something went wrong-please try again")
+        return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+
+# Seconds a repeated submission waits for the original one to finish
+IDEMPOTENCY_WAIT_SECONDS = 30
+
+idempotencyResults = OrderedDict()
+idempotencyLock = threading.Lock()
+
+
+def getIdempotencyKey():
+    """Key of the current purchase, scoped to its tenant and club, or None
+
+    Browsers send the hidden idempotency_key field of the booking form, API
+    clients the Idempotency-Key header.
+    """
+    key = request.headers.get('Idempotency-Key') or request.form.get('idempotency_key')
+    if not key:
+        return None
+    return (request.script_root, request.host, session.get('club') or request.form.get('club', ''), key)
+
+
+def purchaseFingerprint():
+    """Hash of what the current purchase asks for, stored with its idempotency key"""
+    requested = [request.form.get('competition', ''), request.form.get('places', '')]
+    return hashlib.sha256(json.dumps(requested).encode('utf-8')).hexdigest()
+
+
+def claimIdempotencyKey(key, fingerprint=None):
+    """Return (entry, is_new) for a key, adding a pending entry if it is unknown or expired"""
+    now = time.monotonic()
+    with idempotencyLock:
+        entry = idempotencyResults.get(key)
+        if entry is not None and entry['expires'] > now:
+            idempotencyResults.move_to_end(key)
+            return entry, False
+        entry = idempotencyResults[key] = {
+            'done': threading.Event(),
+            'response': None,
+            'fingerprint': fingerprint,
+            'expires': now + app.config['IDEMPOTENCY_TTL']
+        }
+        idempotencyResults.move_to_end(key)
+        while len(idempotencyResults) > app.config['IDEMPOTENCY_MAX_KEYS']:
+            idempotencyResults.popitem(last=False)
+        return entry, True
+
+
+def hasStoredIdempotencyResult(key):
+    """Whether a key already has an unexpired outcome to replay"""
+    with idempotencyLock:
+        entry = idempotencyResults.get(key)
+        return entry is not None and entry['response'] is not None and entry['expires'] > time.monotonic()
+
+
+def releaseIdempotencyKey(key, entry, response=None):
+    """Store the outcome of a claimed key, or forget the key if the purchase failed"""
+    if response is None:
+        with idempotencyLock:
+            if idempotencyResults.get(key) is entry:
+                del idempotencyResults[key]
+    else:
+        entry['response'] = (response.get_data(), response.status_code, response.mimetype)
+    entry['done'].set()
+
+
+@app.route('/purchasePlaces',methods=['POST'])
+def purchasePlaces():
+    """Book places, replaying the original outcome of an already used idempotency key"""
+    key = getIdempotencyKey()
+    if key is None:
+        return handlePurchase()
+    fingerprint = purchaseFingerprint()
+    while True:
+        entry, is_new = claimIdempotencyKey(key, fingerprint)
+        if is_new:
+            break
+        if entry['fingerprint'] != fingerprint:
+            # e.g. a form resubmitted from the browser history with other places
+            return Response('This idempotency key was already used for another booking request.',
+                            422, mimetype='text/plain')
+        if not entry['done'].wait(IDEMPOTENCY_WAIT_SECONDS):
+            return Response('This booking is still being processed.', 409, mimetype='text/plain')
+        if entry['response'] is not None:
+            incrementCounter(metrics['purchases'], ('replayed', ''))
+            body, status, mimetype = entry['response']
+            response = Response(body, status, mimetype=mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        # The original submission failed before storing an outcome: run this one
+
+    try:
+        response = app.make_response(handlePurchase())
+    except BaseException:
+        releaseIdempotencyKey(key, entry)
+        raise
+    releaseIdempotencyKey(key, entry, response)
+    return response
+
+
+def handlePurchase():
+    competition = findCompetitionByNameCached(request.form['competition'])
+    club = getRequestClub()
+    placesRequired = int(request.form['places'])
+
+    if not club or not competition:
+        flash("Something went wrong-please try again")
+        return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+
+    if bookingWriter.running:
+        outcome, error_message = bookingWriter.submit(writerPurchase, club['name'], competition['name'], placesRequired)
+        # The writer thread changed the data outside of this request's memo
+        forgetRequestMemo('limits')
+    else:
+        # Checked and booked in one step so concurrent purchases cannot oversell
+        with currentDataset().writeLock:
+            outcome, error_message = purchaseInRequest(club, competition, placesRequired)
+    return renderPurchaseOutcome(club, competition, outcome, error_message)
+
+
+def purchaseInRequest(club, competition, places_required):
+    """Checks and booking of purchasePlaces when the booking writer does not run
+
+    Returns:
+        tuple: (outcome, error_message), outcomes as in writerPurchase()
+    """
+    # Allocate any lottery whose window has closed before handling this request
+    drawDueLotteries()
+
+    if isLotteryWindowOpen(competition['name']):
+        is_queued, error_message = queueLotteryRequest(club, competition, places_required)
+        return ('queued' if is_queued else 'invalid'), error_message
+
+    # Calculate limits for validation and error display
+    limits = calculateBookingLimitsCached(club, competition)
+
+    # Validate the booking request
+    with span('validation'):
+        is_valid, error_message = validateBookingRequest(places_required, limits)
+    if not is_valid:
+        return 'invalid', error_message
+
+    # Vérification de la date de la compétition après les autres validations
+    if isCompetitionDatePassedCached(competition):
+        return 'date_passed', None
+
+    # If all checks pass, proceed with booking
+    processBooking(club, competition, places_required)
+    return 'booked', None
+
+
+def renderPurchaseOutcome(club, competition, outcome, error_message):
+    """Render the page of a purchase outcome and count it in the metrics"""
+    if outcome == 'queued':
+        flash('Your request has been registered for the lottery draw.')
+    elif outcome == 'invalid':
+        incrementCounter(metrics['purchases'], ('rejected', bookingRejectionReason(error_message)))
+        return renderBookingPageWithLimits(club, competition, calculateBookingLimitsCached(club, competition), error_message)
+    elif outcome == 'date_passed':
+        incrementCounter(metrics['purchases'], ('rejected', 'competition_date_passed'))
+        flash("Booking not allowed: competition date has passed.")
+    else:
+        incrementCounter(metrics['purchases'], ('accepted', ''))
+        flash('Great-booking complete!')
+    return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+
+@app.route('/waitlist',methods=['POST'])
+def joinWaitlistRoute():
+    competition = findCompetitionByNameCached(request.form['competition'])
+    club = getRequestClub()
+    placesRequired = int(request.form['places'])
+
+    if not club or not competition:
+        flash("Something went wrong-please try again")
+        return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+    is_added, error_message = runMutation(joinWaitlist, club, competition, placesRequired)
+    if not is_added:
+        return renderBookingPageWithLimits(club, competition, calculateBookingLimitsCached(club, competition), error_message)
+
+    flash('You have joined the waitlist. Places will be booked automatically when they become available.')
+    return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+
+@app.route('/cancelBooking',methods=['POST'])
+def cancelBookingRoute():
+    # Only the logged-in club may cancel, never a club named in the form
+    club = getCurrentClub()
+    if not club:
+        return redirect(url_for('index'))
+    try:
+        booking_id = int(request.form.get('booking_id', ''))
+    except ValueError:
+        return Response('Invalid booking id.', 400, mimetype='text/plain')
+
+    is_cancelled, error_message = runMutation(cancelBooking, booking_id, club['name'])
+    flash('Booking cancelled.' if is_cancelled else error_message)
+    return render_template('welcome.html', club=club, competitions=currentDataset().competitions)
+
+
+def rankClubsByPoints(current):
+    """Clubs of a snapshot sorted by points, with their rank"""
+    # Get all clubs data (optimized for performance)
+    clubs_data = []
+    for club in current['clubs']:
+        clubs_data.append({
+            'name': club['name'],
+            'points': int(club['points'])
+        })
+    
+    # Sort by points descending for better UX
+    clubs_data.sort(key=lambda x: x['points'], reverse=True)
     
     # Add ranking
     for i, club in enumerate(clubs_data, 1):
         club['rank'] = i
-    
-    return render_template('public_points.html', clubs=clubs_data)
+    return clubs_data
+
+
+@app.route('/public/points')
+def public_points():
+    """
+    Public dashboard showing all clubs' points totals
+    Accessible without login for transparency
+    Performance optimized: < 2 seconds target
+    """
+    # Rendered once per data version, see getPrerenderedPage()
+    return servePrerendered('public_points')
+
+
+def pointsRankingContext(current):
+    return {'clubs': snapshotDerived(current, 'points_ranking', lambda: rankClubsByPoints(current))}
+
+
+# Pages rendered once per data version instead of once per request:
+# page -> (file in the pre-render directory, template, context from a snapshot or None if static)
+PRERENDERED_PAGES = {
+    'index': ('index.html', 'index.html', None),
+    'public_points': (os.path.join('public', 'points.html'), 'public_points.html', pointsRankingContext)
+}
+
+
+def prerenderRequestContext():
+    """Request context for rendering outside of a request (worker, CLI)
+
+    url_for() links then carry the path prefix of the dataset's federation.
+    """
+    tenant = currentDataset().tenant
+    prefix = '/' + tenant if tenant and app.config['TENANT_SELECTOR'] == 'path' else ''
+    return app.test_request_context('/', base_url='http://localhost' + prefix)
+
+
+def prerenderPage(page, current):
+    """Render a page for a snapshot, and write it to PRERENDER_DIR if set
+
+    Returns:
+        dict: The rendered page (snapshot, body, path)
+    """
+    filename, template, context = PRERENDERED_PAGES[page]
+    with contextlib.nullcontext() if has_request_context() else prerenderRequestContext():
+        body = render_template(template, **(context(current) if context else {})).encode('utf-8')
+    path = None
+    if app.config['PRERENDER_DIR']:
+        path = os.path.join(app.config['PRERENDER_DIR'], currentDataset().tenant or '', filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'wb') as f:
+            f.write(body)
+        os.replace(path + '.tmp', path)
+    return {'snapshot': current if context else None, 'body': body, 'path': path}
+
+
+def getPrerenderedPage(page):
+    """Return a pre-rendered page, rendering it again if the data changed since"""
+    current = getSnapshot()
+    key = (currentDataset().tenant, page)
+    entry = prerendered.get(key)
+    if entry is None or (PRERENDERED_PAGES[page][2] and entry['snapshot'] is not current):
+        with prerenderLock:
+            entry = prerendered.get(key)
+            if entry is None or (PRERENDERED_PAGES[page][2] and entry['snapshot'] is not current):
+                entry = prerendered[key] = prerenderPage(page, current)
+    return entry
+
+
+def servePrerendered(page):
+    """Serve a pre-rendered page from memory, or let the web server send its file
+
+    With PRERENDER_SENDFILE set to 'x-accel' (nginx) or 'x-sendfile'
+    (Apache, lighttpd) and a PRERENDER_DIR, the response only names the
+    file and the web server sends it.
+    """
+    entry = getPrerenderedPage(page)
+    sendfile = app.config['PRERENDER_SENDFILE']
+    if entry['path'] and sendfile == 'x-accel':
+        response = Response(mimetype='text/html')
+        relative_path = os.path.relpath(entry['path'], app.config['PRERENDER_DIR']).replace(os.sep, '/')
+        response.headers['X-Accel-Redirect'] = app.config['PRERENDER_URL'] + relative_path
+        return response
+    if entry['path'] and sendfile == 'x-sendfile':
+        response = Response(mimetype='text/html')
+        response.headers['X-Sendfile'] = os.path.abspath(entry['path'])
+        return response
+    response = Response(entry['body'], mimetype='text/html')
+    if shouldCompress(response, len(entry['body'])):
+        # Compressed once per version, like the page itself
+        if 'gzip' not in entry:
+            entry['gzip'] = gzipBody(entry['body'])
+        setGzipBody(response, entry['gzip'])
+    return response
+
+
+@app.cli.command('prerender')
+def prerenderCommand():
+    """Write the pre-rendered pages of the current data to PRERENDER_DIR"""
+    for page in PRERENDERED_PAGES:
+        print(getPrerenderedPage(page)['path'] or f'{page}: PRERENDER_DIR is not set')
+
+
+@app.route('/events')
+def events():
+    """Stream of point and place changes (server-sent events)
+
+    Each 'update' event carries a JSON list of changes since the previous
+    one: {"type": "points" | "places", "name": ..., "value": ..., "delta": ...},
+    or [{"type": "resync"}] when the client fell behind and must reload.
+    """
+    response = Response(eventStream(currentDataset().clubs, app.config['EVENTS_KEEPALIVE']),
+                        mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stops nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def openCompetitions():
+    """Competitions that are still bookable (date not passed)"""
+    return [c for c in currentDataset().competitions if not isCompetitionDatePassedCached(c)]
+
+
+@app.route('/reports/limits.json')
+def booking_limits_report_json():
+    """Remaining bookable places for every club against every open competition"""
+    report = calculateBulkBookingLimits(currentDataset().clubs, openCompetitions())
+    return jsonify(report)
+
+
+@app.route('/reports/limits.csv')
+def booking_limits_report_csv():
+    """Same report as booking_limits_report_json, one CSV row per club/competition pair"""
+    report = calculateBulkBookingLimits(currentDataset().clubs, openCompetitions())
+    return Response(exportBookingLimitsCsv(report), mimetype='text/csv',
+                    headers={'Content-Disposition': 'attachment; filename=booking_limits.csv'})
+
+
+@app.route('/metrics')
+def metricsEndpoint():
+    """Prometheus metrics: route latency, purchases, persistence and dataset sizes"""
+    return Response(renderMetrics(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/admin/profiler', methods=['GET', 'POST'])
+def adminProfiler():
+    """Show or change the sampling profiler settings (requires X-Admin-Token)"""
+    if not isAdminRequest():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    if request.method == 'POST':
+        settings = request.get_json(silent=True) or {}
+        try:
+            sample_rate = float(settings['sample_rate']) if 'sample_rate' in settings else None
+        except (TypeError, ValueError):
+            return jsonify({'error': 'sample_rate must be a number.'}), 400
+        if not isinstance(settings.get('enabled', False), bool):
+            return jsonify({'error': 'enabled must be true or false.'}), 400
+        is_valid, error_message = configureProfiler(settings.get('enabled'), sample_rate, bool(settings.get('reset')))
+        if not is_valid:
+            return jsonify({'error': error_message}), 400
+
+    return jsonify({
+        'enabled': profilerState['enabled'],
+        'sample_rate': profilerState['sample_rate'],
+        'directory': profilerState['directory'],
+        'samples': profilerState['samples']
+    })
+
+
+@app.route('/admin/lottery', methods=['GET', 'POST'])
+def adminLottery():
+    """Show the lottery windows or open one (requires X-Admin-Token)
+
+    POST {"competition": name, "minutes": duration, "seed": optional int}
+    """
+    if not isAdminRequest():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    if request.method == 'POST':
+        settings = request.get_json(silent=True) or {}
+        competition = findCompetitionByName(settings.get('competition'))
+        if competition is None:
+            return jsonify({'error': 'Unknown competition.'}), 404
+        minutes = settings.get('minutes')
+        if isinstance(minutes, bool) or not isinstance(minutes, (int, float)) or minutes <= 0:
+            return jsonify({'error': 'minutes must be a positive number.'}), 400
+        seed = settings.get('seed')
+        if seed is not None and (isinstance(seed, bool) or not isinstance(seed, int)):
+            return jsonify({'error': 'seed must be an integer.'}), 400
+        if is_competition_date_passed(competition):
+            return jsonify({'error': 'Booking not allowed: competition date has passed.'}), 400
+        # A closed window waiting for its draw still holds queued requests
+        if competition['name'] in currentDataset().lotteryWindows:
+            return jsonify({'error': 'A lottery is already pending for this competition.'}), 409
+        runMutation(openLotteryWindow, competition['name'], minutes, seed)
+
+    return jsonify({
+        name: {'closes_at': window['closes_at'].isoformat(), 'requests': len(window['requests'])}
+        for name, window in currentDataset().lotteryWindows.items()
+    })
+
+
+@app.route('/admin/places', methods=['POST'])
+def adminAddPlaces():
+    """Add places to a competition and book its waitlist (requires X-Admin-Token)
+
+    POST {"competition": name, "places": number of places to add}
+    """
+    if not isAdminRequest():
+        return jsonify({'error': 'Forbidden'}), 403
+
+    settings = request.get_json(silent=True) or {}
+    competition = findCompetitionByName(settings.get('competition'))
+    if competition is None:
+        return jsonify({'error': 'Unknown competition.'}), 404
+    extra_places = settings.get('places')
+    if isinstance(extra_places, bool) or not isinstance(extra_places, int) or extra_places <= 0:
+        return jsonify({'error': 'places must be a positive integer.'}), 400
+    if is_competition_date_passed(competition):
+        return jsonify({'error': 'Booking not allowed: competition date has passed.'}), 400
+
+    promoted = runMutation(addCompetitionPlaces, competition, extra_places)
+    return jsonify({
+        'competition': competition['name'],
+        'numberOfPlaces': int(competition['numberOfPlaces']),
+        'promoted': [{'club': entry['club'], 'places': entry['places']} for entry in promoted]
+    })
 
 
 @app.route('/logout')
 def logout():
+    session.pop('club', None)
+    session.pop('tenant', None)
     return redirect(url_for('index'))
\ No newline at end of file
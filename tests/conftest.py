@@ -0,0 +1,90 @@
+"""
+Fixtures partagées : données de test en mémoire
+
+Chaque test utilisant memory_storage travaille sur sa propre copie des
+fichiers de tests/fixtures, et chaque test utilisant serve_data sur les
+données qu'il fournit, sans lire ni écrire les fichiers JSON du dossier
+courant ; les tests peuvent donc tourner en parallèle.
+"""
+import contextlib
+import json
+import os
+
+import pytest
+
+import server
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+FIXTURE_FILES = {
+    'clubs.json': 'clubs_test.json',
+    'competitions.json': 'competitions_test.json',
+    'bookings.json': 'bookings_test.json'
+}
+
+
+def fixtureFiles():
+    """Return {data filename: JSON text} from the tests/fixtures files"""
+    files = {}
+    for filename, fixture in FIXTURE_FILES.items():
+        with open(os.path.join(FIXTURES_DIR, fixture)) as f:
+            files[filename] = f.read()
+    return files
+
+
+@pytest.fixture
+def memory_storage():
+    """Serve the fixture data from memory for the duration of a test"""
+    with server.useStorage(server.MemoryStorage(fixtureFiles())) as storage:
+        yield storage
+
+
+@pytest.fixture
+def serve_data():
+    """Serve records given by the test from memory for the duration of a test
+
+    Called as serve_data(clubs, competitions, bookings=(), waitlist=None),
+    returns the MemoryStorage; the served records are then server.clubs,
+    server.competitions and server.bookings.
+    """
+    with contextlib.ExitStack() as stack:
+        def serve(clubs, competitions, bookings=(), waitlist=None):
+            files = {
+                'clubs.json': json.dumps({'clubs': clubs}),
+                'competitions.json': json.dumps({'competitions': competitions}),
+                'bookings.json': json.dumps({'bookings': list(bookings)})
+            }
+            if waitlist is not None:
+                files['waitlist.json'] = json.dumps({'waitlist': waitlist})
+            return stack.enter_context(server.useStorage(server.MemoryStorage(files)))
+        yield serve
+
+
+PURCHASE_CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "50"},
+    {"name": "Club B", "email": "b@club.com", "points": "50"}
+]
+PURCHASE_COMPETITIONS = [{"name": "Future Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "100"}]
+
+
+@pytest.fixture
+def purchase_client(serve_data):
+    """Test client with two clubs of 50 points and an upcoming competition of 100 places"""
+    serve_data(PURCHASE_CLUBS, PURCHASE_COMPETITIONS)
+    with server.app.test_client() as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def fresh_rate_limits():
+    """Start every test with full rate limit buckets"""
+    server.configureRateLimits()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def fresh_idempotency_keys():
+    """Start every test without remembered purchase outcomes"""
+    server.idempotencyResults.clear()
+    yield
@@ -1,42 +1,13 @@
 import pytest
-import json
-import shutil
-import os
 import server
-from server import loadClubs, loadCompetitions, loadBookings
-from datetime import datetime
+from server import loadBookings
 
 @pytest.fixture
-def client():
+def client(memory_storage):
     server.app.config['TESTING'] = True
     with server.app.test_client() as client:
-        # Backup original files
-        shutil.copy('clubs.json', 'clubs_backup.json')
-        shutil.copy('competitions.json', 'competitions_backup.json')
-        if os.path.exists('bookings.json'):
-            shutil.copy('bookings.json', 'bookings_backup.json')
-        
-        # Reset to initial test data
-        shutil.copy('tests/fixtures/clubs_test.json', 'clubs.json')
-        shutil.copy('tests/fixtures/competitions_test.json', 'competitions.json')
-        shutil.copy('tests/fixtures/bookings_test.json', 'bookings.json')
-        
-        # Reload data in memory
-        server.clubs = loadClubs()
-        server.competitions = loadCompetitions()
-        server.bookings = loadBookings()
-        
         yield client
-        
-        # Restore original files after test
-        shutil.copy('clubs_backup.json', 'clubs.json')
-        shutil.copy('competitions_backup.json', 'competitions.json')
-        if os.path.exists('bookings_backup.json'):
-            shutil.copy('bookings_backup.json', 'bookings.json')
-        else:
-            # If no backup exists, remove the test file
-            if os.path.exists('bookings.json'):
-                os.remove('bookings.json')
+
 
 def test_booking_is_recorded(client):
     """Test that bookings are properly recorded in bookings.json"""
@@ -1,40 +1,13 @@
 import pytest
-import json
-import shutil
-import os
-from server import app, loadClubs, loadCompetitions, loadBookings
+from server import app, loadClubs, loadCompetitions
 import server
 
 @pytest.fixture
-def client():
+def client(memory_storage):
     app.config['TESTING'] = True
     with app.test_client() as client:
-        # Backup original files
-        shutil.copy('clubs.json', 'clubs_backup.json')
-        shutil.copy('competitions.json', 'competitions_backup.json')
-        if os.path.exists('bookings.json'):
-            shutil.copy('bookings.json', 'bookings_backup.json')
-        
-        # Reset to initial test data
-        shutil.copy('tests/fixtures/clubs_test.json', 'clubs.json')
-        shutil.copy('tests/fixtures/competitions_test.json', 'competitions.json')
-        shutil.copy('tests/fixtures/bookings_test.json', 'bookings.json')
-        
-        # Reload data in memory
-        server.clubs = loadClubs()
-        server.competitions = loadCompetitions()
-        server.bookings = loadBookings()
-        
         yield client
-        
-        # Restore original files after test
-        shutil.copy('clubs_backup.json', 'clubs.json')
-        shutil.copy('competitions_backup.json', 'competitions.json')
-        if os.path.exists('bookings_backup.json'):
-            shutil.copy('bookings_backup.json', 'bookings.json')
-        else:
-            if os.path.exists('bookings.json'):
-                os.remove('bookings.json')
+
 
 def test_data_persistence_after_booking(client):
     """Test that booking changes are saved to JSON files"""
@@ -85,16 +58,14 @@ def test_file_structure_preserved(client):
     })
     
     # Check clubs.json structure
-    with open('clubs.json', 'r') as f:
-        clubs_data = json.load(f)
+    clubs_data = server.storage.read('clubs.json')
     
     assert 'clubs' in clubs_data
     assert isinstance(clubs_data['clubs'], list)
     assert len(clubs_data['clubs']) > 0
     
     # Check competitions.json structure
-    with open('competitions.json', 'r') as f:
-        competitions_data = json.load(f)
+    competitions_data = server.storage.read('competitions.json')
     
     assert 'competitions' in competitions_data
     assert isinstance(competitions_data['competitions'], list)
@@ -1,44 +1,12 @@
 import pytest
-import json
-import shutil
-import os
 import server
-from server import loadClubs, loadCompetitions, loadBookings
 
 @pytest.fixture
-def client():
+def client(memory_storage):
     server.app.config['TESTING'] = True
     with server.app.test_client() as client:
-        # Backup original files
-        if os.path.exists('clubs.json'):
-            shutil.copy('clubs.json', 'clubs_backup.json')
-        if os.path.exists('competitions.json'):
-            shutil.copy('competitions.json', 'competitions_backup.json')
-        if os.path.exists('bookings.json'):
-            shutil.copy('bookings.json', 'bookings_backup.json')
-        
-        # Reset to initial test data
-        shutil.copy('tests/fixtures/clubs_test.json', 'clubs.json')
-        shutil.copy('tests/fixtures/competitions_test.json', 'competitions.json')
-        shutil.copy('tests/fixtures/bookings_test.json', 'bookings.json')
-        
-        # Reload data in memory
-        server.clubs = loadClubs()
-        server.competitions = loadCompetitions()
-        server.bookings = loadBookings()
-        
         yield client
-        
-        # Restore original files after test
-        if os.path.exists('clubs_backup.json'):
-            shutil.copy('clubs_backup.json', 'clubs.json')
-            os.remove('clubs_backup.json')
-        if os.path.exists('competitions_backup.json'):
-            shutil.copy('competitions_backup.json', 'competitions.json')
-            os.remove('competitions_backup.json')
-        if os.path.exists('bookings_backup.json'):
-            shutil.copy('bookings_backup.json', 'bookings.json')
-            os.remove('bookings_backup.json')
+
 
 def test_negative_places_rejected(client):
     """Test that negative places are rejected"""
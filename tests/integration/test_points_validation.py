@@ -1,30 +1,12 @@
 import pytest
-import json
-import shutil
 import server
-from server import loadClubs, loadCompetitions
 
 @pytest.fixture
-def client():
+def client(memory_storage):
     server.app.config['TESTING'] = True
     with server.app.test_client() as client:
-        # Backup original files
-        shutil.copy('clubs.json', 'clubs_backup.json')
-        shutil.copy('competitions.json', 'competitions_backup.json')
-        
-        # Reset to initial test data
-        shutil.copy('tests/fixtures/clubs_test.json', 'clubs.json')
-        shutil.copy('tests/fixtures/competitions_test.json', 'competitions.json')
-        
-        # Reload data in memory
-        server.clubs = loadClubs()
-        server.competitions = loadCompetitions()
-        
         yield client
-        
-        # Restore original files after test
-        shutil.copy('clubs_backup.json', 'clubs.json')
-        shutil.copy('competitions_backup.json', 'competitions.json')
+
 
 def test_purchasePlaces_insufficient_points(client):
     """Test booking with insufficient points"""
@@ -4,38 +4,14 @@ Public Points Dashboard
 """
 import pytest
 import json
-import shutil
-import os
 import server
 
 
 @pytest.fixture
-def client():
+def client(memory_storage):
     server.app.config['TESTING'] = True
     with server.app.test_client() as client:
-        # Ensure we're using clean test data
-        if os.path.exists('clubs.json'):
-            shutil.copy('clubs.json', 'clubs_backup.json')
-        if os.path.exists('competitions.json'):
-            shutil.copy('competitions.json', 'competitions_backup.json')
-        
-        # Reset to test data
-        shutil.copy('tests/fixtures/clubs_test.json', 'clubs.json')
-        shutil.copy('tests/fixtures/competitions_test.json', 'competitions.json')
-        
-        # Reload data in memory
-        server.clubs = server.loadClubs()
-        server.competitions = server.loadCompetitions()
-        
         yield client
-        
-        # Restore original files
-        if os.path.exists('clubs_backup.json'):
-            shutil.copy('clubs_backup.json', 'clubs.json')
-            os.remove('clubs_backup.json')
-        if os.path.exists('competitions_backup.json'):
-            shutil.copy('competitions_backup.json', 'competitions.json')
-            os.remove('competitions_backup.json')
 
 
 class TestPublicPointsDashboardIntegration:
@@ -161,6 +137,7 @@ class TestPublicPointsDataConsistency:
         # Note: Dans un vrai test, ceci pourrait être fait via l'API de booking
         original_points = server.clubs[0]['points']
         server.clubs[0]['points'] = str(int(original_points) + 5)
+        server.publishSnapshot([server.clubs[0]])
         
         # Deuxième appel pour voir si les changements sont reflétés
         response2 = client.get('/public/points')
@@ -168,6 +145,7 @@ class TestPublicPointsDataConsistency:
         
         # Restaurer les données originales
         server.clubs[0]['points'] = original_points
+        server.publishSnapshot([server.clubs[0]])
         
         # Les deux réponses devraient être différentes
         assert html1 != html2
\ No newline at end of file
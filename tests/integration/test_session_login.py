@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import patch
+import server
+from server import app
+
+
+CLUBS = [
+    {"name": "Simply Lift", "email": "john@simplylift.co", "points": "13"},
+    {"name": "Iron Temple", "email": "admin@irontemple.com", "points": "4"}
+]
+COMPETITIONS = [
+    {"name": "Future Cup", "date": "2099-03-27 10:00:00", "numberOfPlaces": "25"}
+]
+
+
+@pytest.fixture
+def client(serve_data):
+    app.config['TESTING'] = True
+    serve_data(CLUBS, COMPETITIONS)
+    with app.test_client() as client:
+        yield client
+
+
+def login(client, email='john@simplylift.co'):
+    return client.post('/showSummary', data={'email': email})
+
+
+def test_login_stores_club_in_session(client):
+    """Le club est mémorisé en session après connexion"""
+    login(client)
+    with client.session_transaction() as sess:
+        assert sess['club'] == 'Simply Lift'
+
+
+def test_welcome_links_do_not_contain_club(client):
+    """Les liens de réservation n'ont plus besoin du nom du club"""
+    response = login(client)
+    assert '/book/Future%20Cup"' in response.data.decode('utf-8')
+
+
+def test_book_page_uses_session_club(client):
+    """La page de réservation utilise le club de la session"""
+    login(client)
+    response = client.get('/book/Future Cup')
+    assert response.status_code == 200
+    assert 'Your club points: 13' in response.data.decode('utf-8')
+
+
+def test_book_page_requires_login(client):
+    """Sans session, la page de réservation redirige vers l'accueil"""
+    response = client.get('/book/Future Cup')
+    assert response.status_code == 302
+
+
+def test_purchase_uses_session_club_over_form(client):
+    """La réservation est faite pour le club connecté, pas celui du formulaire"""
+    login(client)
+    response = client.post('/purchasePlaces', data={
+        'competition': 'Future Cup', 'club': 'Iron Temple', 'places': '2'
+    })
+    assert 'Great-booking complete' in response.data.decode('utf-8')
+    assert server.clubs[0]['points'] == '11'
+    assert server.clubs[1]['points'] == '4'
+
+
+def test_club_resolved_once_per_request(client):
+    """Le club n'est recherché qu'une fois par requête"""
+    login(client)
+    with patch('server.findClubByName', wraps=server.findClubByName) as find_club:
+        client.post('/purchasePlaces', data={'competition': 'Future Cup', 'places': '1'})
+    assert find_club.call_count == 1
+
+
+def test_logout_clears_session(client):
+    """La déconnexion vide la session"""
+    login(client)
+    client.get('/logout')
+    with client.session_transaction() as sess:
+        assert 'club' not in sess
@@ -0,0 +1,157 @@
+"""
+Tests d'intégration pour les jeux de données par fédération (tenants)
+"""
+import json
+import threading
+import pytest
+from unittest.mock import patch
+import server
+from server import MemoryStorage, parseTenants, tenantFromHost
+
+
+def federationStorage(club_name, points):
+    return MemoryStorage({
+        'clubs.json': json.dumps({'clubs': [
+            {'name': club_name, 'email': 'secretary@club.com', 'points': points}
+        ]}),
+        'competitions.json': json.dumps({'competitions': [
+            {'name': 'Future Cup', 'date': '2099-03-27 10:00:00', 'numberOfPlaces': '25'}
+        ]}),
+        'bookings.json': json.dumps({'bookings': []})
+    })
+
+
+@pytest.fixture
+def client(memory_storage):
+    server.app.config['TESTING'] = True
+    with patch.object(server, 'tenants', {}):
+        server.registerTenant('ffhm', federationStorage('Club Haltéro', '10'))
+        server.registerTenant('fsa', federationStorage('Club Athlé', '3'))
+        yield server.app.test_client()
+
+
+def test_parseTenants():
+    """Les tenants sont lus depuis GUDLFT_TENANTS"""
+    assert parseTenants('ffhm=data/ffhm; fsa=data/fsa') == {'ffhm': 'data/ffhm', 'fsa': 'data/fsa'}
+    assert parseTenants('') == {}
+
+
+def test_tenantFromHost(client):
+    """Le tenant est le premier label de l'hôte"""
+    assert tenantFromHost('ffhm.gudlft.example:5000') == 'ffhm'
+    assert tenantFromHost('localhost') is None
+
+
+def test_path_prefix_selects_tenant(client):
+    """Le préfixe de chemin sélectionne le jeu de données de la fédération"""
+    response = client.get('/ffhm/public/points')
+    page = response.data.decode('utf-8')
+    assert 'Club Haltéro' in page
+    assert 'Club Athlé' not in page
+    assert 'Simply Lift' not in page
+
+
+def test_default_dataset_without_prefix(client):
+    """Sans préfixe, le jeu de données par défaut est servi"""
+    page = client.get('/public/points').data.decode('utf-8')
+    assert 'Simply Lift' in page
+    assert 'Club Haltéro' not in page
+
+
+def test_host_selects_tenant(client):
+    """En mode hôte, le sous-domaine sélectionne la fédération"""
+    with patch.dict(server.app.config, {'TENANT_SELECTOR': 'host'}):
+        page = client.get('/public/points', base_url='http://fsa.gudlft.example').data.decode('utf-8')
+    assert 'Club Athlé' in page
+    assert 'Club Haltéro' not in page
+
+
+def test_booking_only_changes_tenant_data(client):
+    """Une réservation ne modifie que les données de sa fédération"""
+    default_clubs = server.clubs
+    client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+    response = client.post('/ffhm/purchasePlaces', data={'competition': 'Future Cup', 'places': '2'})
+    assert 'Great-booking complete' in response.data.decode('utf-8')
+
+    ffhm = server.tenants['ffhm']
+    assert ffhm['dataset'].clubs[0]['points'] == '8'
+    assert ffhm['storage'].read('clubs.json')['clubs'][0]['points'] == '8'
+    assert server.tenants['fsa']['dataset'] is None
+    assert server.clubs is default_clubs
+
+
+def test_tenants_do_not_wait_for_each_other(client):
+    """Une réservation d'une fédération n'attend pas les écritures des autres jeux de données"""
+    client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+    locked = threading.Event()
+    release = threading.Event()
+
+    def holdDefaultWriteLock():
+        with server.writeLock:
+            locked.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=holdDefaultWriteLock)
+    holder.start()
+    locked.wait(5)
+    try:
+        response = client.post('/ffhm/purchasePlaces', data={'competition': 'Future Cup', 'places': '1'})
+        assert 'Great-booking complete' in response.data.decode('utf-8')
+    finally:
+        release.set()
+        holder.join()
+    assert server.tenants['ffhm']['dataset'].clubs[0]['points'] == '9'
+    assert server.tenants['ffhm']['dataset'].writeLock is not server.writeLock
+
+
+def test_session_is_bound_to_tenant(client):
+    """Un club connecté dans une fédération ne l'est pas dans une autre"""
+    client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+    assert client.get('/ffhm/book/Future Cup').status_code == 200
+    assert client.get('/fsa/book/Future Cup').status_code == 302
+
+
+def test_links_keep_tenant_prefix(client):
+    """Les liens générés gardent le préfixe de la fédération"""
+    response = client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+    assert '/ffhm/book/Future%20Cup' in response.data.decode('utf-8')
+
+
+def test_booking_form_posts_to_tenant(client):
+    """Le formulaire de réservation d'une fédération est envoyé à cette fédération"""
+    client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+    page = client.get('/ffhm/book/Future Cup').data.decode('utf-8')
+    action = page.split('<form action="')[1].split('"')[0]
+    assert action == '/ffhm/purchasePlaces'
+
+    response = client.post(action, data={'club': 'Club Haltéro', 'competition': 'Future Cup', 'places': '3'})
+
+    assert 'Great-booking complete' in response.data.decode('utf-8')
+    assert server.tenants['ffhm']['dataset'].clubs[0]['points'] == '7'
+
+
+def test_other_tenant_session_ignores_form_club(client):
+    """Une session ouverte dans une autre fédération ne retombe pas sur le club du formulaire"""
+    server.registerTenant('ffhm', federationStorage('Simply Lift', '10'))
+    points = server.findClubByName('Simply Lift')['points']
+    client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+
+    response = client.post('/purchasePlaces', data={'club': 'Simply Lift', 'competition': 'Spring Festival', 'places': '3'})
+
+    assert 'Something went wrong' in response.data.decode('utf-8')
+    assert server.findClubByName('Simply Lift')['points'] == points
+
+
+def test_booking_writer_uses_tenant_dataset(client, memory_storage):
+    """L'écrivain unique applique et sauvegarde la réservation dans la fédération de la requête"""
+    writer = server.BookingWriter()
+    writer.start()
+    try:
+        with patch.object(server, 'bookingWriter', writer), \
+             patch.object(memory_storage, 'writeMany', side_effect=AssertionError('default dataset written')):
+            client.post('/ffhm/showSummary', data={'email': 'secretary@club.com'})
+            response = client.post('/ffhm/purchasePlaces', data={'competition': 'Future Cup', 'places': '3'})
+    finally:
+        writer.stop()
+    assert 'Great-booking complete' in response.data.decode('utf-8')
+    assert server.tenants['ffhm']['storage'].read('clubs.json')['clubs'][0]['points'] == '7'
@@ -0,0 +1,109 @@
+"""
+Tests unitaires pour le point d'entrée ASGI (asgi.py)
+"""
+import asyncio
+import json
+from unittest.mock import Mock, patch
+from urllib.parse import urlencode
+import server
+import asgi
+
+
+def call(method, path, form=None, headers=()):
+    """Send one request to the ASGI application; return (status, headers, body)"""
+    body = urlencode(form).encode() if form else b''
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': b'',
+        'headers': [(b'host', b'localhost'), *headers] +
+                   ([(b'content-type', b'application/x-www-form-urlencoded')] if form else [])
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.application(scope, receive, send))
+    start, content = messages
+    return start['status'], dict(start['headers']), content['body']
+
+
+def test_scopeToEnviron():
+    """Le scope ASGI est traduit en environ WSGI"""
+    environ = asgi.scopeToEnviron({
+        'method': 'POST', 'path': '/purchasePlaces', 'query_string': b'a=1',
+        'headers': [(b'content-type', b'text/plain'), (b'x-admin-token', b'secret')]
+    }, b'body')
+    assert environ['PATH_INFO'] == '/purchasePlaces'
+    assert environ['QUERY_STRING'] == 'a=1'
+    assert environ['CONTENT_TYPE'] == 'text/plain'
+    assert environ['HTTP_X_ADMIN_TOKEN'] == 'secret'
+    assert environ['wsgi.input'].read() == b'body'
+
+
+def test_non_ascii_path(memory_storage):
+    """Les noms accentués dans le chemin sont servis comme en WSGI"""
+    competition = server.findCompetitionByName('Spring Festival')
+    competition['name'] = 'Fête Été'
+    competition['date'] = '2099-03-27 10:00:00'
+    assert asgi.scopeToEnviron({'method': 'GET', 'path': '/book/Fête'}, b'')['PATH_INFO'] == '/book/F\xc3\xaate'
+    status, _, body = call('GET', '/book/Fête Été/Simply Lift')
+    assert status == 200
+    assert 'Fête Été'.encode('utf-8') in body
+    assert b'Something went wrong' not in body
+
+
+def test_get_route(memory_storage):
+    """Les routes en lecture sont servies sans écriture"""
+    status, _, body = call('GET', '/public/points')
+    assert status == 200
+    assert b'Simply Lift' in body
+
+
+def test_purchase_is_saved_before_response(memory_storage):
+    """La réservation est écrite par le pool de threads avant l'envoi de la réponse"""
+    server.findCompetitionByName('Spring Festival')['date'] = '2099-03-27 10:00:00'
+    with patch.object(memory_storage, 'write', side_effect=AssertionError('write during the view')):
+        status, headers, _ = call('POST', '/showSummary', {'email': 'john@simplylift.co'})
+        cookie = headers[b'set-cookie'].split(b';')[0]
+        status, _, body = call('POST', '/purchasePlaces', {'competition': 'Spring Festival', 'places': '2'},
+                               headers=[(b'cookie', cookie)])
+    assert status == 200
+    assert b'Great-booking complete' in body
+    club = next(c for c in memory_storage.read('clubs.json')['clubs'] if c['name'] == 'Simply Lift')
+    assert club['points'] == '11'
+    assert memory_storage.read('bookings.json')['bookings'][-1]['places'] == 2
+
+
+def test_concurrent_commits_are_grouped(memory_storage):
+    """Les écritures des requêtes concurrentes sont regroupées"""
+    dataset = server.currentDataset()
+
+    async def commitThree():
+        await asyncio.gather(*(
+            asgi.commitPending({'dataset': dataset, 'files': {filename}})
+            for filename in ('clubs.json', 'competitions.json', 'bookings.json')))
+
+    with patch('server.commitContents') as commit:
+        asyncio.run(commitThree())
+    assert commit.call_count == 2
+    assert sorted(commit.call_args_list[1][0][1]) == ['bookings.json', 'competitions.json']
+    assert json.loads(commit.call_args_list[0][0][1]['clubs.json'])['clubs'] == server.clubs
+
+
+def test_single_writer_is_refused():
+    """Le service ASGI refuse de démarrer avec l'écrivain unique actif"""
+    messages = []
+
+    async def receive():
+        return {'type': 'lifespan.startup'}
+
+    async def send(message):
+        messages.append(message)
+
+    with patch.object(server, 'bookingWriter', Mock(running=True)):
+        asyncio.run(asgi.application({'type': 'lifespan'}, receive, send))
+    assert messages[0]['type'] == 'lifespan.startup.failed'
+    assert 'GUDLFT_SINGLE_WRITER' in messages[0]['message']
@@ -0,0 +1,59 @@
+"""
+Tests unitaires pour la suite de benchmark hors ligne
+"""
+import time
+import pytest
+import server
+from benchmark import loadedDataset, measure, runBenchmarks, SCALES
+from generate_data import generateDataset
+
+
+class TestBenchmarkRun:
+    """Tests d'exécution de la suite"""
+
+    def test_loaded_dataset_isolates_files(self):
+        """Test que les données sont servies et sauvegardées en mémoire"""
+        clubs, competitions, bookings = generateDataset(2, 1, 0)
+        previous_storage = server.currentDataset().storage
+        with loadedDataset(clubs, competitions, bookings) as storage:
+            assert isinstance(storage, server.MemoryStorage)
+            assert server.clubs == clubs
+            server.processBooking(server.clubs[0], server.competitions[0], 1)
+            assert len(storage.read('bookings.json')['bookings']) == 1
+        assert server.currentDataset().storage is previous_storage
+
+    def test_loaded_dataset_ignores_data_dir(self, tmp_path, monkeypatch):
+        """Test qu'un GUDLFT_DATA_DIR absolu n'est pas modifié par le benchmark"""
+        monkeypatch.setattr(server, 'storage', server.JsonFileStorage(str(tmp_path)))
+        clubs, competitions, bookings = generateDataset(2, 1, 0)
+        with loadedDataset(clubs, competitions, bookings):
+            server.processBooking(server.clubs[0], server.competitions[0], 1)
+        assert list(tmp_path.iterdir()) == []
+
+    def test_measure(self):
+        """Test du format des mesures"""
+        timing = measure(lambda: None, repeat=3, number=2)
+
+        assert set(timing) == {'min', 'median', 'mean', 'repeat', 'number'}
+        assert timing['min'] <= timing['median']
+
+    def test_measure_calibrates_rounds(self):
+        """Test que le nombre d'appels par tour est augmenté jusqu'à la durée minimale"""
+        timing = measure(lambda: time.sleep(0.002), repeat=1, number=1, min_round=0.02)
+
+        assert timing['number'] >= 8
+        assert timing['number'] * timing['min'] >= 0.015
+
+    def test_measure_keeps_long_rounds(self):
+        """Test qu'un tour déjà assez long garde le nombre d'appels demandé"""
+        timing = measure(lambda: time.sleep(0.002), repeat=1, number=3, min_round=0.001)
+
+        assert timing['number'] == 3
+
+    def test_run_single_benchmark(self, monkeypatch):
+        """Test d'une exécution réduite de la suite"""
+        monkeypatch.setitem(SCALES, 'tiny', {'clubs': 5, 'competitions': 2, 'bookings': 10})
+
+        results = runBenchmarks(['tiny'], repeat=1, only=['findClubByName', 'processBooking'])
+
+        assert set(results['tiny']) == {'findClubByName', 'processBooking'}
@@ -153,4 +153,54 @@ class TestGetClubBookingsForCompetition:
         assert len(result) == 2
         assert all(booking['club'] == "Club A" and booking['competition'] == "Comp 1" for booking in result)
         total_places = sum(booking['places'] for booking in result)
-        assert total_places == 8
\ No newline at end of file
+        assert total_places == 8
+
+class TestBookingIds:
+    """Tests unitaires pour l'allocation des ids et l'index par id"""
+
+    @patch('server.bookings', [
+        {"id": 1, "club": "Club A", "competition": "Comp 1", "places": 5},
+        {"id": 2, "club": "Club B", "competition": "Comp 1", "places": 3}
+    ])
+    @patch('server.saveBookings')
+    def test_ids_stay_unique_after_removal(self, mock_save):
+        """Test qu'un id n'est jamais réutilisé après suppression d'une réservation"""
+        import server
+        server.getBookingIndex()
+        del server.bookings[1]
+
+        addBooking("Club C", "Comp 2", 1, 1)
+
+        assert server.bookings[-1]['id'] == 3
+
+    @patch('server.bookings', [
+        {"id": 4, "club": "Club A", "competition": "Comp 1", "places": 5},
+        {"id": 9, "club": "Club B", "competition": "Comp 1", "places": 3}
+    ])
+    def test_findBookingById_uses_index(self):
+        """Test recherche d'une réservation par id"""
+        from server import findBookingById
+
+        assert findBookingById(9)['club'] == "Club B"
+        assert findBookingById(5) is None
+
+    @patch('server.bookings', [])
+    @patch('server.saveBookings')
+    def test_added_booking_is_indexed(self, mock_save):
+        """Test qu'une nouvelle réservation est immédiatement retrouvable par id"""
+        import server
+        from server import findBookingById
+
+        addBooking("Club A", "Comp 1", 2, 2)
+
+        assert findBookingById(1) is server.bookings[0]
+
+    @patch('server.bookings', [{"id": 1, "club": "Club A", "competition": "Comp 1", "places": 5}])
+    def test_next_id_is_persisted(self, tmp_path, monkeypatch):
+        """Test que le prochain id est sauvegardé avec les réservations"""
+        monkeypatch.chdir(tmp_path)
+        from server import saveBookings, loadNextBookingId
+
+        saveBookings()
+
+        assert loadNextBookingId() == 2
@@ -0,0 +1,88 @@
+"""
+Tests unitaires pour l'écrivain unique des réservations (BookingWriter)
+"""
+import threading
+import pytest
+from unittest.mock import patch
+import server
+from server import BookingWriter, writerPurchase
+
+
+CLUBS = [{"name": f"Club {i}", "email": f"{i}@club.com", "points": "20"} for i in range(10)]
+COMPETITIONS = [{"name": "Future Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "25"}]
+
+
+@pytest.fixture
+def data(serve_data):
+    storage = serve_data(CLUBS, COMPETITIONS)
+    with patch.object(storage, 'writeMany', wraps=storage.writeMany) as write_many:
+        yield server.clubs, server.competitions[0], write_many
+
+
+@pytest.fixture
+def writer():
+    writer = BookingWriter()
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def test_writerPurchase_outcomes(data):
+    """La commande d'achat valide puis applique la réservation en mémoire"""
+    clubs, competition, write_many = data
+    assert writerPurchase('Club 0', 'Future Cup', 3) == (('booked', None), True)
+    assert competition['numberOfPlaces'] == '22'
+    assert clubs[0]['points'] == '17'
+    outcome, changed = writerPurchase('Club 0', 'Future Cup', 10)
+    assert outcome[0] == 'invalid'
+    assert not changed
+    write_many.assert_not_called()
+
+
+def test_concurrent_purchases_do_not_oversell(data, writer):
+    """Les achats concurrents sont appliqués un par un, sans survente"""
+    clubs, competition, write_many = data
+    results = []
+
+    def purchase(club_name):
+        results.append(writer.submit(writerPurchase, club_name, 'Future Cup', 3)[0])
+
+    threads = [threading.Thread(target=purchase, args=(club['name'],)) for club in clubs]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count('booked') == 8
+    assert results.count('invalid') == 2
+    assert competition['numberOfPlaces'] == '1'
+    assert len(server.bookings) == 8
+    assert 1 <= write_many.call_count <= 8
+
+
+def test_command_error_is_returned_to_caller(data, writer):
+    """Une erreur dans une commande est levée chez l'appelant sans arrêter l'écrivain"""
+    def failing():
+        raise ValueError('boom')
+
+    with pytest.raises(ValueError):
+        writer.submit(failing)
+    assert writer.submit(writerPurchase, 'Club 1', 'Future Cup', 1)[0] == 'booked'
+
+
+def test_save_error_fails_the_batch(data, writer):
+    """Si la sauvegarde échoue, les réservations du lot ne sont pas confirmées"""
+    _, _, write_many = data
+    write_many.side_effect = OSError('disk full')
+    with pytest.raises(OSError):
+        writer.submit(writerPurchase, 'Club 2', 'Future Cup', 1)
+
+
+def test_route_uses_writer(data, writer):
+    """La route purchasePlaces passe par l'écrivain quand il tourne"""
+    with patch.object(server, 'bookingWriter', writer), server.app.test_client() as client:
+        response = client.post('/purchasePlaces', data={
+            'competition': 'Future Cup', 'club': 'Club 3', 'places': '2'})
+    assert 'Great-booking complete' in response.data.decode('utf-8')
+    assert data[0][3]['points'] == '18'
+    data[2].assert_called_once()
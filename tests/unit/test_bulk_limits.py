@@ -0,0 +1,98 @@
+"""
+Tests unitaires pour le calcul groupé des limites de réservation
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import calculateBulkBookingLimits, calculateBookingLimits, exportBookingLimitsCsv
+
+
+MOCK_CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "20"},
+    {"name": "Club B", "email": "b@club.com", "points": "3"}
+]
+
+MOCK_COMPETITIONS = [
+    {"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "25"},
+    {"name": "Comp 2", "date": "2099-01-01 10:00:00", "numberOfPlaces": "2"}
+]
+
+MOCK_BOOKINGS = [
+    {"club": "Club A", "competition": "Comp 1", "places": 5},
+    {"club": "Club A", "competition": "Comp 1", "places": 2},
+    {"club": "Club B", "competition": "Comp 2", "places": 1}
+]
+
+
+class TestCalculateBulkBookingLimits:
+    """Tests pour calculateBulkBookingLimits()"""
+
+    @patch('server.bookings', MOCK_BOOKINGS)
+    @patch('server.competitions', MOCK_COMPETITIONS)
+    @patch('server.clubs', MOCK_CLUBS)
+    def test_matrix_matches_single_calculation(self):
+        """Test que chaque cellule correspond à calculateBookingLimits()"""
+        report = calculateBulkBookingLimits()
+
+        assert report['clubs'] == ["Club A", "Club B"]
+        assert report['competitions'] == ["Comp 1", "Comp 2"]
+        for i, club in enumerate(MOCK_CLUBS):
+            for j, competition in enumerate(MOCK_COMPETITIONS):
+                expected = calculateBookingLimits(club, competition)['max_remaining']
+                assert report['max_remaining'][i][j] == expected
+
+    @patch('server.bookings', MOCK_BOOKINGS)
+    @patch('server.competitions', MOCK_COMPETITIONS)
+    @patch('server.clubs', MOCK_CLUBS)
+    def test_matrix_values(self):
+        """Test des valeurs : limite 12, points et places disponibles"""
+        report = calculateBulkBookingLimits()
+
+        assert report['max_remaining'] == [[5, 2], [3, 2]]
+
+    @patch('server.bookings', [])
+    def test_empty_inputs(self):
+        """Test avec aucune donnée"""
+        report = calculateBulkBookingLimits([], [])
+
+        assert report == {'clubs': [], 'competitions': [], 'max_remaining': []}
+
+
+class TestBookingLimitsExport:
+    """Tests pour les exports CSV/JSON du rapport"""
+
+    @patch('server.bookings', MOCK_BOOKINGS)
+    @patch('server.competitions', MOCK_COMPETITIONS)
+    @patch('server.clubs', MOCK_CLUBS)
+    def test_export_csv(self):
+        """Test de l'export CSV, une ligne par paire club/compétition"""
+        lines = exportBookingLimitsCsv(calculateBulkBookingLimits()).splitlines()
+
+        assert lines[0] == 'club,competition,max_remaining'
+        assert lines[1] == 'Club A,Comp 1,5'
+        assert len(lines) == 5
+
+    @patch('server.bookings', MOCK_BOOKINGS)
+    @patch('server.competitions', MOCK_COMPETITIONS + [
+        {"name": "Old Comp", "date": "2020-01-01 10:00:00", "numberOfPlaces": "25"}
+    ])
+    @patch('server.clubs', MOCK_CLUBS)
+    def test_json_route_only_open_competitions(self):
+        """Test que la route JSON ignore les compétitions passées"""
+        with server.app.test_client() as client:
+            response = client.get('/reports/limits.json')
+
+        assert response.status_code == 200
+        assert response.get_json()['competitions'] == ["Comp 1", "Comp 2"]
+
+    @patch('server.bookings', MOCK_BOOKINGS)
+    @patch('server.competitions', MOCK_COMPETITIONS)
+    @patch('server.clubs', MOCK_CLUBS)
+    def test_csv_route(self):
+        """Test de la route CSV"""
+        with server.app.test_client() as client:
+            response = client.get('/reports/limits.csv')
+
+        assert response.status_code == 200
+        assert response.mimetype == 'text/csv'
+        assert b'Club B,Comp 2,2' in response.data
@@ -0,0 +1,166 @@
+"""
+Tests unitaires pour l'annulation des réservations
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import cancelBooking, findBookingById, calculateBookingLimits
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "10"},
+    {"name": "Club B", "email": "b@club.com", "points": "10"}
+]
+COMPETITIONS = [
+    {"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "5"},
+    {"name": "Old Comp", "date": "2020-01-01 10:00:00", "numberOfPlaces": "5"}
+]
+BOOKINGS = [
+    {"id": 1, "club": "Club A", "competition": "Comp 1", "places": 4, "points_used": 4,
+     "date": "2025-01-01T10:00:00", "status": "confirmed"},
+    {"id": 2, "club": "Club A", "competition": "Old Comp", "places": 2, "points_used": 2,
+     "date": "2019-01-01T10:00:00", "status": "confirmed"}
+]
+
+
+@pytest.fixture
+def data(serve_data):
+    storage = serve_data(CLUBS, COMPETITIONS, BOOKINGS)
+    yield server.clubs, server.competitions, server.bookings, storage
+
+
+def saved_status(storage, booking_id):
+    return next(b['status'] for b in storage.read('bookings.json')['bookings'] if b['id'] == booking_id)
+
+
+class TestFindBookingById:
+    """Tests pour findBookingById()"""
+
+    def test_find_existing(self, data):
+        """Test recherche d'une réservation existante"""
+        assert findBookingById(2)['competition'] == "Old Comp"
+
+    def test_find_missing(self, data):
+        """Test recherche d'une réservation inexistante"""
+        assert findBookingById(99) is None
+
+    def test_find_when_ids_are_not_positions(self, data):
+        """Test recherche quand les ids ne correspondent pas aux positions"""
+        _, _, bookings, _ = data
+        del bookings[0]
+
+        assert findBookingById(2)['id'] == 2
+        assert findBookingById(1) is None
+
+
+class TestCancelBooking:
+    """Tests pour cancelBooking()"""
+
+    def test_cancel_reverses_booking(self, data):
+        """Test que l'annulation rembourse les points et libère les places"""
+        clubs, competitions, bookings, storage = data
+
+        assert cancelBooking(1, "Club A") == (True, None)
+
+        assert bookings[0]['status'] == 'cancelled'
+        assert clubs[0]['points'] == "14"
+        assert competitions[0]['numberOfPlaces'] == "9"
+        assert saved_status(storage, 1) == 'cancelled'
+
+    def test_cancelled_booking_no_longer_counts_in_limits(self, data):
+        """Test que les places annulées ne comptent plus dans la limite de 12"""
+        clubs, competitions, _, _ = data
+        cancelBooking(1, "Club A")
+
+        assert calculateBookingLimits(clubs[0], competitions[0])['places_already_booked'] == 0
+
+    def test_cannot_cancel_twice(self, data):
+        """Test qu'une réservation ne peut être annulée deux fois"""
+        cancelBooking(1, "Club A")
+
+        assert cancelBooking(1, "Club A") == (False, 'This booking is already cancelled.')
+
+    def test_cannot_cancel_other_club_booking(self, data):
+        """Test qu'un club ne peut pas annuler la réservation d'un autre"""
+        _, _, _, storage = data
+
+        assert cancelBooking(1, "Club B") == (False, 'Booking not found.')
+        assert saved_status(storage, 1) == 'confirmed'
+
+    def test_cannot_cancel_past_competition(self, data):
+        """Test qu'une compétition passée ne peut pas être annulée"""
+        is_cancelled, error = cancelBooking(2, "Club A")
+
+        assert is_cancelled is False
+        assert error == 'Cancellation not allowed: competition date has passed.'
+
+    def test_freed_places_promote_waitlist(self, data):
+        """Test que les places libérées profitent à la liste d'attente"""
+        clubs, competitions, bookings, _ = data
+        server.waitlist["Comp 1"] = [{"club": "Club B", "places": 6, "date": "2025-01-01T11:00:00"}]
+
+        cancelBooking(1, "Club A")
+
+        assert "Comp 1" not in server.waitlist
+        assert clubs[1]['points'] == "4"
+        assert competitions[0]['numberOfPlaces'] == "3"
+        assert bookings[-1]['club'] == "Club B"
+
+
+class TestCancelBookingRoute:
+    """Tests pour la route /cancelBooking"""
+
+    def test_cancel_route(self, data):
+        """Test de l'annulation via le formulaire"""
+        with server.app.test_client() as client:
+            client.post('/showSummary', data={'email': 'a@club.com'})
+            response = client.post('/cancelBooking', data={'booking_id': '1'})
+
+        assert b'Booking cancelled.' in response.data
+
+    def test_requires_login(self, data):
+        """Test qu'un club nommé dans le formulaire sans connexion ne peut rien annuler"""
+        _, _, _, storage = data
+        with server.app.test_client() as client:
+            response = client.post('/cancelBooking', data={'club': 'Club A', 'booking_id': '1'})
+
+        assert response.status_code == 302
+        assert saved_status(storage, 1) == 'confirmed'
+
+    def test_form_club_is_ignored(self, data):
+        """Test que le club connecté est utilisé, pas celui du formulaire"""
+        _, _, _, storage = data
+        with server.app.test_client() as client:
+            client.post('/showSummary', data={'email': 'b@club.com'})
+            response = client.post('/cancelBooking', data={'club': 'Club A', 'booking_id': '1'})
+
+        assert b'Booking not found.' in response.data
+        assert saved_status(storage, 1) == 'confirmed'
+
+    @pytest.mark.parametrize('booking_id', ['abc', ''])
+    def test_invalid_booking_id(self, data, booking_id):
+        """Test qu'un identifiant non numérique donne une erreur 400"""
+        with server.app.test_client() as client:
+            client.post('/showSummary', data={'email': 'a@club.com'})
+            response = client.post('/cancelBooking', data={'booking_id': booking_id})
+
+        assert response.status_code == 400
+
+
+def test_cancel_saves_waitlist_in_the_same_commit(serve_data):
+    """L'annulation et les promotions de la liste d'attente sont écrites en un seul commit"""
+    storage = serve_data(
+        [{"name": "Club A", "email": "a@club.com", "points": "6"},
+         {"name": "Club B", "email": "b@club.com", "points": "10"}],
+        [{"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "0"}],
+        [{"id": 1, "club": "Club A", "competition": "Comp 1", "places": 4, "points_used": 4,
+          "date": "2025-01-01T10:00:00", "status": "confirmed"}],
+        waitlist={"Comp 1": [{"club": "Club B", "places": 3, "date": "2025-01-01T11:00:00"}]})
+    with patch.object(storage, 'write', side_effect=AssertionError('separate write')), \
+         patch.object(storage, 'writeMany', wraps=storage.writeMany) as write_many:
+        assert cancelBooking(1, "Club A") == (True, None)
+
+    write_many.assert_called_once()
+    assert sorted(write_many.call_args[0][0]) == ['bookings.json', 'clubs.json', 'competitions.json', 'waitlist.json']
+    assert storage.read('waitlist.json')['waitlist'] == {}
+    assert storage.read('competitions.json')['competitions'][0]['numberOfPlaces'] == '1'
@@ -0,0 +1,103 @@
+"""
+Tests unitaires pour le contrôle de non-régression des benchmarks
+"""
+import json
+import pytest
+from compare_benchmarks import compareResults, formatRows, main
+
+
+def timing(median_ms):
+    return {'median': median_ms / 1000}
+
+
+BASELINE = {
+    'commit': 'abc123',
+    'default_tolerance': 0.25,
+    'min_delta_ms': {'noisy': 0.5},
+    'tolerances': {'processBooking': 0.5},
+    'max_ms': {'route.public_points': 2000},
+    'results': {'1k': {
+        'findClubByName': timing(1.0),
+        'processBooking': timing(10.0),
+        'route.public_points': timing(1500.0),
+        'removed': timing(1.0)
+    }}
+}
+
+
+def statuses(rows):
+    return {row[1]: row[5] for row in rows}
+
+
+class TestCompareResults:
+    """Tests pour compareResults()"""
+
+    def test_within_tolerance(self):
+        """Test qu'un écart dans la tolérance est accepté"""
+        current = {'1k': {'findClubByName': timing(1.2), 'processBooking': timing(14.0),
+                          'route.public_points': timing(1600.0), 'removed': timing(1.0)}}
+
+        assert set(statuses(compareResults(BASELINE, current)).values()) == {'ok'}
+
+    def test_regression_and_per_benchmark_tolerance(self):
+        """Test de la détection des régressions avec tolérance par benchmark"""
+        current = {'1k': {'findClubByName': timing(1.3), 'processBooking': timing(16.0),
+                          'route.public_points': timing(1500.0), 'removed': timing(1.0)}}
+
+        result = statuses(compareResults(BASELINE, current))
+        assert result['findClubByName'] == 'REGRESSION'
+        assert result['processBooking'] == 'REGRESSION'
+
+    def test_differences_within_baseline_spread_are_noise(self):
+        """Test qu'un écart inférieur à la dispersion de la référence est ignoré"""
+        baseline = dict(BASELINE, results={'1k': {'fast': {'median': 0.01 / 1000, 'min': 0.005 / 1000}}})
+
+        assert statuses(compareResults(baseline, {'1k': {'fast': timing(0.014)}}))['fast'] == 'ok'
+        assert statuses(compareResults(baseline, {'1k': {'fast': timing(0.03)}}))['fast'] == 'REGRESSION'
+
+    def test_microsecond_benchmarks_are_compared(self):
+        """Test qu'un benchmark de quelques microsecondes trois fois plus lent est signalé"""
+        baseline = dict(BASELINE, results={'1k': {'lookup': {'median': 0.004 / 1000, 'min': 0.0039 / 1000}}})
+
+        assert statuses(compareResults(baseline, {'1k': {'lookup': timing(0.012)}}))['lookup'] == 'REGRESSION'
+
+    def test_per_benchmark_min_delta(self):
+        """Test du seuil de bruit propre à un benchmark"""
+        baseline = dict(BASELINE, results={'1k': {'noisy': timing(1.0)}})
+
+        assert statuses(compareResults(baseline, {'1k': {'noisy': timing(1.4)}}))['noisy'] == 'ok'
+
+    def test_absolute_limit(self):
+        """Test du plafond absolu (objectif < 2 secondes du dashboard public)"""
+        current = {'1k': {'route.public_points': timing(2100.0)}}
+
+        assert statuses(compareResults(BASELINE, current))['route.public_points'] == 'OVER LIMIT'
+
+    def test_missing_and_new(self):
+        """Test des benchmarks absents ou nouveaux"""
+        current = {'1k': {'findClubByName': timing(1.0), 'brandNew': timing(1.0)}}
+
+        result = statuses(compareResults(BASELINE, current))
+        assert result['removed'] == 'missing'
+        assert result['brandNew'] == 'new'
+
+
+class TestMain:
+    """Tests pour le point d'entrée"""
+
+    def test_exit_code_on_regression(self, tmp_path, capsys):
+        """Test que le code de sortie vaut 1 en cas de régression"""
+        baseline_path = tmp_path / 'baseline.json'
+        results_path = tmp_path / 'results.json'
+        baseline_path.write_text(json.dumps(BASELINE))
+        results_path.write_text(json.dumps({'results': {'1k': {'findClubByName': timing(5.0)}}}))
+
+        assert main(['--baseline', str(baseline_path), '--results', str(results_path)]) == 1
+        assert 'REGRESSION' in capsys.readouterr().out
+
+    def test_format_rows(self):
+        """Test du format du tableau"""
+        text = formatRows([('1k', 'findClubByName', 1.0, 1.5, 0.5, 'REGRESSION')])
+
+        assert '+50.0%' in text
+        assert 'REGRESSION' in text
@@ -0,0 +1,60 @@
+"""
+Tests unitaires pour la compression gzip des réponses
+"""
+import gzip
+import pytest
+from unittest.mock import patch
+import server
+from server import app
+
+
+@pytest.fixture
+def data(serve_data):
+    clubs = [{"name": f"Club {i}", "email": f"{i}@club.com", "points": str(i)} for i in range(200)]
+    competitions = [{"name": f"Comp {i}", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"} for i in range(50)]
+    with patch.object(server, 'prerendered', {}), \
+         patch.dict(app.config, {'COMPRESSION': True, 'COMPRESSION_MIN_SIZE': 1024, 'PRERENDER_DIR': None}):
+        serve_data(clubs, competitions)
+        yield server.clubs
+
+
+def test_large_page_is_compressed(data):
+    """Une page au-dessus du seuil est compressée si le client accepte gzip"""
+    with app.test_client() as client:
+        response = client.post('/showSummary', data={'email': '1@club.com'},
+                               headers={'Accept-Encoding': 'gzip, deflate'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert b'Comp 49' in gzip.decompress(response.data)
+
+
+def test_not_compressed_without_accept_encoding(data):
+    """Sans Accept-Encoding, la réponse n'est pas compressée"""
+    with app.test_client() as client:
+        response = client.get('/public/points')
+    assert 'Content-Encoding' not in response.headers
+    assert b'Club 199' in response.data
+
+
+def test_small_page_is_not_compressed(data):
+    """Une page sous le seuil n'est pas compressée"""
+    with patch.dict(app.config, {'COMPRESSION_MIN_SIZE': 10 ** 6}), app.test_client() as client:
+        response = client.get('/public/points', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_compression_can_be_disabled(data):
+    """La compression peut être désactivée"""
+    with patch.dict(app.config, {'COMPRESSION': False}), app.test_client() as client:
+        response = client.get('/public/points', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_prerendered_page_compressed_once_per_version(data):
+    """Le corps compressé d'une page pré-rendue est réutilisé tant que les données ne changent pas"""
+    with app.test_client() as client, patch('server.gzipBody', wraps=server.gzipBody) as compress:
+        first = client.get('/public/points', headers={'Accept-Encoding': 'gzip'})
+        second = client.get('/public/points', headers={'Accept-Encoding': 'gzip'})
+    assert compress.call_count == 1
+    assert first.data == second.data
+    assert b'Club 199' in gzip.decompress(first.data)
@@ -85,4 +85,22 @@ class TestSaveBookings:
         
         assert 'bookings' in parsed_data
         assert len(parsed_data['bookings']) == 1
-        assert parsed_data['bookings'][0]['club'] == "Test Club"
\ No newline at end of file
+        assert parsed_data['bookings'][0]['club'] == "Test Club"
+
+class TestSaveAll:
+    """Tests unitaires pour saveAll()"""
+
+    def test_saveAll_writes_all_files(self, tmp_path, monkeypatch):
+        """Test que les trois fichiers sont écrits et qu'aucun fichier temporaire ne reste"""
+        monkeypatch.chdir(tmp_path)
+        from server import saveAll
+
+        with patch('server.clubs', [{"name": "Club", "points": "1"}]), \
+             patch('server.competitions', [{"name": "Comp", "numberOfPlaces": "2"}]), \
+             patch('server.bookings', []):
+            saveAll()
+
+        assert json.loads((tmp_path / 'clubs.json').read_text())['clubs'][0]['name'] == "Club"
+        assert json.loads((tmp_path / 'competitions.json').read_text())['competitions'][0]['name'] == "Comp"
+        assert json.loads((tmp_path / 'bookings.json').read_text())['bookings'] == []
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['bookings.json', 'clubs.json', 'competitions.json']
@@ -0,0 +1,121 @@
+"""
+Tests unitaires pour le flux d'évènements des points et places (/events)
+"""
+import json
+import pytest
+from unittest.mock import patch
+import server
+from server import EventHub, app
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "10"},
+    {"name": "Club B", "email": "b@club.com", "points": "5"}
+]
+COMPETITIONS = [{"name": "Future Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}]
+
+
+@pytest.fixture
+def data(serve_data):
+    # Long interval: batches are flushed by the tests themselves
+    hub = EventHub(interval=60)
+    with patch.object(server, 'eventHub', hub):
+        serve_data(CLUBS, COMPETITIONS)
+        yield server.clubs, server.competitions[0], hub
+
+
+def test_changes_are_merged_in_one_batch(data):
+    """Plusieurs réservations sont regroupées en un seul lot par club et compétition"""
+    clubs, competition, hub = data
+    batches = []
+    token = hub.subscribe(clubs, batches.append)
+    server.processBooking(clubs[0], competition, 2)
+    server.processBooking(clubs[0], competition, 3)
+    server.processBooking(clubs[1], competition, 1)
+    hub.flush()
+    hub.unsubscribe(token)
+
+    assert len(batches) == 1
+    events = {(event['type'], event['name']): event for event in batches[0]}
+    assert events[('points', 'Club A')] == {'type': 'points', 'name': 'Club A', 'value': 5, 'delta': -5}
+    assert events[('points', 'Club B')]['delta'] == -1
+    assert events[('places', 'Future Cup')] == {'type': 'places', 'name': 'Future Cup', 'value': 14, 'delta': -6}
+
+
+def test_first_change_after_load_is_published(memory_storage):
+    """La première réservation après un chargement des données est envoyée aux abonnés"""
+    hub = EventHub(interval=60)
+    batches = []
+    with patch.object(server, 'eventHub', hub):
+        token = hub.subscribe(server.clubs, batches.append)
+        club = server.findClubByName('Simply Lift')
+        server.processBooking(club, server.findCompetitionByName('Spring Festival'), 2)
+        hub.flush()
+        hub.unsubscribe(token)
+    events = {(event['type'], event['name']): event for event in batches[0]}
+    assert events[('points', 'Simply Lift')] == {'type': 'points', 'name': 'Simply Lift',
+                                                 'value': int(club['points']), 'delta': -2}
+
+
+def test_change_without_previous_version(data):
+    """Sans version publiée auparavant, la nouvelle valeur est tout de même envoyée"""
+    clubs, competition, hub = data
+    batches = []
+    token = hub.subscribe(clubs, batches.append)
+    with patch.object(server, 'snapshot', None):
+        server.processBooking(clubs[0], competition, 2)
+    hub.flush()
+    hub.unsubscribe(token)
+    events = {(event['type'], event['name']): event for event in batches[0]}
+    assert events[('points', 'Club A')]['value'] == 8
+    assert events[('places', 'Future Cup')]['value'] == 18
+
+
+def test_no_work_without_subscribers(data):
+    """Sans abonné, aucun changement n'est gardé"""
+    clubs, competition, hub = data
+    server.processBooking(clubs[0], competition, 2)
+    assert hub.pending == {}
+
+
+def test_subscribers_only_get_their_dataset(data):
+    """Un abonné ne reçoit que les changements de son jeu de données"""
+    clubs, competition, hub = data
+    batches = []
+    token = hub.subscribe([], batches.append)
+    server.processBooking(clubs[0], competition, 2)
+    hub.flush()
+    hub.unsubscribe(token)
+    assert batches == []
+
+
+def test_events_route_streams_updates(data):
+    """La route /events envoie les changements au format server-sent events"""
+    clubs, competition, hub = data
+    with app.test_client() as client:
+        response = client.get('/events', buffered=False)
+        assert response.mimetype == 'text/event-stream'
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b'retry:')
+
+        server.processBooking(clubs[0], competition, 4)
+        hub.flush()
+        message = next(chunks).decode('utf-8')
+        response.close()
+
+    assert message.startswith('event: update\ndata: ')
+    changes = json.loads(message.split('data: ', 1)[1])
+    assert {'type': 'places', 'name': 'Future Cup', 'value': 16, 'delta': -4} in changes
+    assert hub.subscribers == {}
+
+
+def test_slow_client_is_asked_to_resync(data):
+    """Un client trop lent reçoit une demande de rechargement"""
+    clubs, _, hub = data
+    stream = server.eventStream(clubs, keepalive=60)
+    next(stream)
+    (_, deliver), = hub.subscribers.values()
+    for i in range(101):
+        deliver([{'type': 'points', 'name': 'Club A', 'value': i, 'delta': 1}])
+    assert json.loads(next(stream).split('data: ', 1)[1]) == [{'type': 'resync'}]
+    stream.close()
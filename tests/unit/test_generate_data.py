@@ -0,0 +1,70 @@
+"""
+Tests unitaires pour le générateur de données synthétiques
+"""
+import json
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+import pytest
+from generate_data import generateDataset, writeDataset
+
+
+class TestGenerateDataset:
+    """Tests pour generateDataset()"""
+
+    def test_sizes(self):
+        """Test que le jeu de données a la taille demandée"""
+        clubs, competitions, bookings = generateDataset(50, 10, 300)
+
+        assert (len(clubs), len(competitions), len(bookings)) == (50, 10, 300)
+
+    def test_same_seed_same_data(self):
+        """Test que la génération est déterministe"""
+        assert generateDataset(20, 5, 100, seed=4) == generateDataset(20, 5, 100, seed=4)
+        assert generateDataset(20, 5, 100, seed=4) != generateDataset(20, 5, 100, seed=5)
+
+    def test_dates_around_now(self):
+        """Test que les dates des compétitions sont réparties autour de la date de référence"""
+        now = datetime(2030, 6, 1)
+        _, competitions, _ = generateDataset(3, 50, 0, now=now)
+        dates = [datetime.strptime(c['date'], '%Y-%m-%d %H:%M:%S') for c in competitions]
+
+        assert min(dates) < now < max(dates)
+        assert all(abs(d - now) <= timedelta(days=366) for d in dates)
+
+    def test_default_now_is_today(self):
+        """Test que la date de référence par défaut est aujourd'hui"""
+        today = datetime.combine(date.today(), datetime.min.time())
+
+        assert generateDataset(3, 5, 10) == generateDataset(3, 5, 10, now=today)
+
+    def test_12_places_cap_respected(self):
+        """Test que la limite de 12 places par club et compétition est respectée"""
+        _, _, bookings = generateDataset(5, 2, 100)
+        booked = defaultdict(int)
+        for booking in bookings:
+            if booking['status'] == 'confirmed':
+                booked[(booking['club'], booking['competition'])] += booking['places']
+
+        assert max(booked.values()) <= 12
+
+    def test_same_format_as_json_files(self):
+        """Test que les données ont le format des fichiers JSON du projet"""
+        clubs, competitions, bookings = generateDataset(3, 2, 5)
+
+        assert set(clubs[0]) == {'name', 'email', 'points'}
+        assert isinstance(clubs[0]['points'], str)
+        assert set(competitions[0]) == {'name', 'date', 'numberOfPlaces'}
+        assert isinstance(competitions[0]['numberOfPlaces'], str)
+        assert [b['id'] for b in bookings] == [1, 2, 3, 4, 5]
+
+
+class TestWriteDataset:
+    """Tests pour writeDataset()"""
+
+    def test_files_written(self, tmp_path):
+        """Test que les trois fichiers sont écrits et rechargeables"""
+        writeDataset(str(tmp_path), *generateDataset(3, 2, 5))
+
+        assert len(json.loads((tmp_path / 'clubs.json').read_text())['clubs']) == 3
+        assert len(json.loads((tmp_path / 'competitions.json').read_text())['competitions']) == 2
+        assert json.loads((tmp_path / 'bookings.json').read_text())['next_id'] == 6
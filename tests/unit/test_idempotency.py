@@ -0,0 +1,136 @@
+"""
+Tests unitaires pour les clés d'idempotence de purchasePlaces
+"""
+import threading
+import pytest
+from unittest.mock import patch
+import server
+from server import app
+
+
+def purchase(client, club='Club A', places='2', **kwargs):
+    return client.post('/purchasePlaces', data=dict(
+        {'competition': 'Future Cup', 'club': club, 'places': places}, **kwargs))
+
+
+def test_form_token_in_booking_page(purchase_client):
+    """La page de réservation contient un jeton différent à chaque affichage"""
+    purchase_client.post('/showSummary', data={'email': 'a@club.com'})
+    first = purchase_client.get('/book/Future Cup/Club A').data.decode()
+    second = purchase_client.get('/book/Future Cup/Club A').data.decode()
+    assert 'name="idempotency_key"' in first
+    token = first.split('name="idempotency_key" value="')[1].split('"')[0]
+    assert token and token not in second
+
+
+def test_repeated_form_submission_books_once(purchase_client):
+    """Un double clic ne réserve qu'une fois et renvoie la même page"""
+    with patch('server.processBooking', wraps=server.processBooking) as process:
+        first = purchase(purchase_client, idempotency_key='abc')
+        second = purchase(purchase_client, idempotency_key='abc')
+    assert process.call_count == 1
+    assert second.status_code == first.status_code == 200
+    assert second.data == first.data
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert server.competitions[0]['numberOfPlaces'] == '98'
+    assert server.clubs[0]['points'] == '48'
+
+
+def test_header_key(purchase_client):
+    """Les clients d'API envoient la clé dans l'en-tête Idempotency-Key"""
+    headers = {'Idempotency-Key': 'api-1'}
+    data = {'competition': 'Future Cup', 'club': 'Club A', 'places': '1'}
+    purchase_client.post('/purchasePlaces', data=data, headers=headers)
+    response = purchase_client.post('/purchasePlaces', data=data, headers=headers)
+    assert 'Idempotent-Replayed' in response.headers
+    assert server.competitions[0]['numberOfPlaces'] == '99'
+
+
+def test_rejection_is_replayed(purchase_client):
+    """Un refus est lui aussi renvoyé tel quel"""
+    first = purchase(purchase_client, places='13', idempotency_key='too-many')
+    second = purchase(purchase_client, places='13', idempotency_key='too-many')
+    assert second.data == first.data
+    assert server.competitions[0]['numberOfPlaces'] == '100'
+
+
+def test_key_reused_with_other_request_is_refused(purchase_client):
+    """Une clé réutilisée pour une autre demande est refusée au lieu de rejouer le premier résultat"""
+    first = purchase(purchase_client, places='13', idempotency_key='back')
+    second = purchase(purchase_client, places='2', idempotency_key='back')
+    assert b'Impossible to reserve more than 12 places' in first.data
+    assert second.status_code == 422
+    assert 'Idempotent-Replayed' not in second.headers
+    assert server.competitions[0]['numberOfPlaces'] == '100'
+
+
+def test_keys_are_scoped_by_club(purchase_client):
+    """La même clé envoyée par deux clubs donne deux réservations"""
+    purchase(purchase_client, 'Club A', idempotency_key='same')
+    response = purchase(purchase_client, 'Club B', idempotency_key='same')
+    assert 'Idempotent-Replayed' not in response.headers
+    assert server.competitions[0]['numberOfPlaces'] == '96'
+
+
+def test_without_key_every_submission_books(purchase_client):
+    """Sans clé, chaque envoi est traité"""
+    purchase(purchase_client)
+    purchase(purchase_client)
+    assert server.competitions[0]['numberOfPlaces'] == '96'
+
+
+def test_expired_key_is_processed_again(purchase_client):
+    """Une clé expirée est traitée comme une nouvelle réservation"""
+    with patch.dict(app.config, {'IDEMPOTENCY_TTL': 0}):
+        purchase(purchase_client, idempotency_key='old')
+        purchase(purchase_client, idempotency_key='old')
+    assert server.competitions[0]['numberOfPlaces'] == '96'
+
+
+def test_store_is_bounded(purchase_client):
+    """Les clés les moins récemment utilisées sont oubliées au-delà de la limite"""
+    with patch.dict(app.config, {'IDEMPOTENCY_MAX_KEYS': 2}):
+        for key in ('k1', 'k2', 'k3'):
+            purchase(purchase_client, places='1', idempotency_key=key)
+    assert len(server.idempotencyResults) == 2
+    assert [key[-1] for key in server.idempotencyResults] == ['k2', 'k3']
+
+
+def test_failed_purchase_releases_key(purchase_client):
+    """Une erreur pendant la réservation libère la clé pour un nouvel essai"""
+    with patch.dict(app.config, {'PROPAGATE_EXCEPTIONS': True}), \
+         patch('server.processBooking', side_effect=RuntimeError), \
+         pytest.raises(RuntimeError):
+        purchase(purchase_client, idempotency_key='retry')
+    response = purchase(purchase_client, idempotency_key='retry')
+    assert 'Idempotent-Replayed' not in response.headers
+    assert server.competitions[0]['numberOfPlaces'] == '98'
+
+
+def test_replay_spends_no_rate_limit_token(purchase_client):
+    """Renvoyer un résultat enregistré ne consomme pas de jeton du limiteur"""
+    with patch.dict(app.config, {'RATE_LIMIT_CLUB': 0.001, 'RATE_LIMIT_CLUB_BURST': 1}):
+        server.configureRateLimits()
+        first = purchase(purchase_client, idempotency_key='once')
+        second = purchase(purchase_client, idempotency_key='once')
+        third = purchase(purchase_client, idempotency_key='other')
+    assert first.status_code == second.status_code == 200
+    assert second.headers['Idempotent-Replayed'] == 'true'
+    assert third.status_code == 429
+
+
+def test_concurrent_submission_waits_for_original():
+    """Un envoi concurrent attend le résultat de l'envoi original"""
+    key = ('', 'localhost', 'Club A', 'abc')
+    entry, is_new = server.claimIdempotencyKey(key)
+    assert is_new
+    claimed = []
+    waiter = threading.Thread(target=lambda: claimed.append(server.claimIdempotencyKey(key)))
+    waiter.start()
+    waiter.join()
+    other_entry, other_is_new = claimed[0]
+    assert other_entry is entry and not other_is_new
+    assert not entry['done'].is_set()
+    server.releaseIdempotencyKey(key, entry, app.response_class('done'))
+    assert entry['done'].wait(1)
+    assert entry['response'][0] == b'done'
@@ -196,4 +196,39 @@ class TestConstraintValidation:
         
         for available, requested, expected_valid in test_cases:
             is_valid = available >= requested
-            assert is_valid == expected_valid
\ No newline at end of file
+            assert is_valid == expected_valid
+
+class TestLimitingFactors:
+    """Tests pour les contraintes limitantes renvoyées par calculateBookingLimits()"""
+
+    @pytest.mark.parametrize('points, places, booked, expected, text', [
+        ('20', '20', 0, ('places_limit',), '12 places max per club (12 remaining)'),
+        ('3', '20', 0, ('points',), 'your 3 available points'),
+        ('20', '5', 0, ('competition_places',), '5 available places in competition'),
+        ('7', '20', 5, ('places_limit', 'points'), '12 places max per club (7 remaining) and your 7 points'),
+        ('4', '4', 0, ('points', 'competition_places'), 'your 4 points and 4 available places'),
+        ('12', '12', 0, ('places_limit', 'points', 'competition_places'),
+         '12 places max per club (12 remaining), your 12 points, and 12 available places'),
+    ])
+    def test_limited_by(self, points, places, booked, expected, text):
+        """Test des contraintes limitantes et du texte affiché"""
+        from server import calculateBookingLimits
+
+        bookings = [{'places': booked, 'status': 'confirmed'}] if booked else []
+        with patch('server.getClubBookingsForCompetition', return_value=bookings):
+            limits = calculateBookingLimits({'name': 'Club', 'points': points},
+                                            {'name': 'Comp', 'numberOfPlaces': places})
+
+        assert limits['limited_by'] == expected
+        assert limits['limited_by_text'] == text
+
+    def test_waitlist_max(self):
+        """Test du maximum proposé pour la liste d'attente"""
+        from server import calculateBookingLimits
+
+        with patch('server.getClubBookingsForCompetition', return_value=[{'places': 4, 'status': 'confirmed'}]):
+            limits = calculateBookingLimits({'name': 'Club', 'points': '20'},
+                                            {'name': 'Comp', 'numberOfPlaces': '0'})
+
+        assert limits['waitlist_max'] == 8
+        assert limits['limited_by'] == ('competition_places',)
@@ -0,0 +1,213 @@
+"""
+Tests unitaires pour le mode loterie (fenêtre de demandes + tirage groupé)
+"""
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+import server
+from server import openLotteryWindow, isLotteryWindowOpen, queueLotteryRequest, drawLottery, drawDueLotteries
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "20"},
+    {"name": "Club B", "email": "b@club.com", "points": "20"},
+    {"name": "Club C", "email": "c@club.com", "points": "2"}
+]
+COMPETITIONS = [
+    {"name": "Big Comp", "date": "2099-01-01 10:00:00", "numberOfPlaces": "15"}
+]
+
+
+@pytest.fixture
+def data(serve_data):
+    storage = serve_data(CLUBS, COMPETITIONS)
+    yield server.clubs, server.competitions, storage
+
+
+def close_window(name):
+    server.lotteryWindows[name]['closes_at'] = datetime.now() - timedelta(seconds=1)
+
+
+class TestLotteryWindow:
+    """Tests pour l'ouverture de la fenêtre et la mise en file"""
+
+    def test_window_open_and_closed(self, data):
+        """Test qu'une fenêtre est ouverte jusqu'à son échéance"""
+        openLotteryWindow("Big Comp", 10, seed=1)
+        assert isLotteryWindowOpen("Big Comp") is True
+
+        close_window("Big Comp")
+        assert isLotteryWindowOpen("Big Comp") is False
+
+    def test_queue_rejects_invalid_request(self, data):
+        """Test qu'une demande invalide est refusée immédiatement"""
+        clubs, competitions, _ = data
+        openLotteryWindow("Big Comp", 10, seed=1)
+
+        is_queued, error = queueLotteryRequest(clubs[0], competitions[0], 13)
+
+        assert is_queued is False
+        assert error == 'Impossible to reserve more than 12 places at once per competition.'
+
+    def test_queue_keeps_one_request_per_club(self, data):
+        """Test qu'un club n'a qu'une seule demande en file"""
+        clubs, competitions, _ = data
+        openLotteryWindow("Big Comp", 10, seed=1)
+
+        queueLotteryRequest(clubs[0], competitions[0], 3)
+        queueLotteryRequest(clubs[0], competitions[0], 5)
+
+        assert server.lotteryWindows["Big Comp"]['requests'] == {"Club A": 5}
+
+    def test_windows_are_persisted(self, data):
+        """Test que les fenêtres et leurs demandes survivent à un rechargement"""
+        clubs, competitions, storage = data
+        window = openLotteryWindow("Big Comp", 10, seed=3)
+        queueLotteryRequest(clubs[0], competitions[0], 4)
+
+        server.loadData()
+
+        assert server.lotteryWindows == {"Big Comp": dict(window, requests={"Club A": 4})}
+        assert storage.read('lottery.json')['lottery']["Big Comp"]['seed'] == 3
+
+
+class TestDrawLottery:
+    """Tests pour le tirage groupé"""
+
+    def test_draw_respects_capacity_and_saves_once(self, data):
+        """Test que le tirage respecte la capacité et sauvegarde une seule fois"""
+        clubs, competitions, storage = data
+        openLotteryWindow("Big Comp", 10, seed=42)
+        queueLotteryRequest(clubs[0], competitions[0], 10)
+        queueLotteryRequest(clubs[1], competitions[0], 10)
+        queueLotteryRequest(clubs[2], competitions[0], 2)
+
+        with patch.object(storage, 'write', side_effect=AssertionError('separate write')), \
+             patch.object(storage, 'writeMany', wraps=storage.writeMany) as write_many:
+            results = drawLottery("Big Comp")
+
+        allocated = [r for r in results if r['allocated']]
+        assert sum(r['places'] for r in allocated) <= 15
+        assert int(competitions[0]['numberOfPlaces']) == 15 - sum(r['places'] for r in allocated)
+        assert len(server.bookings) == len(allocated)
+        assert "Big Comp" not in server.lotteryWindows
+        write_many.assert_called_once()
+        assert storage.read('lottery.json')['lottery'] == {}
+        assert storage.read('bookings.json')['bookings'] == server.bookings
+
+    def test_draw_is_reproducible_with_seed(self, data):
+        """Test que le même seed donne le même ordre de tirage"""
+        clubs, competitions, _ = data
+        orders = []
+        for _ in range(2):
+            openLotteryWindow("Big Comp", 10, seed=7)
+            server.lotteryWindows["Big Comp"]['requests'] = {"Club B": 1, "Club A": 1, "Club C": 1}
+            orders.append([r['club'] for r in drawLottery("Big Comp")])
+
+        assert orders[0] == orders[1]
+
+    def test_draw_due_lotteries_only_closed_windows(self, data):
+        """Test que seules les fenêtres fermées sont tirées"""
+        openLotteryWindow("Big Comp", 10, seed=1)
+        assert drawDueLotteries() == {}
+
+        close_window("Big Comp")
+        assert drawDueLotteries() == {"Big Comp": []}
+
+
+class TestPurchasePlacesLotteryMode:
+    """Tests d'intégration de purchasePlaces pendant une fenêtre"""
+
+    def test_purchase_is_queued_during_window(self, data):
+        """Test qu'une réservation est mise en file au lieu d'être traitée"""
+        clubs, competitions, _ = data
+        openLotteryWindow("Big Comp", 10, seed=1)
+
+        with server.app.test_client() as client:
+            response = client.post('/purchasePlaces', data={
+                'competition': 'Big Comp', 'club': 'Club A', 'places': '4'
+            })
+
+        assert b'registered for the lottery draw' in response.data
+        assert competitions[0]['numberOfPlaces'] == "15"
+        assert server.bookings == []
+
+
+class TestLotteryTimer:
+    """Tests du tirage en arrière-plan"""
+
+    def test_due_window_is_drawn_without_purchase(self, data):
+        """Test que le minuteur tire une fenêtre fermée sans attendre d'achat"""
+        clubs, competitions, storage = data
+        openLotteryWindow("Big Comp", 10, seed=1)
+        queueLotteryRequest(clubs[0], competitions[0], 4)
+        assert server.lotteryTimer.drawDue() is True
+
+        close_window("Big Comp")
+        assert server.lotteryTimer.drawDue() is False
+
+        assert competitions[0]['numberOfPlaces'] == "11"
+        assert storage.read('competitions.json')['competitions'][0]['numberOfPlaces'] == "11"
+
+    def test_tenant_windows_are_drawn(self, data):
+        """Test que les fenêtres des fédérations chargées sont aussi tirées"""
+        tenant = server.Dataset(server.MemoryStorage(server.datasetContents(server.currentDataset(), server.SAVE_ALL_FILES)))
+        with server.servingDataset(tenant):
+            server.loadData()
+            openLotteryWindow("Big Comp", 10, seed=1)
+            queueLotteryRequest(tenant.clubs[0], tenant.competitions[0], 2)
+        tenant.lotteryWindows["Big Comp"]['closes_at'] = datetime.now() - timedelta(seconds=1)
+
+        with patch.dict(server.tenants, {'ffhm': {'storage': tenant.storage, 'dataset': tenant}}):
+            assert server.lotteryTimer.drawDue() is False
+
+        assert tenant.competitions[0]['numberOfPlaces'] == "13"
+        assert server.competitions[0]['numberOfPlaces'] == "15"
+
+
+class TestAdminLottery:
+    """Tests de la route d'administration des fenêtres"""
+
+    @pytest.fixture
+    def admin(self, data):
+        with patch.dict(server.app.config, {'ADMIN_TOKEN': 'secret'}), \
+             server.app.test_client() as client:
+            yield client
+
+    def test_requires_token(self, admin):
+        """Test que la route est refusée sans jeton"""
+        response = admin.post('/admin/lottery', json={'competition': 'Big Comp', 'minutes': 10})
+        assert response.status_code == 403
+        assert server.lotteryWindows == {}
+
+    def test_opens_window(self, admin):
+        """Test que la route ouvre une fenêtre et la liste"""
+        response = admin.post('/admin/lottery', json={'competition': 'Big Comp', 'minutes': 10, 'seed': 5},
+                              headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == 200
+        assert response.get_json()["Big Comp"]['requests'] == 0
+        assert server.lotteryWindows["Big Comp"]['seed'] == 5
+
+    @pytest.mark.parametrize('settings, status', [
+        ({'competition': 'Unknown', 'minutes': 10}, 404),
+        ({'competition': 'Big Comp', 'minutes': 0}, 400),
+        ({'competition': 'Big Comp', 'minutes': '10'}, 400),
+        ({'competition': 'Big Comp', 'minutes': 10, 'seed': 'x'}, 400),
+    ])
+    def test_rejects_invalid_settings(self, admin, settings, status):
+        """Test que les paramètres invalides sont refusés"""
+        response = admin.post('/admin/lottery', json=settings, headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == status
+        assert server.lotteryWindows == {}
+
+    def test_rejects_pending_lottery(self, admin):
+        """Test qu'une fenêtre en attente de tirage n'est pas remplacée"""
+        openLotteryWindow("Big Comp", 10, seed=1)
+        server.lotteryWindows["Big Comp"]['requests'] = {"Club A": 2}
+        close_window("Big Comp")
+
+        response = admin.post('/admin/lottery', json={'competition': 'Big Comp', 'minutes': 10},
+                              headers={'X-Admin-Token': 'secret'})
+
+        assert response.status_code == 409
+        assert server.lotteryWindows["Big Comp"]['requests'] == {"Club A": 2}
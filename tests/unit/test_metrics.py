@@ -0,0 +1,68 @@
+"""
+Tests unitaires pour l'endpoint /metrics
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import app, bookingRejectionReason, observeHistogram, renderMetrics, writeJsonFile
+
+
+@pytest.fixture
+def fresh_metrics():
+    empty = {'route_latency': {}, 'requests': {}, 'purchases': {}, 'save_seconds': {}, 'save_bytes': {}}
+    with patch.object(server, 'metrics', empty), patch.object(server, 'memoStats', {}):
+        yield empty
+
+
+class TestMetricsHelpers:
+    """Tests pour les fonctions de collecte"""
+
+    def test_rejection_reasons(self):
+        """Test du classement des messages d'erreur de validation"""
+        assert bookingRejectionReason('Number of places must be greater than 0.') == 'non_positive_places'
+        assert bookingRejectionReason('Not enough points. You need 5 points but only have 3.') == 'not_enough_points'
+        assert bookingRejectionReason('Something else') == 'other'
+
+    def test_histogram_buckets(self, fresh_metrics):
+        """Test que les buckets sont cumulatifs"""
+        observeHistogram(fresh_metrics['route_latency'], ('/',), 0.02)
+
+        h = fresh_metrics['route_latency'][('/',)]
+        assert h['count'] == 1
+        assert h['buckets'][:3] == [0, 0, 1]
+        assert h['buckets'][-1] == 1
+
+    def test_write_records_bytes(self, fresh_metrics, serve_data):
+        """Test que la sauvegarde enregistre les octets écrits"""
+        serve_data([], [])
+        writeJsonFile('clubs.json', {'clubs': []})
+
+        assert fresh_metrics['save_bytes'][('clubs.json',)] == len('{\n    "clubs": []\n}')
+        assert fresh_metrics['save_seconds'][('clubs.json',)]['count'] == 1
+
+
+class TestMetricsEndpoint:
+    """Tests pour la route /metrics"""
+
+    def test_route_latency_and_dataset_sizes(self, fresh_metrics, serve_data):
+        """Test que la latence des routes et la taille des données sont exposées"""
+        serve_data([{'name': 'Club A', 'email': 'a@club.com', 'points': '1'}], [])
+        with app.test_client() as client:
+            client.get('/')
+            body = client.get('/metrics').data.decode('utf-8')
+
+        assert 'gudlft_request_duration_seconds_count{route="/"} 1' in body
+        assert 'gudlft_requests_total{route="/",status="200"} 1' in body
+        assert 'gudlft_clubs 1' in body
+
+    def test_purchase_counters(self, fresh_metrics, serve_data):
+        """Test des compteurs de réservations acceptées et refusées"""
+        serve_data([{"name": "Club A", "email": "a@club.com", "points": "10"}],
+                   [{"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}])
+        with app.test_client() as client:
+            client.post('/purchasePlaces', data={'competition': 'Comp 1', 'club': 'Club A', 'places': '2'})
+            client.post('/purchasePlaces', data={'competition': 'Comp 1', 'club': 'Club A', 'places': '13'})
+
+        body = renderMetrics()
+        assert 'gudlft_purchases_total{result="accepted",reason=""} 1' in body
+        assert 'gudlft_purchases_total{result="rejected",reason="over_12_per_booking"} 1' in body
@@ -0,0 +1,101 @@
+"""
+Tests unitaires pour le pré-rendu des pages statiques (accueil et tableau public)
+"""
+import time
+import pytest
+from unittest.mock import patch
+import server
+from server import app
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "10"},
+    {"name": "Club B", "email": "b@club.com", "points": "5"}
+]
+COMPETITIONS = [{"name": "Future Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}]
+
+
+@pytest.fixture
+def data(serve_data, tmp_path):
+    # Pages are only rendered by the requests of the test unless it starts a worker
+    with patch.object(server, 'prerendered', {}), \
+         patch.object(server.prerenderWorker, 'schedule'), \
+         patch.dict(app.config, {'PRERENDER_DIR': str(tmp_path), 'PRERENDER_SENDFILE': ''}):
+        serve_data(CLUBS, COMPETITIONS)
+        yield server.clubs, server.competitions[0], tmp_path
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_public_points_rendered_once_per_version(data):
+    """Le tableau public n'est rendu qu'une fois par version des données"""
+    clubs, competition, _ = data
+    with app.test_client() as client, patch('server.render_template', wraps=server.render_template) as render:
+        client.get('/public/points')
+        client.get('/public/points')
+        assert render.call_count == 1
+        server.processBooking(clubs[0], competition, 6)
+        page = client.get('/public/points').data.decode('utf-8')
+        assert render.call_count == 2
+    assert page.index('Club B') < page.index('Club A')
+
+
+def test_pages_written_to_directory(data):
+    """Les pages pré-rendues sont écrites dans PRERENDER_DIR"""
+    _, _, tmp_path = data
+    with app.test_client() as client:
+        index = client.get('/').data
+        points = client.get('/public/points').data
+    assert (tmp_path / 'index.html').read_bytes() == index
+    assert (tmp_path / 'public' / 'points.html').read_bytes() == points
+    assert b'Club A' in points
+
+
+def test_files_refreshed_without_request(data):
+    """Le fichier est régénéré après une réservation, sans requête vers Python"""
+    clubs, competition, tmp_path = data
+    points = tmp_path / 'public' / 'points.html'
+    with patch.object(server, 'prerenderWorker', server.PrerenderWorker(0.01)):
+        server.publishSnapshot()
+        wait_for(points.exists)
+        assert points.read_text().index('Club A') < points.read_text().index('Club B')
+        server.processBooking(clubs[0], competition, 6)
+        wait_for(lambda: points.read_text().index('Club B') < points.read_text().index('Club A'))
+
+
+def test_tenant_files_in_their_directory(data):
+    """Les pages d'une fédération sont écrites dans son sous-dossier"""
+    _, _, tmp_path = data
+    tenant = server.Dataset(server.MemoryStorage(server.datasetContents(server.currentDataset(), server.SAVE_ALL_FILES)), 'ffhm')
+    with server.servingDataset(tenant):
+        server.loadData()
+    server.prerenderWorker.render(tenant)
+    page = (tmp_path / 'ffhm' / 'public' / 'points.html').read_bytes()
+    assert b'Club A' in page
+    assert b'href="/ffhm/"' in page
+
+
+@pytest.mark.parametrize('sendfile, header, expected', [
+    ('x-accel', 'X-Accel-Redirect', '/prerendered/public/points.html'),
+    ('x-sendfile', 'X-Sendfile', 'points.html'),
+])
+def test_sendfile_headers(data, sendfile, header, expected):
+    """Le serveur web envoie le fichier désigné par l'en-tête"""
+    with patch.dict(app.config, {'PRERENDER_SENDFILE': sendfile}), app.test_client() as client:
+        response = client.get('/public/points')
+    assert response.headers[header].endswith(expected)
+    assert response.data == b''
+
+
+def test_served_from_memory_without_directory(data):
+    """Sans dossier configuré, la page est servie depuis la mémoire"""
+    with patch.dict(app.config, {'PRERENDER_DIR': None, 'PRERENDER_SENDFILE': 'x-accel'}), \
+         app.test_client() as client:
+        response = client.get('/')
+    assert 'X-Accel-Redirect' not in response.headers
+    assert b'Club Secretary Login' in response.data
@@ -0,0 +1,130 @@
+"""
+Tests unitaires pour le profilage par échantillonnage
+"""
+import pstats
+import pytest
+import threading
+from unittest.mock import patch
+import server
+from server import app, configureProfiler, profileFilename, startProfiler
+
+
+@pytest.fixture
+def profiler(tmp_path):
+    state = {'enabled': False, 'sample_rate': 0.01, 'directory': str(tmp_path), 'stats': {}, 'samples': {}}
+    app.config['ADMIN_TOKEN'] = 'secret'
+    with patch.object(server, 'profilerState', state):
+        yield state
+    app.config['ADMIN_TOKEN'] = None
+
+
+class TestProfilerSettings:
+    """Tests pour configureProfiler() et profileFilename()"""
+
+    def test_profile_filename(self):
+        """Test du nom de fichier par route"""
+        assert profileFilename('/book/<competition>') == 'book_competition.prof'
+        assert profileFilename('/') == 'index.prof'
+
+    def test_invalid_sample_rate(self, profiler):
+        """Test qu'un taux hors de [0, 1] est refusé"""
+        assert configureProfiler(sample_rate=2) == (False, 'sample_rate must be between 0 and 1.')
+        assert profiler['sample_rate'] == 0.01
+
+
+class TestProfilerSampling:
+    """Tests de l'échantillonnage des requêtes"""
+
+    def test_sampled_requests_are_aggregated_on_disk(self, profiler, tmp_path):
+        """Test que les requêtes échantillonnées sont agrégées par route"""
+        configureProfiler(enabled=True, sample_rate=1)
+        with app.test_client() as client:
+            client.get('/')
+            client.get('/')
+
+        assert profiler['samples'] == {'/': 2}
+        stats = pstats.Stats(str(tmp_path / 'index.prof'))
+        assert stats.total_calls > 0
+
+    def test_disabled_profiler_samples_nothing(self, profiler):
+        """Test qu'aucune requête n'est profilée quand le profilage est désactivé"""
+        configureProfiler(enabled=False, sample_rate=1)
+        with app.test_client() as client:
+            client.get('/')
+
+        assert profiler['samples'] == {}
+
+    def test_overlapping_requests_profile_one_at_a_time(self, profiler):
+        """Test qu'une requête arrivant pendant une requête profilée n'est pas profilée"""
+        configureProfiler(enabled=True, sample_rate=1)
+        responses = []
+
+        def otherRequest():
+            with app.test_client() as client:
+                responses.append(client.get('/'))
+
+        with app.test_request_context('/'):
+            startProfiler()
+            other = threading.Thread(target=otherRequest)
+            other.start()
+            other.join()
+
+        assert responses[0].status_code == 200
+        assert profiler['samples'] == {'/': 1}
+        assert not server.activeProfilerLock.locked()
+
+    def test_other_profiling_tool_skips_sampling(self, profiler):
+        """Test qu'un autre outil de profilage actif n'entraîne pas d'erreur 500"""
+        configureProfiler(enabled=True, sample_rate=1)
+        with patch.object(server.cProfile.Profile, 'enable',
+                          side_effect=ValueError('Another profiling tool is already active')):
+            with app.test_client() as client:
+                response = client.get('/')
+
+        assert response.status_code == 200
+        assert profiler['samples'] == {}
+        assert not server.activeProfilerLock.locked()
+
+
+class TestAdminProfilerRoute:
+    """Tests pour la route /admin/profiler"""
+
+    def test_requires_admin_token(self, profiler):
+        """Test que la route est refusée sans jeton administrateur"""
+        with app.test_client() as client:
+            assert client.get('/admin/profiler').status_code == 403
+            assert client.get('/admin/profiler', headers={'X-Admin-Token': 'wrong'}).status_code == 403
+
+    def test_disabled_without_configured_token(self, profiler):
+        """Test que la route est désactivée si aucun jeton n'est configuré"""
+        app.config['ADMIN_TOKEN'] = None
+        with app.test_client() as client:
+            assert client.get('/admin/profiler', headers={'X-Admin-Token': ''}).status_code == 403
+
+    def test_update_settings(self, profiler):
+        """Test de l'activation du profilage à chaud"""
+        with app.test_client() as client:
+            response = client.post('/admin/profiler', headers={'X-Admin-Token': 'secret'},
+                                   json={'enabled': True, 'sample_rate': 0.5})
+
+        assert response.status_code == 200
+        assert response.get_json()['enabled'] is True
+        assert profiler['sample_rate'] == 0.5
+
+    def test_invalid_sample_rate_rejected(self, profiler):
+        """Test qu'un taux invalide renvoie une erreur 400"""
+        with app.test_client() as client:
+            response = client.post('/admin/profiler', headers={'X-Admin-Token': 'secret'},
+                                   json={'sample_rate': 'often'})
+
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize('enabled', ['false', 0, 1, None])
+    def test_invalid_enabled_rejected(self, profiler, enabled):
+        """Test que enabled doit être un booléen"""
+        with app.test_client() as client:
+            response = client.post('/admin/profiler', headers={'X-Admin-Token': 'secret'},
+                                   json={'enabled': enabled})
+
+        assert response.status_code == 400
+        assert profiler['enabled'] is False
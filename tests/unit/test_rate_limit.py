@@ -0,0 +1,75 @@
+"""
+Tests unitaires pour la limitation de débit et le contrôle d'admission de purchasePlaces
+"""
+from unittest.mock import patch
+import server
+from server import TokenBucket, app
+
+
+def purchase(client, club='Club A'):
+    return client.post('/purchasePlaces', data={'competition': 'Future Cup', 'club': club, 'places': '1'})
+
+
+def test_token_bucket_refills():
+    """Le seau se remplit au débit configuré, sans dépasser sa capacité"""
+    with patch('server.time.monotonic', side_effect=[0, 0, 0, 0, 0.5, 10]):
+        bucket = TokenBucket(rate=2, capacity=2)
+        assert bucket.take()
+        assert bucket.take()
+        assert not bucket.take()
+        assert bucket.take()
+        assert bucket.take()
+    assert bucket.tokens == 1
+
+
+def test_club_rate_limit(purchase_client):
+    """Au-delà de sa rafale, un club reçoit un 429 sans bloquer les autres clubs"""
+    with patch.dict(app.config, {'RATE_LIMIT_CLUB': 0.001, 'RATE_LIMIT_CLUB_BURST': 2}):
+        server.configureRateLimits()
+        assert purchase(purchase_client).status_code == 200
+        assert purchase(purchase_client).status_code == 200
+        response = purchase(purchase_client)
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+        assert purchase(purchase_client, 'Club B').status_code == 200
+
+
+def test_global_rate_limit(purchase_client):
+    """La limite globale s'applique à tous les clubs"""
+    with patch.dict(app.config, {'RATE_LIMIT_GLOBAL': 0.001, 'RATE_LIMIT_GLOBAL_BURST': 1}):
+        server.configureRateLimits()
+        assert purchase(purchase_client).status_code == 200
+        assert purchase(purchase_client, 'Club B').status_code == 429
+
+
+def test_rejected_before_any_lookup(purchase_client):
+    """Une requête refusée ne fait aucune recherche de club ou de compétition"""
+    with patch.dict(app.config, {'RATE_LIMIT_GLOBAL': 0.001, 'RATE_LIMIT_GLOBAL_BURST': 0}), \
+         patch('server.findClubByName') as find_club, \
+         patch('server.findCompetitionByName') as find_competition:
+        server.configureRateLimits()
+        assert purchase(purchase_client).status_code == 429
+    find_club.assert_not_called()
+    find_competition.assert_not_called()
+
+
+def test_admission_queue_full(purchase_client):
+    """Quand la file d'admission est pleine, la requête est refusée immédiatement"""
+    with patch.dict(app.config, {'ADMISSION_MAX_DEPTH': 1}):
+        server.configureRateLimits()
+        slots = server.rateLimits['slots']
+        slots.acquire()
+        try:
+            assert purchase(purchase_client).status_code == 429
+        finally:
+            slots.release()
+        # Each request releases its slot when it ends
+        assert purchase(purchase_client).status_code == 200
+        assert purchase(purchase_client).status_code == 200
+
+
+def test_other_routes_not_limited(purchase_client):
+    """Les autres routes ne sont pas limitées"""
+    with patch.dict(app.config, {'RATE_LIMIT_GLOBAL': 0.001, 'RATE_LIMIT_GLOBAL_BURST': 0}):
+        server.configureRateLimits()
+        assert purchase_client.get('/public/points').status_code == 200
@@ -0,0 +1,68 @@
+"""
+Tests unitaires pour la mémoïsation par requête (flask.g)
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import app, requestMemo, forgetRequestMemo, calculateBookingLimitsCached
+
+
+class TestRequestMemo:
+    """Tests pour requestMemo()"""
+
+    @patch('server.memoStats', {})
+    def test_value_computed_once_per_request(self):
+        """Test qu'une valeur n'est calculée qu'une fois dans une requête"""
+        calls = []
+        with app.test_request_context('/'):
+            first = requestMemo('kind', 'key', lambda: calls.append(1) or 'value')
+            second = requestMemo('kind', 'key', lambda: calls.append(1) or 'other')
+
+        assert first == second == 'value'
+        assert len(calls) == 1
+        assert server.memoStats['kind'] == {'hits': 1, 'misses': 1}
+
+    @patch('server.memoStats', {})
+    def test_memo_does_not_outlive_request(self):
+        """Test que le cache est propre à chaque requête"""
+        with app.test_request_context('/'):
+            requestMemo('kind', 'key', lambda: 1)
+        with app.test_request_context('/'):
+            assert requestMemo('kind', 'key', lambda: 2) == 2
+
+    def test_outside_request_always_computes(self):
+        """Test qu'en dehors d'une requête la valeur est simplement calculée"""
+        assert requestMemo('kind', 'key', lambda: 1) == 1
+        assert requestMemo('kind', 'key', lambda: 2) == 2
+
+    @patch('server.memoStats', {})
+    def test_forget_only_drops_one_kind(self):
+        """Test que forgetRequestMemo() n'efface que le type demandé"""
+        with app.test_request_context('/'):
+            requestMemo('limits', 'a', lambda: 1)
+            requestMemo('club', 'a', lambda: 1)
+            forgetRequestMemo('limits')
+
+            assert requestMemo('limits', 'a', lambda: 2) == 2
+            assert requestMemo('club', 'a', lambda: 2) == 1
+
+    def test_limits_recomputed_after_booking(self, serve_data):
+        """Test que les limites sont recalculées après une réservation"""
+        serve_data([{"name": "Club A", "email": "a@club.com", "points": "10"}],
+                   [{"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}])
+        club, competition = server.clubs[0], server.competitions[0]
+        with app.test_request_context('/'):
+            assert calculateBookingLimitsCached(club, competition)['max_remaining'] == 10
+            server.processBooking(club, competition, 4)
+            assert calculateBookingLimitsCached(club, competition)['max_remaining'] == 6
+
+    def test_rejected_purchase_computes_limits_once(self, serve_data):
+        """Test qu'une réservation refusée ne calcule les limites qu'une fois"""
+        serve_data([{"name": "Club A", "email": "a@club.com", "points": "10"}],
+                   [{"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}])
+        with patch('server.calculateBookingLimits', wraps=server.calculateBookingLimits) as limits, \
+             app.test_client() as client:
+            response = client.post('/purchasePlaces', data={'competition': 'Comp 1', 'club': 'Club A', 'places': '11'})
+
+        assert b'Not enough points' in response.data
+        assert limits.call_count == 1
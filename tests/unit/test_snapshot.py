@@ -0,0 +1,70 @@
+"""
+Tests unitaires pour les versions en lecture seule des données (snapshots)
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import getSnapshot, publishSnapshot, snapshotClubByEmail
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "10"},
+    {"name": "Club B", "email": "b@club.com", "points": "5"}
+]
+COMPETITIONS = [{"name": "Future Cup", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}]
+
+
+@pytest.fixture
+def data(serve_data):
+    serve_data(CLUBS, COMPETITIONS)
+    yield server.clubs, server.competitions[0]
+
+
+def test_snapshot_is_read_only(data):
+    """Les lecteurs ne peuvent pas modifier une version"""
+    current = getSnapshot()
+    with pytest.raises(TypeError):
+        current['clubs'][0]['points'] = '99'
+    assert getSnapshot() is current
+
+
+def test_booking_publishes_new_version(data):
+    """Une réservation publie une nouvelle version sans modifier l'ancienne"""
+    clubs, competition = data
+    before = getSnapshot()
+    server.processBooking(clubs[0], competition, 3)
+    after = getSnapshot()
+
+    assert after['version'] == before['version'] + 1
+    assert before['clubs'][0]['points'] == '10'
+    assert before['competitions'][0]['numberOfPlaces'] == '20'
+    assert after['clubs'][0]['points'] == '7'
+    assert after['competitions'][0]['numberOfPlaces'] == '17'
+    # Les clubs non modifiés sont partagés entre les versions
+    assert after['clubs'][1] is before['clubs'][1]
+
+
+def test_replaced_lists_are_copied_again(data):
+    """Une nouvelle version complète est faite si les listes sont remplacées"""
+    getSnapshot()
+    with patch.object(server, 'clubs', [{"name": "Club C", "email": "c@club.com", "points": "1"}]):
+        assert [club['name'] for club in getSnapshot()['clubs']] == ['Club C']
+
+
+def test_derived_values_are_computed_once_per_version(data):
+    """Les valeurs dérivées sont calculées une fois par version"""
+    current = getSnapshot()
+    assert snapshotClubByEmail(current, 'b@club.com')['name'] == 'Club B'
+    assert snapshotClubByEmail(current, 'x@club.com') is None
+    assert 'clubs_by_email' in current['derived']
+    assert 'clubs_by_email' not in publishSnapshot()['derived']
+
+
+def test_public_points_ranking_follows_versions(data):
+    """Le classement public suit les versions publiées"""
+    clubs, competition = data
+    with server.app.test_client() as client:
+        client.get('/public/points')
+        server.processBooking(clubs[0], competition, 6)
+        page = client.get('/public/points').data.decode('utf-8')
+    assert page.index('Club B') < page.index('Club A')
@@ -0,0 +1,82 @@
+"""
+Tests unitaires pour les stockages de données (fichiers JSON et mémoire)
+"""
+import json
+import pytest
+import server
+from server import JsonFileStorage, MemoryStorage, useStorage
+
+
+class TestJsonFileStorage:
+    """Tests unitaires pour JsonFileStorage"""
+
+    def test_read_and_write_in_directory(self, tmp_path):
+        """Test que les fichiers sont lus et écrits dans le dossier configuré"""
+        storage = JsonFileStorage(str(tmp_path))
+        storage.write('clubs.json', json.dumps({'clubs': []}))
+        assert storage.read('clubs.json') == {'clubs': []}
+        assert (tmp_path / 'clubs.json').exists()
+
+    def test_read_missing_file(self, tmp_path):
+        """Test qu'un fichier absent lève FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            JsonFileStorage(str(tmp_path)).read('bookings.json')
+
+    def test_writeMany_leaves_no_temporary_file(self, tmp_path):
+        """Test que writeMany remplace les fichiers sans laisser de fichier temporaire"""
+        storage = JsonFileStorage(str(tmp_path))
+        storage.writeMany({'a.json': '{"a": 1}', 'b.json': '{"b": 2}'})
+        assert sorted(p.name for p in tmp_path.iterdir()) == ['a.json', 'b.json']
+        assert storage.read('b.json') == {'b': 2}
+
+
+class TestMemoryStorage:
+    """Tests unitaires pour MemoryStorage"""
+
+    def test_read_returns_a_fresh_copy(self):
+        """Test que chaque lecture renvoie de nouveaux objets"""
+        storage = MemoryStorage({'clubs.json': '{"clubs": [{"name": "Club"}]}'})
+        first = storage.read('clubs.json')
+        first['clubs'].clear()
+        assert storage.read('clubs.json') == {'clubs': [{'name': 'Club'}]}
+
+    def test_read_missing_file(self):
+        """Test qu'un fichier absent lève FileNotFoundError"""
+        with pytest.raises(FileNotFoundError):
+            MemoryStorage().read('waitlist.json')
+
+    def test_files_are_not_shared(self):
+        """Test que deux stockages créés depuis les mêmes fichiers sont indépendants"""
+        files = {'clubs.json': '{"clubs": []}'}
+        first, second = MemoryStorage(files), MemoryStorage(files)
+        first.write('clubs.json', '{"clubs": [1]}')
+        assert second.read('clubs.json') == {'clubs': []}
+
+
+class TestUseStorage:
+    """Tests unitaires pour useStorage()"""
+
+    def test_loads_and_restores_data(self):
+        """Test que les données du stockage sont servies puis que l'état précédent est restauré"""
+        previous_clubs = server.clubs
+        storage = MemoryStorage({
+            'clubs.json': json.dumps({'clubs': [{'name': 'Club', 'email': 'c@club.com', 'points': '5'}]}),
+            'competitions.json': json.dumps({'competitions': []}),
+            'bookings.json': json.dumps({'bookings': [], 'next_id': 42})
+        })
+        with useStorage(storage):
+            assert server.clubs[0]['name'] == 'Club'
+            assert server.bookings == []
+            assert server.waitlist == {}
+            assert server.allocateBookingId() == 42
+        assert server.clubs is previous_clubs
+        assert server.storage is not storage
+
+    def test_saves_go_to_memory(self, memory_storage, tmp_path, monkeypatch):
+        """Test que les sauvegardes restent en mémoire"""
+        monkeypatch.chdir(tmp_path)
+        server.clubs[0]['points'] = '99'
+        server.saveClubs()
+        server.saveAll()
+        assert memory_storage.read('clubs.json')['clubs'][0]['points'] == '99'
+        assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,30 @@
+"""
+Tests unitaires pour le cache des templates compilés
+"""
+import server
+from server import app, configureTemplateCache, precompileTemplates
+
+
+def test_templates_are_compiled_at_startup():
+    """Les templates sont compilés à l'import du serveur"""
+    cached = {name for _, name in app.jinja_env.cache.keys()}
+    assert {'booking.html', 'welcome.html', 'index.html', 'public_points.html'} <= cached
+
+
+def test_bytecode_cache_on_disk(tmp_path):
+    """Les templates compilés sont écrits dans le dossier de cache"""
+    previous = app.jinja_env.bytecode_cache
+    try:
+        configureTemplateCache(str(tmp_path / 'templates'))
+        app.jinja_env.cache.clear()
+        precompileTemplates()
+        assert len(list((tmp_path / 'templates').iterdir())) == len(app.jinja_env.list_templates(extensions=['html']))
+    finally:
+        app.jinja_env.bytecode_cache = previous
+        app.jinja_env.cache.clear()
+        precompileTemplates()
+
+
+def test_compiled_templates_keep_tracing():
+    """Les templates compilés utilisent toujours TracedTemplate"""
+    assert isinstance(app.jinja_env.get_template('index.html'), server.TracedTemplate)
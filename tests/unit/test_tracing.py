@@ -0,0 +1,84 @@
+"""
+Tests unitaires pour l'instrumentation par spans
+"""
+import json
+import logging
+import pytest
+from unittest.mock import patch
+from server import app, span, summarizeTrace, formatServerTiming, currentTrace, NULL_SPAN, traceLogger, configureTraceLogger
+
+
+@pytest.fixture
+def tracing():
+    app.config['TRACING'] = True
+    yield
+    app.config['TRACING'] = False
+
+
+class TestSpan:
+    """Tests pour span()"""
+
+    def test_span_is_noop_without_trace(self):
+        """Test qu'aucune mesure n'est faite hors d'une requête tracée"""
+        assert span('anything') is NULL_SPAN
+
+    def test_span_records_duration(self):
+        """Test qu'un span enregistre sa durée dans la trace courante"""
+        trace = []
+        token = currentTrace.set(trace)
+        try:
+            with span('stage'):
+                pass
+        finally:
+            currentTrace.reset(token)
+
+        assert len(trace) == 1
+        assert trace[0][0] == 'stage'
+        assert trace[0][1] >= 0
+
+    def test_summary_and_header(self):
+        """Test de l'agrégation par nom et du format Server-Timing"""
+        summary = summarizeTrace([('a', 0.001), ('b', 0.002), ('a', 0.001)])
+
+        assert summary == {'a': 2.0, 'b': 2.0}
+        assert formatServerTiming(summary, 5) == 'a;dur=2.0, b;dur=2.0, total;dur=5'
+
+
+class TestRequestTracing:
+    """Tests de la décomposition des temps par requête"""
+
+    def test_no_header_when_disabled(self):
+        """Test qu'aucun en-tête n'est ajouté quand le traçage est désactivé"""
+        with app.test_client() as client:
+            response = client.get('/')
+
+        assert 'Server-Timing' not in response.headers
+
+    def test_purchase_breakdown(self, tracing, caplog, serve_data):
+        """Test que chaque étape de purchasePlaces apparaît dans l'en-tête et le log"""
+        serve_data([{"name": "Club A", "email": "a@club.com", "points": "10"}],
+                   [{"name": "Comp 1", "date": "2099-01-01 10:00:00", "numberOfPlaces": "20"}])
+        with caplog.at_level(logging.INFO, logger='gudlft.trace'):
+            with app.test_client() as client:
+                response = client.post('/purchasePlaces', data={
+                    'competition': 'Comp 1', 'club': 'Club A', 'places': '2'
+                })
+
+        header = response.headers['Server-Timing']
+        for stage in ('competition', 'club', 'limits', 'validation', 'persist.clubs.json',
+                      'persist.competitions.json', 'persist.bookings.json', 'render.welcome.html', 'total'):
+            assert stage + ';dur=' in header
+
+        log_line = json.loads(caplog.records[-1].getMessage())
+        assert log_line['route'] == '/purchasePlaces'
+        assert 'validation' in log_line['spans']
+
+
+def test_trace_logger_emits_info_lines():
+    """Test que le logger de traces a un niveau INFO et un seul handler"""
+    with patch.object(traceLogger, 'handlers', []), patch.object(traceLogger, 'level', logging.NOTSET):
+        configureTraceLogger()
+        configureTraceLogger()
+
+        assert traceLogger.isEnabledFor(logging.INFO)
+        assert len(traceLogger.handlers) == 1
@@ -0,0 +1,191 @@
+"""
+Tests unitaires pour la liste d'attente et la promotion automatique
+"""
+import pytest
+from unittest.mock import patch
+import server
+from server import joinWaitlist, promoteWaitlist, addCompetitionPlaces, getWaitlistEntry
+
+
+CLUBS = [
+    {"name": "Club A", "email": "a@club.com", "points": "20"},
+    {"name": "Club B", "email": "b@club.com", "points": "20"},
+    {"name": "Club C", "email": "c@club.com", "points": "1"}
+]
+COMPETITIONS = [
+    {"name": "Full Comp", "date": "2099-01-01 10:00:00", "numberOfPlaces": "0"},
+    {"name": "Open Comp", "date": "2099-01-01 10:00:00", "numberOfPlaces": "5"},
+    {"name": "Past Comp", "date": "2020-01-01 10:00:00", "numberOfPlaces": "0"}
+]
+
+
+@pytest.fixture
+def data(serve_data):
+    storage = serve_data(CLUBS, COMPETITIONS)
+    yield server.clubs, server.competitions[0], storage
+
+
+class TestJoinWaitlist:
+    """Tests pour joinWaitlist()"""
+
+    def test_join_adds_entry_in_order(self, data):
+        """Test que les clubs sont ajoutés dans l'ordre d'arrivée"""
+        clubs, competition, storage = data
+
+        assert joinWaitlist(clubs[0], competition, 3) == (True, None)
+        assert joinWaitlist(clubs[1], competition, 2) == (True, None)
+
+        assert [e['club'] for e in server.waitlist["Full Comp"]] == ["Club A", "Club B"]
+        assert storage.read('waitlist.json')['waitlist'] == server.waitlist
+
+    def test_join_once_per_club(self, data):
+        """Test qu'un club ne peut être inscrit qu'une fois par compétition"""
+        clubs, competition, _ = data
+        joinWaitlist(clubs[0], competition, 3)
+
+        is_added, error = joinWaitlist(clubs[0], competition, 1)
+
+        assert is_added is False
+        assert error == 'Your club is already on the waitlist for this competition.'
+
+    def test_join_respects_club_caps(self, data):
+        """Test que la limite de 12 places et les points sont vérifiés"""
+        clubs, competition, _ = data
+
+        assert joinWaitlist(clubs[0], competition, 13)[0] is False
+        assert joinWaitlist(clubs[2], competition, 2)[0] is False
+        assert getWaitlistEntry("Club C", "Full Comp") is None
+
+    def test_join_rejects_past_competition(self, data):
+        """Test qu'une compétition passée n'a pas de liste d'attente"""
+        clubs, _, _ = data
+
+        is_added, error = joinWaitlist(clubs[0], server.competitions[2], 2)
+
+        assert is_added is False
+        assert error == 'Booking not allowed: competition date has passed.'
+        assert server.waitlist == {}
+
+    def test_join_rejects_competition_with_places(self, data):
+        """Test qu'on ne s'inscrit pas en liste d'attente s'il reste des places"""
+        clubs, _, _ = data
+
+        is_added, error = joinWaitlist(clubs[0], server.competitions[1], 2)
+
+        assert is_added is False
+        assert error == 'This competition still has places available: book them directly.'
+        assert server.waitlist == {}
+
+
+class TestPromoteWaitlist:
+    """Tests pour la promotion automatique"""
+
+    def test_added_places_promote_in_fifo_order(self, data):
+        """Test que l'ajout de places réserve pour les premiers de la file"""
+        clubs, competition, _ = data
+        joinWaitlist(clubs[0], competition, 3)
+        joinWaitlist(clubs[1], competition, 2)
+
+        promoted = addCompetitionPlaces(competition, 4)
+
+        assert [e['club'] for e in promoted] == ["Club A"]
+        assert competition['numberOfPlaces'] == "1"
+        assert clubs[0]['points'] == "17"
+        assert server.bookings[0]['club'] == "Club A"
+        # Club B attend toujours en tête de file
+        assert [e['club'] for e in server.waitlist["Full Comp"]] == ["Club B"]
+
+    def test_added_places_are_saved_in_one_commit(self, data):
+        """Test que l'ajout de places et la promotion sont sauvegardés ensemble"""
+        clubs, competition, storage = data
+        joinWaitlist(clubs[0], competition, 3)
+
+        with patch.object(storage, 'write', side_effect=AssertionError('separate write')), \
+             patch.object(storage, 'writeMany', wraps=storage.writeMany) as write_many:
+            addCompetitionPlaces(competition, 3)
+
+        write_many.assert_called_once()
+        assert storage.read('waitlist.json')['waitlist'] == {}
+        assert storage.read('competitions.json')['competitions'][0]['numberOfPlaces'] == "0"
+
+    def test_invalid_entry_is_dropped(self, data):
+        """Test qu'une entrée devenue invalide est retirée de la file"""
+        clubs, competition, _ = data
+        joinWaitlist(clubs[0], competition, 3)
+        clubs[0]['points'] = "0"
+
+        promoted = addCompetitionPlaces(competition, 5)
+
+        assert promoted == []
+        assert "Full Comp" not in server.waitlist
+        assert competition['numberOfPlaces'] == "5"
+
+    def test_promote_empty_waitlist(self, data):
+        """Test sans liste d'attente"""
+        _, competition, _ = data
+
+        assert promoteWaitlist(competition) == []
+
+
+class TestWaitlistRoute:
+    """Tests pour la route /waitlist"""
+
+    def test_waitlist_route(self, data):
+        """Test de l'inscription via le formulaire"""
+        with server.app.test_client() as client:
+            response = client.post('/waitlist', data={
+                'competition': 'Full Comp', 'club': 'Club A', 'places': '2'
+            })
+
+        assert b'You have joined the waitlist' in response.data
+        assert getWaitlistEntry("Club A", "Full Comp")['places'] == 2
+
+    def test_waitlist_route_rejects_past_competition(self, data):
+        """Test que le formulaire refuse une compétition passée"""
+        with server.app.test_client() as client:
+            response = client.post('/waitlist', data={
+                'competition': 'Past Comp', 'club': 'Club A', 'places': '2'
+            })
+
+        assert b'Booking not allowed: competition date has passed.' in response.data
+        assert server.waitlist == {}
+
+
+class TestAdminPlaces:
+    """Tests pour la route /admin/places"""
+
+    @pytest.fixture
+    def admin(self, data):
+        with patch.dict(server.app.config, {'ADMIN_TOKEN': 'secret'}), \
+             server.app.test_client() as client:
+            yield client
+
+    def test_requires_token(self, admin):
+        """Test que la route est refusée sans jeton"""
+        response = admin.post('/admin/places', json={'competition': 'Full Comp', 'places': 3})
+        assert response.status_code == 403
+        assert server.competitions[0]['numberOfPlaces'] == "0"
+
+    def test_adds_places_and_promotes(self, admin, data):
+        """Test que les places ajoutées sont réservées pour la liste d'attente"""
+        clubs, competition, _ = data
+        joinWaitlist(clubs[0], competition, 2)
+
+        response = admin.post('/admin/places', json={'competition': 'Full Comp', 'places': 5},
+                              headers={'X-Admin-Token': 'secret'})
+
+        assert response.status_code == 200
+        assert response.get_json() == {'competition': 'Full Comp', 'numberOfPlaces': 3,
+                                       'promoted': [{'club': 'Club A', 'places': 2}]}
+
+    @pytest.mark.parametrize('settings, status', [
+        ({'competition': 'Unknown', 'places': 3}, 404),
+        ({'competition': 'Full Comp', 'places': 0}, 400),
+        ({'competition': 'Full Comp', 'places': '3'}, 400),
+        ({'competition': 'Past Comp', 'places': 3}, 400),
+    ])
+    def test_rejects_invalid_settings(self, admin, settings, status):
+        """Test que les paramètres invalides sont refusés"""
+        response = admin.post('/admin/places', json=settings, headers={'X-Admin-Token': 'secret'})
+        assert response.status_code == status
+        assert [c['numberOfPlaces'] for c in server.competitions] == ["0", "5", "0"]